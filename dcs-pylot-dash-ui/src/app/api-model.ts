@@ -14,6 +14,7 @@ export type APISourceField = {
   field_id: string;
   default_unit_id: string;
   available_unit_ids: string[];
+  default_update_tier: APIUpdateTier;
 };
 
 export type APISourceModel = {
@@ -49,6 +50,7 @@ export type APIExportField = {
   field_id: string;
   unit_id: string;
   color_scale: APIColorScale | null;
+  update_tier: APIUpdateTier | null;
 };
 
 export type APIExportRow = {
@@ -64,8 +66,22 @@ export class AdvancedSettingsDefaults {
   static readonly LUA_BIND_ADDRESS: string = '127.0.0.1';
   static readonly LUA_BIND_PORT: number = 52025;
   static readonly POLL_INTERVAL_MS: number = 200;
+  static readonly TRANSPORT: APIDataTransport = 'poll';
+  static readonly SHARED_RUNTIME: boolean = false;
 }
 
+export const DATA_TRANSPORT_OPTIONS: { label: string; value: APIDataTransport }[] = [
+  { label: 'Polling', value: 'poll' },
+  { label: 'Server-Sent Events', value: 'sse' },
+  { label: 'WebSocket', value: 'websocket' },
+];
+
+export const UPDATE_TIER_OPTIONS: { label: string; value: APIUpdateTier }[] = [
+  { label: 'Every frame', value: 'frame' },
+  { label: 'Slow', value: 'slow' },
+  { label: 'Static', value: 'static' },
+];
+
 export class AdvancedSettingsConstraints {
   static readonly LUA_BIND_PORT_MIN: number = 49152;
   static readonly LUA_BIND_PORT_MAX: number = 65535;
@@ -74,8 +90,20 @@ export class AdvancedSettingsConstraints {
   static readonly POLL_INTERVAL_MS_MAX: number = 1000;
 }
 
+/**
+ * How the generated dashboard obtains data from the lua server
+ */
+export type APIDataTransport = 'poll' | 'sse' | 'websocket';
+
+/**
+ * How often the lua exporter samples a data point. Slower tiers reuse the last value in between
+ */
+export type APIUpdateTier = 'frame' | 'slow' | 'static';
+
 export type APIExportModelAdvancedSettings = {
   lua_bind_address: string | null;
   lua_bind_port: number | null;
   poll_interval_ms: number | null;
+  transport: APIDataTransport | null;
+  shared_runtime: boolean | null;
 };
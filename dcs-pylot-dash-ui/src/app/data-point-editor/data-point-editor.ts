@@ -29,6 +29,8 @@ import { Popover } from 'primeng/popover';
 import { ColorScaleEditor } from '../color-scale-editor/color-scale-editor';
 import { AsyncPipe } from '@angular/common';
 import { ReplaySubject } from 'rxjs';
+import { Select } from 'primeng/select';
+import { APIUpdateTier, UPDATE_TIER_OPTIONS } from '../api-model';
 
 @Component({
   selector: 'app-data-point-editor',
@@ -46,6 +48,7 @@ import { ReplaySubject } from 'rxjs';
     Popover,
     ColorScaleEditor,
     AsyncPipe,
+    Select,
   ],
   templateUrl: './data-point-editor.html',
   styleUrl: './data-point-editor.css',
@@ -67,6 +70,8 @@ export class DataPointEditor implements OnInit {
 
   fcDisplayName: FormControl<string | null> = new FormControl();
 
+  fcUpdateTier: FormControl<APIUpdateTier | null> = new FormControl();
+
   @Output()
   onDeleteDataPoint: EventEmitter<DataPoint> = new EventEmitter<DataPoint>();
 
@@ -75,6 +80,7 @@ export class DataPointEditor implements OnInit {
 
   protected displayNameRegex: RegExp = /^[\w\s.()]+$/;
   protected displayNameMaxLength: number = 50;
+  protected readonly UPDATE_TIER_OPTIONS = UPDATE_TIER_OPTIONS;
 
   constructor(private cdr: ChangeDetectorRef) {
     this.colorScaleButtonSeverity$.next('secondary');
@@ -86,6 +92,13 @@ export class DataPointEditor implements OnInit {
       this.dataPoint.displayName = value ?? '';
       this.dataPointChanged.emit(this.dataPoint);
     });
+    this.fcUpdateTier.setValue(this.dataPoint.effectiveUpdateTier);
+    this.fcUpdateTier.valueChanges.subscribe((value: APIUpdateTier | null) => {
+      // the default tier is not stored, such that it follows the source data point
+      this.dataPoint.updateTier =
+        value === this.dataPoint.sourceDataPoint.defaultUpdateTier ? null : value;
+      this.dataPointChanged.emit(this.dataPoint);
+    });
   }
 
   protected deleteDataPoint() {
@@ -97,6 +110,8 @@ export class DataPointEditor implements OnInit {
     if (sourceDataPoint) {
       this.dataPoint.sourceDataPoint = sourceDataPoint;
       this.dataPoint.outputUnit = sourceDataPoint.defaultUnit;
+      this.dataPoint.updateTier = null;
+      this.fcUpdateTier.setValue(sourceDataPoint.defaultUpdateTier, { emitEvent: false });
       if (this.dataPoint.displayName !== sourceDataPoint.displayName) {
         this.fcDisplayName.setValue(sourceDataPoint.displayName);
       }
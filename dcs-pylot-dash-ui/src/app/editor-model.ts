@@ -3,6 +3,7 @@
  * SPDX-License-Identifier: MIT
  * License-Filename: LICENSE
  */
+import { APIUpdateTier } from './api-model';
 
 export class EditorModel {
   dataPointRows: DataPointRow[] = [];
@@ -52,17 +53,27 @@ export class DataPoint {
   sourceDataPoint: SourceDataPoint;
   outputUnit: DataPointUnit;
   colorScale: ColorScale;
+  /**
+   * null: the default update tier of the source data point
+   */
+  updateTier: APIUpdateTier | null;
 
   constructor(
     displayName: string,
     sourceDataPoint: SourceDataPoint,
     outputUnit: DataPointUnit | null = null,
     colorScale: ColorScale | null = null,
+    updateTier: APIUpdateTier | null = null,
   ) {
     this.displayName = displayName;
     this.sourceDataPoint = sourceDataPoint;
     this.outputUnit = outputUnit ?? sourceDataPoint.defaultUnit;
     this.colorScale = colorScale ?? new ColorScale();
+    this.updateTier = updateTier;
+  }
+
+  get effectiveUpdateTier(): APIUpdateTier {
+    return this.updateTier ?? this.sourceDataPoint.defaultUpdateTier;
   }
 
   setOutputUnit(unit: DataPointUnit) {
@@ -75,6 +86,7 @@ export class DataPoint {
       this.sourceDataPoint,
       this.outputUnit,
       this.colorScale.copy(),
+      this.updateTier,
     );
   }
 
@@ -88,17 +100,20 @@ export class SourceDataPoint {
   internalName: string;
   defaultUnit: DataPointUnit;
   availableUnits: DataPointUnit[];
+  defaultUpdateTier: APIUpdateTier;
 
   constructor(
     displayName: string,
     internalName: string,
     defaultUnit: DataPointUnit,
     availableUnits: DataPointUnit[],
+    defaultUpdateTier: APIUpdateTier = 'frame',
   ) {
     this.displayName = displayName;
     this.internalName = internalName;
     this.defaultUnit = defaultUnit;
     this.availableUnits = availableUnits;
+    this.defaultUpdateTier = defaultUpdateTier;
   }
 }
 
@@ -41,6 +41,8 @@ import {
   AdvancedSettingsConstraints,
   AdvancedSettingsDefaults,
   APIExportModelAdvancedSettings,
+  APIDataTransport,
+  DATA_TRANSPORT_OPTIONS,
 } from '../api-model';
 import { IftaLabel } from 'primeng/iftalabel';
 import { InputText } from 'primeng/inputtext';
@@ -48,6 +50,7 @@ import { Checkbox } from 'primeng/checkbox';
 import { BackendStatusMessages } from '../backend-status-messages/backend-status-messages';
 import { StatusMessageService } from '../status-message-service';
 import { KeyFilter } from 'primeng/keyfilter';
+import { Select } from 'primeng/select';
 import { EditorModelService } from '../editor-model-service';
 
 @Component({
@@ -73,6 +76,7 @@ import { EditorModelService } from '../editor-model-service';
     Checkbox,
     BackendStatusMessages,
     KeyFilter,
+    Select,
   ],
   templateUrl: './editor-page.html',
   styleUrl: './editor-page.css',
@@ -148,6 +152,8 @@ export class EditorPage implements OnInit {
     bindAddress: new FormControl<string | null>(AdvancedSettingsDefaults.LUA_BIND_ADDRESS),
     bindPort: new FormControl<number | null>(AdvancedSettingsDefaults.LUA_BIND_PORT),
     pollIntervalMs: new FormControl<number | null>(AdvancedSettingsDefaults.POLL_INTERVAL_MS),
+    transport: new FormControl<APIDataTransport | null>(AdvancedSettingsDefaults.TRANSPORT),
+    sharedRuntime: new FormControl<boolean | null>(AdvancedSettingsDefaults.SHARED_RUNTIME),
   });
 
   protected advancedSettings: APIExportModelAdvancedSettings | null = null;
@@ -373,12 +379,23 @@ export class EditorPage implements OnInit {
     return this.fgAdvancedSettings.get('pollIntervalMs') as FormControl<number | null>;
   }
 
+  protected get fcTransport(): FormControl<APIDataTransport | null> {
+    return this.fgAdvancedSettings.get('transport') as FormControl<APIDataTransport | null>;
+  }
+
+  protected get fcSharedRuntime(): FormControl<boolean | null> {
+    return this.fgAdvancedSettings.get('sharedRuntime') as FormControl<boolean | null>;
+  }
+
   protected readonly AdvancedSettingsConstraints = AdvancedSettingsConstraints;
+  protected readonly DATA_TRANSPORT_OPTIONS = DATA_TRANSPORT_OPTIONS;
 
   protected resetAdvancedSettings() {
     this.fcBindAddress.setValue(AdvancedSettingsDefaults.LUA_BIND_ADDRESS);
     this.fcBindPort.setValue(AdvancedSettingsDefaults.LUA_BIND_PORT);
     this.fcPollIntervalMs.setValue(AdvancedSettingsDefaults.POLL_INTERVAL_MS);
+    this.fcTransport.setValue(AdvancedSettingsDefaults.TRANSPORT);
+    this.fcSharedRuntime.setValue(AdvancedSettingsDefaults.SHARED_RUNTIME);
     this.fcOverrideDefaults.setValue(false);
   }
 
@@ -386,10 +403,14 @@ export class EditorPage implements OnInit {
     const bindAddress: string | null = this.fcBindAddress.value;
     const bindPort: number | null = this.fcBindPort.value;
     const pollIntervalMs: number | null = this.fcPollIntervalMs.value;
+    const transport: APIDataTransport | null = this.fcTransport.value;
+    const sharedRuntime: boolean | null = this.fcSharedRuntime.value;
     this.advancedSettings = {
       lua_bind_address: bindAddress,
       lua_bind_port: bindPort,
       poll_interval_ms: pollIntervalMs,
+      transport: transport,
+      shared_runtime: sharedRuntime,
     };
     this.advancedSettingsDialogVisible = false;
   }
@@ -67,6 +67,7 @@ export class GeneratorService {
           field_id: field.sourceDataPoint.internalName,
           unit_id: field.outputUnit.unitId,
           color_scale: apiColorScale,
+          update_tier: field.updateTier,
         };
         apiRow.fields.push(apiField);
       }
@@ -109,6 +110,7 @@ export class GeneratorService {
             sourceDataPoint,
             dataPointUnit,
             colorScale,
+            apiField.update_tier ?? null,
           );
           dataPointRow.addDataPoint(dataPoint);
         }
@@ -45,6 +45,7 @@ export class SourceDataPointService {
         apiField.field_id,
         fieldDefaultUnit,
         availableUnits,
+        apiField.default_update_tier,
       );
       sourceDataPoints.push(sourceDataPoint);
     }
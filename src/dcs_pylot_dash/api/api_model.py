@@ -7,7 +7,8 @@ from typing import ClassVar, Annotated
 
 from pydantic import BaseModel, Field
 
-from dcs_pylot_dash.service.export_model import HttpServerSettings, UiExportSettings
+from dcs_pylot_dash.service.dcs_common_data_types import UpdateTier
+from dcs_pylot_dash.service.export_model import HttpServerSettings, UiExportSettings, DataTransport
 from dcs_pylot_dash.service.units import Unit
 
 
@@ -22,6 +23,7 @@ class APISourceField(BaseModel):
     field_id: str
     default_unit_id: str
     available_unit_ids: list[str] = []
+    default_update_tier: UpdateTier = UpdateTier.FRAME
 
 
 class APISourceModel(BaseModel):
@@ -50,6 +52,8 @@ class APIExportField(BaseModel):
     field_id: Annotated[str, Field(max_length=MAX_FIELD_VALUE_LENGTH, pattern=FIELD_ID_PATTERN)]
     unit_id: Unit
     color_scale: APIColorScale | None = None
+    # If not set, the default_update_tier of the source field is used
+    update_tier: UpdateTier | None = None
 
 
 class APIExportRow(BaseModel):
@@ -76,6 +80,8 @@ class APIExportModelAdvancedSettings(BaseModel):
         ]
         | None
     ) = None
+    transport: DataTransport | None = None
+    shared_runtime: bool | None = None
 
 
 class APIExportModel(BaseModel):
@@ -89,3 +95,13 @@ class APIExportModel(BaseModel):
         if len(self.rows) != 0:
             return all(r.is_empty for r in self.rows)
         return True
+
+
+class APIExportBatch(BaseModel):
+    MAX_BUNDLES: ClassVar[int] = 50
+
+    bundles: list[APIExportModel] = Field(default_factory=list, max_length=MAX_BUNDLES)
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.bundles) == 0 or any(b.is_empty for b in self.bundles)
@@ -8,6 +8,7 @@ class APIRoutes:
 
     SOURCE_MODEL: Final[str] = "/source-model"
     GENERATE: Final[str] = "/generate"
+    GENERATE_BATCH: Final[str] = "/generate-batch"
     NOTICES: Final[str] = "/notices"
     METADATA: Final[str] = "/metadata"
     SAMPLE_MODEL: Final[str] = "/sample-model"
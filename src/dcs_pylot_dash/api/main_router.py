@@ -1,17 +1,19 @@
 # Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
 # SPDX-License-Identifier: MIT
 # License-Filename: LICENSE
-from io import BytesIO
+from contextlib import asynccontextmanager
 from logging import Logger, getLogger
+from typing import AsyncIterator
 
 from fastapi import APIRouter
-from starlette.responses import Response
+from starlette.responses import Response, StreamingResponse
 
-from dcs_pylot_dash.api.api_model import APISourceModel, APIExportModel
+from dcs_pylot_dash.api.api_model import APISourceModel, APIExportModel, APIExportBatch
 from dcs_pylot_dash.api.api_routes import APIRoutes
 from dcs_pylot_dash.app_settings import DCSPylotDashAppSettings
 from dcs_pylot_dash.exceptions import DCSPylotDashInvalidInputException
 from dcs_pylot_dash.service.app_metadata_service import AppMetadataService, AppMetadata
+from dcs_pylot_dash.service.generator_executor import GeneratorExecutor
 from dcs_pylot_dash.service.generator_service import GeneratorService
 from dcs_pylot_dash.service.notice_service import NoticesContainer, NoticesService, NoticesSettings
 from dcs_pylot_dash.service.source_model_service import SourceModelService
@@ -34,8 +36,14 @@ class MainRouter:
         generator_service: GeneratorService = GeneratorService(
             app_settings, source_model_service, notices_service, resource_provider
         )
+        generator_executor: GeneratorExecutor = GeneratorExecutor(app_settings, generator_service)
 
-        api_router: APIRouter = APIRouter()
+        @asynccontextmanager
+        async def lifespan(_: APIRouter) -> AsyncIterator[None]:
+            yield
+            generator_executor.shutdown()
+
+        api_router: APIRouter = APIRouter(lifespan=lifespan)
 
         @api_router.get(APIRoutes.SOURCE_MODEL)
         async def get_source_model() -> APISourceModel:
@@ -54,8 +62,20 @@ class MainRouter:
             if api_export_model.is_empty:
                 raise DCSPylotDashInvalidInputException("empty export model")
 
-            bytes_io: BytesIO = generator_service.export_model(api_export_model)
-            return Response(content=bytes_io.getvalue(), media_type="application/zip")
+            if app_settings.generate_streaming:
+                return StreamingResponse(
+                    await generator_executor.stream_model(api_export_model), media_type="application/zip"
+                )
+            bundle: bytes = await generator_executor.export_model(api_export_model)
+            return Response(content=bundle, media_type="application/zip")
+
+        @api_router.post(APIRoutes.GENERATE_BATCH)
+        async def generate_batch(api_export_batch: APIExportBatch) -> Response:
+            if api_export_batch.is_empty:
+                raise DCSPylotDashInvalidInputException("empty export batch or export model")
+
+            bundle: bytes = await generator_executor.export_batch(api_export_batch.bundles)
+            return Response(content=bundle, media_type="application/zip")
 
         @api_router.get(APIRoutes.SAMPLE_MODEL)
         async def get_sample_model() -> APIExportModel:
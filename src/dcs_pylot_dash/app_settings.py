@@ -1,12 +1,18 @@
 # Copyright (c) 2025 Kevin Rzepka <kdev@posteo.com>
 # SPDX-License-Identifier: MIT
 # License-Filename: LICENSE
+from enum import StrEnum, auto
 from pathlib import Path
 from typing import ClassVar
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class GeneratorExecutorType(StrEnum):
+    THREAD = auto()
+    PROCESS = auto()
+
+
 class DCSPylotDashAppSettings(BaseSettings):
     ENV_PREFIX: ClassVar[str] = "DCS_PYLOT_DASH_"
 
@@ -23,6 +29,16 @@ class DCSPylotDashAppSettings(BaseSettings):
     ui_base_dir: str = "static/ui"
     ui_index_file_name: str = "index.html"
 
+    # LRU cache of generated bundles; a limit of 0 disables the cache
+    bundle_cache_max_entries: int = 64
+    bundle_cache_max_bytes: int = 32 * 1024 * 1024
+
+    # pool in which bundles are generated, off the event loop; None workers uses the executor's default
+    generator_executor: GeneratorExecutorType = GeneratorExecutorType.THREAD
+    generator_max_workers: int | None = None
+    # stream the ZIP member by member; generation then runs in threads, also with the process executor
+    generate_streaming: bool = False
+
     model_config = SettingsConfigDict(env_prefix=ENV_PREFIX, extra="ignore")
 
     @property
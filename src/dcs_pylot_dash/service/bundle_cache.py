@@ -0,0 +1,97 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from logging import Logger
+from threading import Lock
+from typing import Final, Any
+
+from pydantic import BaseModel
+
+from dcs_pylot_dash.api.api_model import APIExportModel
+
+
+class BundleCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+
+class BundleCache:
+    """
+    LRU cache of finished bundles (ZIP bytes), keyed by a canonical hash of the validated APIExportModel.
+    Bounded by the number of entries and by the total number of bytes. A limit of 0 disables the cache.
+    """
+
+    LOGGER: Final[Logger] = logging.getLogger(__name__)
+
+    _max_entries: int
+    _max_bytes: int
+    _entries: OrderedDict[str, bytes]
+    _stats: BundleCacheStats
+    _lock: Lock
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._stats = BundleCacheStats()
+        self._lock = Lock()
+
+    @classmethod
+    def key_for(cls, api_model: APIExportModel) -> str:
+        """
+        Defaults and empty objects are excluded, such that e.g. an omitted and an explicitly empty advanced_settings
+        map to the same key.
+        """
+        canonical_dict: dict[str, Any] = cls._without_empty_objects(api_model.model_dump(exclude_defaults=True))
+        canonical_json: str = json.dumps(canonical_dict, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _without_empty_objects(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            pruned: dict[str, Any] = {k: cls._without_empty_objects(v) for k, v in value.items()}
+            return {k: v for k, v in pruned.items() if v != {}}
+        if isinstance(value, list):
+            return [cls._without_empty_objects(v) for v in value]
+        return value
+
+    @property
+    def is_enabled(self) -> bool:
+        return self._max_entries > 0 and self._max_bytes > 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            bundle: bytes | None = self._entries.get(key)
+            if bundle is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return bundle
+
+    def put(self, key: str, bundle: bytes) -> None:
+        if not self.is_enabled or len(bundle) > self._max_bytes:
+            return
+        with self._lock:
+            previous: bytes | None = self._entries.pop(key, None)
+            if previous is not None:
+                self._stats.size_bytes -= len(previous)
+            self._entries[key] = bundle
+            self._stats.size_bytes += len(bundle)
+            while len(self._entries) > self._max_entries or self._stats.size_bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._stats.size_bytes -= len(evicted)
+                self._stats.evictions += 1
+            self._stats.entries = len(self._entries)
+
+    @property
+    def stats(self) -> BundleCacheStats:
+        with self._lock:
+            return self._stats.model_copy()
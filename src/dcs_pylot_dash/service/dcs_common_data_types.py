@@ -3,6 +3,7 @@
 # License-Filename: LICENSE
 import logging
 from enum import StrEnum, auto
+from typing import Iterable, Self
 
 LOGGER = logging.getLogger(__name__)
 
@@ -17,3 +18,18 @@ class LoReturnType(StrEnum):
     NUMBER = auto()
     STRING = auto()
     BOOLEAN = auto()
+
+
+class UpdateTier(StrEnum):
+    """
+    How often the exporter calls the LoGet* function of a field. Slower tiers reuse the cached value in between.
+    """
+
+    FRAME = auto()
+    SLOW = auto()
+    STATIC = auto()
+
+    @classmethod
+    def fastest(cls, tiers: Iterable[Self]) -> Self:
+        order: list[Self] = list(cls)
+        return min(tiers, key=order.index, default=cls.FRAME)
@@ -5,7 +5,7 @@ from typing import Self
 
 from pydantic import BaseModel, model_validator
 
-from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType
+from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType, UpdateTier
 from dcs_pylot_dash.service.units import Unit
 
 
@@ -26,6 +26,8 @@ class ExternalModelField(BaseModel):
     unit: Unit = Unit.NONE
     preferred_unit: Unit | None = None
     default_decimal_digits: int = 0
+    # Inherited by child fields, if not set for them
+    default_update_tier: UpdateTier | None = None
     is_portion: bool = False
     # only set if is_portion
     abs_base_value: float | None = None
@@ -2,10 +2,12 @@
 # SPDX-License-Identifier: MIT
 # License-Filename: LICENSE
 import logging
+import sys
 from dataclasses import dataclass, field
-from typing import Self
+from types import MappingProxyType
+from typing import Self, ClassVar, Any, Mapping
 
-from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType
+from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType, UpdateTier
 from dcs_pylot_dash.service.dcs_model_external import ExternalModel, ExternalModelField
 from dcs_pylot_dash.service.units import Unit
 from dcs_pylot_dash.utils.string_utils import StringUtils
@@ -18,14 +20,24 @@ class InternalModelError(Exception):
         super().__init__(f"Failed to populate model: {msg}")
 
 
-@dataclass
+# Shared by all frozen fields without children, instead of three empty dicts per field
+_EMPTY_FIELDS: Mapping[str, "InternalModelField"] = MappingProxyType({})
+
+
+@dataclass(slots=True)
 class InternalModelField:
+    """
+    Mutable while InternalModel.populate builds the model, frozen afterward, see freeze.
+    """
+
     # Local name; may not contain dots
     name: str
     return_type: LoReturnType
     unit: Unit = Unit.NONE
     preferred_unit: Unit | None = None
     default_decimal_digits: int = 0
+    # Only set if set in the external model, see effective_default_update_tier
+    default_update_tier: UpdateTier | None = None
     parent: Self | None = None
     # only set for top-level fields
     lo_function: str | None = None
@@ -34,12 +46,56 @@ class InternalModelField:
     # only set when is_portion
     abs_base_value: float | None = None
     is_portion: bool = False
-    fields: dict[str, Self] = field(default_factory=dict)
-    list_fields: dict[str, Self] = field(default_factory=dict)
+    # dicts until frozen, read-only mappings afterward
+    fields: Mapping[str, Self] = field(default_factory=dict)
+    list_fields: Mapping[str, Self] = field(default_factory=dict)
     prototype_ref: Self | None = None
     is_prototype: bool = False
     # If this object is a prototype: Contains all instances
-    prototype_implementations: dict[str, Self] = field(default_factory=dict)
+    prototype_implementations: Mapping[str, Self] = field(default_factory=dict)
+
+    # Derived from the hierarchy, set by freeze
+    _is_frozen: bool = field(default=False, init=False, repr=False, compare=False)
+    _dotted_name: str | None = field(default=None, init=False, repr=False, compare=False)
+    _effective_display_name: str | None = field(default=None, init=False, repr=False, compare=False)
+    _root_field: Self | None = field(default=None, init=False, repr=False, compare=False)
+    _next_list_field_in_hierarchy: Self | None = field(default=None, init=False, repr=False, compare=False)
+
+    _INTERNED_ATTRIBUTES: ClassVar[tuple[str, ...]] = ("name", "lo_function", "display_name")
+
+    def __post_init__(self) -> None:
+        for attribute in self._INTERNED_ATTRIBUTES:
+            value: str | None = getattr(self, attribute)
+            if value is not None:
+                object.__setattr__(self, attribute, sys.intern(value))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # slots=True replaces the class, which breaks the zero-argument form of super()
+        if getattr(self, "_is_frozen", False):
+            raise InternalModelError(f"cannot set {name} of {self._dotted_name}, the field is frozen")
+        object.__setattr__(self, name, value)
+
+    def freeze(self) -> None:
+        """
+        Caches the values derived from the parent chain, such that looking them up is O(1) instead of O(depth),
+        and makes this field immutable. Empty child containers are replaced by a shared, read-only one.
+        """
+        if self._is_frozen:
+            return
+        if self.parent is not None:
+            self.parent.freeze()
+        self._dotted_name = sys.intern(self.dotted_name)
+        self._effective_display_name = self.effective_display_name
+        self._root_field = self.root_field
+        self._next_list_field_in_hierarchy = self.next_list_field_in_hierarchy
+        self.fields = self._freeze_mapping(self.fields)
+        self.list_fields = self._freeze_mapping(self.list_fields)
+        self.prototype_implementations = self._freeze_mapping(self.prototype_implementations)
+        self._is_frozen = True
+
+    @staticmethod
+    def _freeze_mapping(mapping: Mapping[str, Self]) -> Mapping[str, Self]:
+        return MappingProxyType(mapping) if len(mapping) > 0 else _EMPTY_FIELDS
 
     @property
     def is_list_field(self) -> bool:
@@ -49,11 +105,25 @@ class InternalModelField:
     def has_list_field_in_hierarchy(self) -> bool:
         return self.next_list_field_in_hierarchy is not None
 
+    @property
+    def effective_default_update_tier(self) -> UpdateTier:
+        """
+        :return: The first default_update_tier going up in the hierarchy (including self)
+        """
+        field: InternalModelField | None = self
+        while field is not None:
+            if field.default_update_tier is not None:
+                return field.default_update_tier
+            field = field.parent
+        return UpdateTier.FRAME
+
     @property
     def next_list_field_in_hierarchy(self) -> Self | None:
         """
         :return: The first list field going up in the hierarchy (excluding self).
         """
+        if self._is_frozen:
+            return self._next_list_field_in_hierarchy
         if self.parent is None:
             return None
         if self.parent.is_list_field:
@@ -67,10 +137,14 @@ class InternalModelField:
         then the dotted name is not the complete name but only a sub-path.
         :return:
         """
+        if self._is_frozen:
+            return self._dotted_name
         return f"{self.parent.dotted_name}.{self.name}" if self.parent is not None else self.name
 
     @property
     def effective_display_name(self) -> str:
+        if self._is_frozen:
+            return self._effective_display_name
         return StringUtils.first_non_empty(self.display_name, self.dotted_name)
 
     @property
@@ -83,6 +157,8 @@ class InternalModelField:
 
     @property
     def root_field(self) -> Self:
+        if self._is_frozen:
+            return self._root_field
         if self.parent is None:
             return self
         else:
@@ -106,6 +182,7 @@ class InternalModelField:
             lo_function=self.lo_function,
             abs_base_value=self.abs_base_value,
             default_decimal_digits=self.default_decimal_digits,
+            default_update_tier=self.default_update_tier,
             prototype_ref=self,
             parent=parent_instance,
         )
@@ -156,6 +233,7 @@ class InternalModel:
             lo_function=ext_proto_field.lo_function,
             abs_base_value=ext_proto_field.abs_base_value,
             default_decimal_digits=ext_proto_field.default_decimal_digits,
+            default_update_tier=ext_proto_field.default_update_tier,
             is_prototype=True,
             parent=parsed_parent,
         )
@@ -176,7 +254,7 @@ class InternalModel:
         return int_proto_field
 
     def _add_to_fields_recursively(self, int_field: InternalModelField) -> None:
-        self._fields[int_field.dotted_name] = int_field
+        self._fields[sys.intern(int_field.dotted_name)] = int_field
         for child_field in int_field.fields.values():
             self._add_to_fields_recursively(child_field)
         for child_field in int_field.list_fields.values():
@@ -202,6 +280,7 @@ class InternalModel:
                 lo_function=ext_field.lo_function,
                 abs_base_value=ext_field.abs_base_value,
                 default_decimal_digits=ext_field.default_decimal_digits,
+                default_update_tier=ext_field.default_update_tier,
                 prototype_ref=self._prototype_fields.get(ext_field.prototype_ref),
                 is_prototype=False,
                 parent=parsed_parent,
@@ -242,14 +321,31 @@ class InternalModel:
         for name, ext_field in self._external_model.fields.items():
             self.parse_field(name, ext_field)
 
+        # fields of a previous populate call are discarded, so rebuilding the model starts out unfrozen again
+        for prototype_field in self._prototype_fields.values():
+            self._freeze_recursively(prototype_field)
+        for int_field in self._fields.values():
+            int_field.freeze()
+
         return self
 
+    def _freeze_recursively(self, int_field: InternalModelField) -> None:
+        int_field.freeze()
+        for child_field in int_field.fields.values():
+            self._freeze_recursively(child_field)
+        for child_field in int_field.list_fields.values():
+            self._freeze_recursively(child_field)
+
     def get_field(self, dotted_name: str) -> InternalModelField:
         field: InternalModelField | None = self._fields.get(dotted_name)
         if field is None:
             LOGGER.warning(f"field {dotted_name} not found")
         return field
 
+    @property
+    def fields(self) -> list[InternalModelField]:
+        return list(self._fields.values())
+
     @property
     def leaf_fields(self) -> list[InternalModelField]:
         return [f for f in self._fields.values() if f.is_leaf]
@@ -6,12 +6,14 @@ import re
 from enum import StrEnum, auto
 from pathlib import Path
 from re import Pattern
-from typing import ClassVar, Self, Annotated
+from typing import ClassVar, Self, Annotated, Iterable
 
 from pydantic import BaseModel, model_validator, Field, PositiveInt, NonNegativeInt
 
 from dcs_pylot_dash.exceptions import DCSPylotDashInvalidInputException
+from dcs_pylot_dash.service.dcs_common_data_types import UpdateTier
 from dcs_pylot_dash.service.dcs_model_internal import InternalModelField
+from dcs_pylot_dash.service.field_fragments import FieldFragment
 from dcs_pylot_dash.service.units import Unit, UnitLabels
 from dcs_pylot_dash.utils.string_utils import StringUtils
 
@@ -23,6 +25,20 @@ class InvalidExportModelError(DCSPylotDashInvalidInputException):
         super().__init__(f"Invalid export model: {msg}")
 
 
+class DataTransport(StrEnum):
+    """
+    How the dashboard obtains data from the Lua HTTP server
+    """
+
+    # The dashboard fetches a snapshot every UiExportSettings.fetch_data_interval_ms
+    POLL = auto()
+    # Server-Sent Events: The server pushes a snapshot every UiExportSettings.fetch_data_interval_ms
+    SSE = auto()
+    # The server pushes a snapshot every UiExportSettings.fetch_data_interval_ms over a WebSocket, which also carries
+    # control messages (pause, rate, field selection) from the dashboard to the server
+    WEBSOCKET = auto()
+
+
 class HttpServerSettings(BaseModel):
     """
     See also: UiModelSettings
@@ -35,12 +51,32 @@ class HttpServerSettings(BaseModel):
     BIND_PORT_DEFAULT: ClassVar[int] = 52025
     MAX_CONNECTIONS_DEFAULT: ClassVar[int] = 5
     SOCKET_TIMEOUT_DEFAULT: ClassVar[int] = 0
+    EVENT_STREAM_PATH: ClassVar[str] = "/events"
+    WEBSOCKET_PATH: ClassVar[str] = "/ws"
+    STATS_PATH: ClassVar[str] = "/stats"
+    KEEP_ALIVE_DEFAULT: ClassVar[bool] = True
+    KEEP_ALIVE_TIMEOUT_DEFAULT: ClassVar[int] = 5
+    KEEP_ALIVE_MAX_REQUESTS_DEFAULT: ClassVar[int] = 1000
+    MAX_ACCEPTS_PER_FRAME_DEFAULT: ClassVar[int] = 4
+    MAX_FRAME_TIME_MS_DEFAULT: ClassVar[int] = 2
 
     bind_address: str = BIND_ADDRESS_LOCALHOST
+    transport: DataTransport = DataTransport.POLL
     # ephemeral range: 49152 to 65535
     bind_port: Annotated[int, Field(ge=EPHEMERAL_PORT_RANGE_START, le=EPHEMERAL_PORT_RANGE_END)] = BIND_PORT_DEFAULT
     max_connections: PositiveInt = MAX_CONNECTIONS_DEFAULT
+    # Timeout of the server socket. Client sockets are always non-blocking
     socket_timeout: NonNegativeInt = SOCKET_TIMEOUT_DEFAULT
+    # Number of pending connections accepted per frame, further connections are accepted in the next frames
+    max_accepts_per_frame: PositiveInt = MAX_ACCEPTS_PER_FRAME_DEFAULT
+    # Time per frame after which no further clients are served in that frame. At least one client is always served
+    max_frame_time_ms: PositiveInt = MAX_FRAME_TIME_MS_DEFAULT
+    # If False, every response is sent with "Connection: close"
+    keep_alive: bool = KEEP_ALIVE_DEFAULT
+    # Seconds after which a client connection without any received data is closed
+    keep_alive_timeout: PositiveInt = KEEP_ALIVE_TIMEOUT_DEFAULT
+    # Number of requests after which a client connection is closed
+    keep_alive_max_requests: PositiveInt = KEEP_ALIVE_MAX_REQUESTS_DEFAULT
 
 
 class LuaExportSettings(BaseModel):
@@ -53,11 +89,56 @@ class LuaExportSettings(BaseModel):
     SCRIPT_INDENTATION_DEFAULT: ClassVar[int] = 4
     OUTPUT_DIR_DEFAULT: ClassVar[str] = "."
     OUTPUT_SCRIPT_NAME_DEFAULT: ClassVar[str] = "DCSPylotDash.lua"
+    SNAPSHOT_SLICE_MS_DEFAULT: ClassVar[int] = 100
+    SNAPSHOT_SLICE_MS_MIN: ClassVar[int] = 0
+    SNAPSHOT_SLICE_MS_MAX: ClassVar[int] = 1000
+    DELTA_HISTORY_SIZE_DEFAULT: ClassVar[int] = 16
+    DELTA_HISTORY_SIZE_MAX: ClassVar[int] = 128
+    UPDATE_TIER_INTERVAL_MS_MAX: ClassVar[int] = 600_000
+    SLOW_TIER_INTERVAL_MS_DEFAULT: ClassVar[int] = 1000
+    STATIC_TIER_INTERVAL_MS_DEFAULT: ClassVar[int] = 10_000
+    PROFILING_WINDOW_SIZE_DEFAULT: ClassVar[int] = 256
+    PROFILING_WINDOW_SIZE_MAX: ClassVar[int] = 4096
+    PROFILING_LOG_INTERVAL_MS_DEFAULT: ClassVar[int] = 10_000
 
     log_prefix: str = LOG_PREFIX_DEFAULT
     output_dir: str = OUTPUT_DIR_DEFAULT
     output_script_name: str = OUTPUT_SCRIPT_NAME_DEFAULT
     script_indentation: NonNegativeInt = SCRIPT_INDENTATION_DEFAULT
+    # Minimum age of the cached JSON snapshot before it is regenerated for a request. 0: at most once per frame
+    snapshot_slice_ms: Annotated[int, Field(ge=SNAPSHOT_SLICE_MS_MIN, le=SNAPSHOT_SLICE_MS_MAX)] = (
+        SNAPSHOT_SLICE_MS_DEFAULT
+    )
+    # Number of snapshots a delta can be based on. 0: Every response contains all fields
+    delta_history_size: Annotated[int, Field(ge=0, le=DELTA_HISTORY_SIZE_MAX)] = DELTA_HISTORY_SIZE_DEFAULT
+    # Interval in which the LoGet* functions of fields in the UpdateTier.SLOW and UpdateTier.STATIC tiers are called
+    slow_tier_interval_ms: Annotated[int, Field(ge=0, le=UPDATE_TIER_INTERVAL_MS_MAX)] = SLOW_TIER_INTERVAL_MS_DEFAULT
+    static_tier_interval_ms: Annotated[int, Field(ge=0, le=UPDATE_TIER_INTERVAL_MS_MAX)] = (
+        STATIC_TIER_INTERVAL_MS_DEFAULT
+    )
+    # Record os.clock timings of the LoGet* calls, the encoding, sends and whole frames. Served on
+    # HttpServerSettings.STATS_PATH and logged every profiling_log_interval_ms (0: never)
+    profiling: bool = False
+    profiling_window_size: Annotated[int, Field(ge=1, le=PROFILING_WINDOW_SIZE_MAX)] = PROFILING_WINDOW_SIZE_DEFAULT
+    profiling_log_interval_ms: NonNegativeInt = PROFILING_LOG_INTERVAL_MS_DEFAULT
+    # Bind the LoGet* functions to locals once, reuse the data tables across snapshots instead of rebuilding them,
+    # read fields exported in several units once, and memoize the coordinate formatters
+    optimize_script: bool = True
+    # Encode the data with a generated encoder for the export tree instead of the generic JSON:encode
+    specialized_encoder: bool = True
+    # Output the HTTP server as a shared, versioned runtime module, which output_script_name loads with require.
+    # output_script_name then only contains the settings and the functions generated for the export model. This only
+    # pays off for several dashboards (on different ports), since a single bundle gets larger
+    shared_runtime: bool = False
+    # Collect list fields in a coroutine that is resumed once per frame and collects this number of list elements, such
+    # that long lists are collected over several frames. A list is exported when its pass is complete, so it lags behind
+    # by the duration of a pass and is empty until the first pass is complete. Other fields of a list node and list
+    # fields directly at the root are read whenever the data is generated. 0: all elements whenever the data is generated
+    list_elements_per_frame: NonNegativeInt = 0
+
+    @property
+    def is_delta_enabled(self) -> bool:
+        return self.delta_history_size > 0
 
     @property
     def output_dir_path(self) -> Path:
@@ -111,7 +192,11 @@ class ExportModelField(BaseModel):
     # InternalModelField.dotted_name, used for lookup in InternalModel
     internal_field_name: str
     internal_field: InternalModelField | None = None
+    # Lookup result from the FieldFragmentTable for internal_field and effective_unit
+    fragment: FieldFragment | None = None
     decimal_digits: int = DECIMAL_DIGITS_DEFAULT
+    # If set, overrides InternalModelField.effective_default_update_tier
+    update_tier_override: UpdateTier | None = None
     row: int | None = None
     col: int | None = None
     color_scale: list[ColorScaleEntry] = []
@@ -154,6 +239,14 @@ class ExportModelField(BaseModel):
     def effective_unit(self) -> Unit:
         return self.output_unit_override or self.internal_field.unit
 
+    @property
+    def effective_update_tier(self) -> UpdateTier:
+        if self.update_tier_override is not None:
+            return self.update_tier_override
+        if self.internal_field is None:
+            return UpdateTier.FRAME
+        return self.internal_field.effective_default_update_tier
+
     @property
     def unit_label(self) -> str:
         return UnitLabels.default.get(self.effective_unit) or ""
@@ -191,65 +284,86 @@ class ExportModel(BaseModel):
             intf.name: intf for intf in (extf.internal_field.root_field for extf in self.fields if extf.is_resolved)
         }
 
+    @property
+    def root_field_update_tiers(self) -> dict[str, UpdateTier]:
+        """
+        A root field is sampled in the fastest tier of the fields exported from it.
+        Key: InternalModelField.name of the root field
+        """
+        tiers: dict[str, list[UpdateTier]] = {}
+        for extf in self.fields:
+            if extf.is_resolved:
+                tiers.setdefault(extf.internal_field.root_field.name, []).append(extf.effective_update_tier)
+        return {name: UpdateTier.fastest(root_tiers) for name, root_tiers in tiers.items()}
+
 
-class ExportModelTreeNode(BaseModel):
+class ExportModelTreeNode:
     """
     Used to create the output structure, which may be different from the obtained lua structure.
+    A plain trie over the pre-split dotted names of the export fields, children are kept in insertion order.
     """
 
+    __slots__ = ("name_chunks", "name", "nodes", "parent", "export_field")
+
+    # Chunks of the dotted name from the root; empty for the root
+    name_chunks: tuple[str, ...]
     # Dotted name from the root. The parent of this node will only have the last chunk as key in nodes
     name: str
     # Key: Single chunk (of dotted name), i.e., a "local" name
-    nodes: dict[str, Self] = {}
+    nodes: dict[str, Self]
     # Only None for root
-    parent: Self | None = None
-    export_field: ExportModelField | None = None
+    parent: Self | None
+    export_field: ExportModelField | None
+
+    def __init__(self, name_chunks: tuple[str, ...] = (), parent: Self | None = None) -> None:
+        self.name_chunks = name_chunks
+        self.name = ".".join(name_chunks)
+        self.nodes = {}
+        self.parent = parent
+        self.export_field = None
+
+    @classmethod
+    def build(cls, export_fields: Iterable[ExportModelField]) -> Self:
+        """
+        Assumption: Mixing leaf and non-leaf nodes is not allowed.
+
+        :param export_fields: Inserted in a single pass, in order
+        :return: The root node
+        """
+        root: Self = cls()
+        for export_field in export_fields:
+            root._insert(tuple(export_field.name_chunks), export_field)
+        return root
+
+    def _insert(self, name_chunks: tuple[str, ...], export_field: ExportModelField) -> None:
+        node: Self = self
+        for i, local_name in enumerate(name_chunks):
+            if node.has_export_field:
+                raise InvalidExportModelError(
+                    f"Cannot add node {export_field.name} to {node.name} because it already has an export field"
+                )
+            if StringUtils.is_empty(local_name):
+                raise InvalidExportModelError(f"Invalid name: {export_field.name}")
+            child: Self | None = node.nodes.get(local_name)
+            if child is None:
+                child = type(self)(name_chunks[: i + 1], node)
+                node.nodes[local_name] = child
+            node = child
+        node.export_field = export_field
 
     @property
     def local_name(self) -> str:
-        return self.name.split(".")[-1]
+        return self.name_chunks[-1] if len(self.name_chunks) > 0 else ""
 
     def get_node(self, name: str) -> Self | None:
-        name_chunks: list[str] = name.split(".")
-        node: Self | None = self.nodes.get(name_chunks[0])
-        if node is None:
-            LOGGER.debug(f"Node {name} not found")
-            return None
-        if len(name_chunks) > 1:
-            return node.get_node(".".join(name_chunks[1:]))
+        node: Self | None = self
+        for local_name in name.split("."):
+            node = node.nodes.get(local_name)
+            if node is None:
+                LOGGER.debug(f"Node {name} not found")
+                return None
         return node
 
-    def add_node(self, export_field: ExportModelField, name_override: str | None = None) -> Self:
-        """
-        Assumption: Mixing leaf and non-leaf nodes is not allowed.
-
-        :param export_field:
-        :param name_override: Should be None when called on the root node.
-        :return: Self
-        """
-        if self.has_export_field:
-            raise InvalidExportModelError(
-                f"Cannot add node {export_field.name} to {self.name} because it already has an export field"
-            )
-
-        if name_override is not None and StringUtils.is_empty(name_override):
-            raise InvalidExportModelError(f"Invalid name override: {name_override}")
-        node_name: str = name_override or export_field.name
-        name_chunks: list[str] = node_name.split(".")
-        local_name: str = name_chunks[0]
-        node: Self | None = self.get_node(local_name)
-        if node is None:
-            new_node_name: str = local_name
-            if self.parent is not None:
-                new_node_name = f"{self.name}.{local_name}"
-            node = ExportModelTreeNode(name=new_node_name, parent=self)
-            self.nodes[local_name] = node
-
-        if len(name_chunks) == 1:
-            node.export_field = export_field
-        else:
-            node.add_node(export_field, ".".join(name_chunks[1:]))
-
     @property
     def has_export_field(self) -> bool:
         return self.export_field is not None
@@ -260,3 +374,6 @@ class LuaGeneratorOutput(BaseModel):
     export_content: str
     # Content of LuaGeneratorSettings.output_script_name
     script_content: str
+    # Name and content of the shared runtime module, if LuaExportSettings.shared_runtime is set
+    runtime_script_name: str | None = None
+    runtime_content: str | None = None
@@ -0,0 +1,106 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import logging
+from typing import Self
+
+from pydantic import BaseModel
+
+from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType
+from dcs_pylot_dash.service.dcs_model_internal import InternalModel, InternalModelField
+from dcs_pylot_dash.service.units import Unit, UnitConverter, UnitFormatters, UnitLabels
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FieldFragment(BaseModel):
+    """
+    Everything the generators need for one (field, unit) pair that does not depend on a specific export model.
+    """
+
+    field_id: str
+    unit: Unit
+    # Lua expression for the converted or formatted value, for fields without a list field in their hierarchy
+    lua_value: str
+    unit_label: str
+    # Whether the UI rounds the value to ExportModelField.decimal_digits
+    has_decimal_digits: bool
+    # Needed to build lua_value from another source expression, see lua_value_from
+    formatter_function: str | None
+    is_number: bool
+    # abs_base_value and the conversion factor, folded into a single multiplication
+    combined_factor: float | None
+
+    @classmethod
+    def create(cls, internal_field: InternalModelField, unit: Unit) -> Self:
+        formatter_function: str | None = UnitFormatters.get_formatter(unit)
+        is_number: bool = internal_field.return_type == LoReturnType.NUMBER
+        combined_factor: float | None = cls._get_combined_factor(internal_field, unit)
+        return cls(
+            field_id=internal_field.dotted_name,
+            unit=unit,
+            lua_value=cls._build_lua_value(internal_field.dotted_name, formatter_function, is_number, combined_factor),
+            unit_label=UnitLabels.default.get(unit) or "",
+            has_decimal_digits=is_number and formatter_function is None,
+            formatter_function=formatter_function,
+            is_number=is_number,
+            combined_factor=combined_factor,
+        )
+
+    def lua_value_from(self, source: str) -> str:
+        """
+        :param source: Lua expression for the raw value, e.g., a local that holds the value of the field
+        :return: Lua expression for the converted or formatted value
+        """
+        return self._build_lua_value(source, self.formatter_function, self.is_number, self.combined_factor)
+
+    @staticmethod
+    def _get_combined_factor(internal_field: InternalModelField, unit: Unit) -> float | None:
+        combined_factor: float = 1.0
+        if internal_field.abs_base_value is not None:
+            combined_factor *= internal_field.abs_base_value
+        factor: float | None = UnitConverter.get_conversion_factor(internal_field.unit, unit)
+        if factor is not None:
+            combined_factor *= factor
+        if internal_field.abs_base_value is not None or combined_factor != 1.0:
+            return combined_factor
+        return None
+
+    @staticmethod
+    def _build_lua_value(
+        source: str, formatter_function: str | None, is_number: bool, combined_factor: float | None
+    ) -> str:
+        if formatter_function is not None:
+            return f"{formatter_function}({source})"
+
+        lua_value: str = f"({source} or 0)" if is_number else source
+        if combined_factor is not None:
+            lua_value += f" * {combined_factor}"
+        return lua_value
+
+
+class FieldFragmentTable:
+    """
+    Built once per InternalModel: The allowed units of each field and a FieldFragment for each allowed (field, unit)
+    pair, such that generating an export model only requires lookups.
+    """
+
+    # Key: InternalModelField.dotted_name
+    _allowed_units: dict[str, frozenset[Unit]]
+    _fragments: dict[tuple[str, Unit], FieldFragment]
+
+    def __init__(self, internal_model: InternalModel) -> None:
+        self._allowed_units = {}
+        self._fragments = {}
+        for field in internal_model.fields:
+            allowed_units: frozenset[Unit] = frozenset(UnitConverter.get_convertable_units(field.unit))
+            self._allowed_units[field.dotted_name] = allowed_units
+            for unit in allowed_units | {field.unit}:
+                self._fragments[(field.dotted_name, unit)] = FieldFragment.create(field, unit)
+        LOGGER.info(f"Built {len(self._fragments)} field fragments for {len(self._allowed_units)} fields")
+
+    def get_allowed_units(self, field_id: str) -> frozenset[Unit] | None:
+        return self._allowed_units.get(field_id)
+
+    def get(self, field_id: str, unit: Unit) -> FieldFragment | None:
+        return self._fragments.get((field_id, unit))
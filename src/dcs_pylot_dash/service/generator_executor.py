@@ -0,0 +1,144 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from logging import Logger
+from typing import Final, Callable, TypeVar, Iterator
+
+from dcs_pylot_dash.api.api_model import APIExportModel
+from dcs_pylot_dash.app_settings import DCSPylotDashAppSettings, GeneratorExecutorType
+from dcs_pylot_dash.service.bundle_cache import BundleCache
+from dcs_pylot_dash.service.generator_service import GeneratorService
+from dcs_pylot_dash.service.notice_service import NoticesService, NoticesSettings
+from dcs_pylot_dash.service.source_model_service import SourceModelService
+from dcs_pylot_dash.utils.resource_provider import ResourceProvider
+
+LOGGER: Final[Logger] = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Only set in process workers, see _init_worker
+_worker_generator_service: GeneratorService | None = None
+
+
+def _init_worker(app_settings: DCSPylotDashAppSettings) -> None:
+    """
+    Preloads models and templates once per worker, such that a generation only has to transfer the export model.
+    The cache is disabled in workers, since it is maintained by the GeneratorExecutor in the main process.
+    """
+    global _worker_generator_service
+    worker_app_settings: DCSPylotDashAppSettings = app_settings.model_copy(update={"bundle_cache_max_entries": 0})
+    resource_provider: ResourceProvider = ResourceProvider(worker_app_settings.resources_dir_path)
+    source_model_service: SourceModelService = SourceModelService(resource_provider)
+    notices_settings: NoticesSettings = NoticesSettings(_env_file=worker_app_settings.settings_file_path)
+    notices_service: NoticesService = NoticesService(notices_settings, resource_provider)
+    _worker_generator_service = GeneratorService(
+        worker_app_settings, source_model_service, notices_service, resource_provider
+    )
+
+
+def _call_in_worker(method: Callable[[GeneratorService, T], R], arg: T) -> R:
+    return method(_worker_generator_service, arg)
+
+
+class GeneratorExecutor:
+    """
+    Runs the CPU-bound bundle generation in a pool, such that the event loop stays responsive for other requests.
+    """
+
+    _app_settings: DCSPylotDashAppSettings
+    _generator_service: GeneratorService
+    _executor: Executor
+    _runs_in_workers: bool
+
+    def __init__(self, app_settings: DCSPylotDashAppSettings, generator_service: GeneratorService) -> None:
+        self._app_settings = app_settings
+        self._generator_service = generator_service
+        self._executor, self._runs_in_workers = self._create_executor()
+        if app_settings.generate_streaming and self._runs_in_workers:
+            LOGGER.warning("Streamed bundles are generated in threads, since their chunks cannot leave the workers")
+
+    def _create_executor(self) -> tuple[Executor, bool]:
+        executor_type: GeneratorExecutorType = self._app_settings.generator_executor
+        max_workers: int | None = self._app_settings.generator_max_workers
+        LOGGER.info(f"Creating generator executor: {executor_type}, max_workers={max_workers}")
+        match executor_type:
+            case GeneratorExecutorType.PROCESS:
+                return (
+                    ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(self._app_settings,)),
+                    True,
+                )
+        return ThreadPoolExecutor(max_workers, thread_name_prefix="generator"), False
+
+    async def run(self, method: Callable[[GeneratorService, T], R], arg: T) -> R:
+        """
+        :param method: An (unbound) method of GeneratorService. Must be picklable for process pools.
+        :param arg: The single argument passed to method
+        :return: The result of method
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self._runs_in_workers:
+            return await loop.run_in_executor(self._executor, _call_in_worker, method, arg)
+        return await loop.run_in_executor(self._executor, method, self._generator_service, arg)
+
+    async def _run_in_thread(self, function: Callable[[T], R], arg: T) -> R:
+        """
+        For work whose result cannot leave this process: Runs function in the thread pool, or in the default thread
+        pool of the event loop if the generation runs in workers
+        """
+        if self._runs_in_workers:
+            return await asyncio.to_thread(function, arg)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, arg)
+
+    async def export_model(self, api_model: APIExportModel) -> bytes:
+        bundle_cache: BundleCache = self._generator_service.bundle_cache
+        cache_key: str = BundleCache.key_for(api_model)
+        bundle: bytes | None = bundle_cache.get(cache_key)
+        if bundle is None:
+            bundle = await self.run(GeneratorService.build_bundle, api_model)
+            bundle_cache.put(cache_key, bundle)
+        else:
+            LOGGER.info(f"Serving cached bundle: {cache_key}")
+        LOGGER.info(f"Bundle cache: {bundle_cache.stats}")
+        return bundle
+
+    async def export_batch(self, api_models: list[APIExportModel]) -> bytes:
+        """
+        Generates the members of each bundle in parallel in the pool. Only assembling the ZIP is done in a thread.
+        """
+        members_per_bundle: list[list[tuple[str, str]]] = await asyncio.gather(
+            *(self.run(GeneratorService.generate_members, api_model) for api_model in api_models)
+        )
+        return await asyncio.to_thread(self._generator_service.build_batch_bundle, members_per_bundle)
+
+    async def stream_model(self, api_model: APIExportModel) -> Iterator[bytes]:
+        """
+        The cache key and the eager validation of iter_bundle run in a thread, see _run_in_thread. The returned
+        iterator is meant to be consumed by a StreamingResponse, which iterates it in the server's thread pool. Peak
+        memory is about one member, unless the bundle cache is enabled, in which case the streamed chunks are also
+        collected for the cache.
+        """
+        bundle_cache: BundleCache = self._generator_service.bundle_cache
+        cache_key: str = await self._run_in_thread(BundleCache.key_for, api_model)
+        bundle: bytes | None = bundle_cache.get(cache_key)
+        if bundle is not None:
+            LOGGER.info(f"Serving cached bundle: {cache_key}")
+            return iter((bundle,))
+        chunks: Iterator[bytes] = await self._run_in_thread(self._generator_service.iter_bundle, api_model)
+        if not bundle_cache.is_enabled:
+            return chunks
+        return self._cache_while_streaming(cache_key, chunks)
+
+    def _cache_while_streaming(self, cache_key: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        streamed_chunks: list[bytes] = []
+        for chunk in chunks:
+            streamed_chunks.append(chunk)
+            yield chunk
+        self._generator_service.bundle_cache.put(cache_key, b"".join(streamed_chunks))
+
+    def shutdown(self) -> None:
+        LOGGER.info("Shutting down generator executor")
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -5,21 +5,23 @@ import logging
 from enum import StrEnum, auto
 from io import BytesIO
 from logging import Logger
-from typing import Final
+from typing import Final, Iterator
 from zipfile import PyZipFile
 
 from dcs_pylot_dash.api.api_model import APIExportModel, APIExportModelAdvancedSettings, APIExportField
 from dcs_pylot_dash.app_settings import DCSPylotDashAppSettings
 from dcs_pylot_dash.exceptions import DCSPylotDashInvalidInputException
+from dcs_pylot_dash.service.bundle_cache import BundleCache, BundleCacheStats
 from dcs_pylot_dash.service.dcs_model_internal import InternalModelField
 from dcs_pylot_dash.service.export_model import ExportModel, ExportModelField, LuaGeneratorOutput, ColorScaleEntry
-from dcs_pylot_dash.service.html_ui_generator import HtmlUIGenerator, HtmlUiGeneratorSettings, HtmlUIGeneratorOutput
+from dcs_pylot_dash.service.html_ui_generator import HtmlUIGenerator, HtmlUiGeneratorSettings
 from dcs_pylot_dash.service.lua_generator import LuaGenerator, LuaGeneratorSettings
 from dcs_pylot_dash.service.notice_service import NoticesService
 from dcs_pylot_dash.service.source_model_service import SourceModelService
 from dcs_pylot_dash.service.units import Unit
 from dcs_pylot_dash.utils.resource_provider import ResourceProvider
 from dcs_pylot_dash.utils.string_utils import StringUtils
+from dcs_pylot_dash.utils.template import CompiledTemplate
 
 
 class ReadmeTemplateVar(StrEnum):
@@ -27,6 +29,36 @@ class ReadmeTemplateVar(StrEnum):
     APP_VERSION = auto()
     OUTPUT_SCRIPT_NAME = auto()
     HTML_FILE_NAME = auto()
+    EXPORT_FILE_NAME = auto()
+
+
+class _ChunkSink:
+    """
+    Write-only, non-seekable file object that collects the bytes written by ZipFile until they are drained.
+    """
+
+    _chunks: list[bytes]
+    _position: int
+
+    def __init__(self) -> None:
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        chunk: bytes = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
 
 
 class GeneratorService:
@@ -35,6 +67,14 @@ class GeneratorService:
 
     SAMPLE_MODEL_FILE_NAME: Final[str] = "sample_api_export_model.json"
     README_TEMPLATE_NAME: Final[str] = "readme.template.txt"
+    EXPORT_MEMBER_NAME: Final[str] = "add-to-Export.lua"
+    LICENSE_MEMBER_NAME: Final[str] = "license.txt"
+    README_MEMBER_NAME: Final[str] = "readme.txt"
+    BATCH_SUB_DIR_PREFIX: Final[str] = "bundle_"
+    # how the readme of a bundle in a batch refers to members in the root directory
+    BATCH_ROOT_DIR_PREFIX: Final[str] = "..\\"
+    # dashboard specific members (HTML, Lua script, readme) always go into the sub-directory of their bundle
+    BATCH_SHAREABLE_MEMBER_NAMES: Final[frozenset[str]] = frozenset([EXPORT_MEMBER_NAME, LICENSE_MEMBER_NAME])
 
     _lua_generator: LuaGenerator
     _html_generator: HtmlUIGenerator
@@ -42,8 +82,11 @@ class GeneratorService:
     _resource_provider: ResourceProvider
     _app_settings: DCSPylotDashAppSettings
     _source_model_service: SourceModelService
+    _bundle_cache: BundleCache
+    # BATCH_SHAREABLE_MEMBER_NAMES and the shared runtime, which is the same for all bundles
+    _batch_shareable_member_names: frozenset[str]
 
-    _readme_template: str = ""
+    _readme_template: CompiledTemplate
 
     _sample_model: APIExportModel
 
@@ -58,6 +101,7 @@ class GeneratorService:
         self._resource_provider = resource_provider
         self._notices_service = notices_service
         self._source_model_service = source_model_service
+        self._bundle_cache = BundleCache(app_settings.bundle_cache_max_entries, app_settings.bundle_cache_max_bytes)
         self._lua_generator = LuaGenerator(
             LuaGeneratorSettings(), self._resource_provider, self._notices_service.notices
         )
@@ -66,6 +110,9 @@ class GeneratorService:
             self._resource_provider,
             notices_service,
         )
+        self._batch_shareable_member_names = self.BATCH_SHAREABLE_MEMBER_NAMES | {
+            self._lua_generator.runtime_script_name
+        }
         self._read_readme_template()
         self._load_sample_model()
 
@@ -76,35 +123,97 @@ class GeneratorService:
     def _read_readme_template(self) -> None:
         self.LOGGER.info(f"Reading readme template: {self.README_TEMPLATE_NAME}")
         readme_template: str = self._resource_provider.read_template_file(self.README_TEMPLATE_NAME)
-        readme_template = self._fill_readme(readme_template, ReadmeTemplateVar.APP_TITLE, self._app_settings.app_name)
-        readme_template = self._fill_readme(
-            readme_template, ReadmeTemplateVar.APP_VERSION, self._app_settings.app_version
+        self._readme_template = CompiledTemplate(readme_template, ReadmeTemplateVar).partial(
+            {
+                ReadmeTemplateVar.APP_TITLE: self._app_settings.app_name,
+                ReadmeTemplateVar.APP_VERSION: self._app_settings.app_version,
+            }
         )
-        self._readme_template = readme_template
 
-    def export_model(self, api_model: APIExportModel) -> BytesIO:
+    def build_bundle(self, api_model: APIExportModel) -> bytes:
+        """
+        Generates the bundle without consulting the bundle cache, which is done by GeneratorExecutor.export_model.
+        Must only depend on the state created in __init__, because it may also be called in worker processes.
+        """
+        in_memory_file: BytesIO = BytesIO()
+        for chunk in self.iter_bundle(api_model):
+            in_memory_file.write(chunk)
+        return in_memory_file.getvalue()
+
+    def iter_bundle(self, api_model: APIExportModel) -> Iterator[bytes]:
+        """
+        The export model is validated eagerly, such that invalid input raises before the first chunk is produced.
+        :return: The bundle as ZIP chunks, one per member plus the central directory
+        """
         self.LOGGER.info("Generating from export model")
         export_model: ExportModel = self._build_export_model(api_model)
+        return self._iter_zip_chunks(self._generate_members(export_model))
+
+    def generate_members(self, api_model: APIExportModel) -> list[tuple[str, str]]:
+        """
+        Like iter_bundle, but returns the (name, content) pairs of the bundle members instead of a ZIP.
+        Must only depend on the state created in __init__, because it may also be called in worker processes.
+        """
+        export_model: ExportModel = self._build_export_model(api_model)
+        return list(self._generate_members(export_model))
+
+    def build_batch_bundle(self, members_per_bundle: list[list[tuple[str, str]]]) -> bytes:
+        """
+        Creates one ZIP with a sub-directory per bundle. If there are several bundles, shareable members that are
+        identical in all of them (e.g., license.txt) are only written once, to the root directory. The readme of each
+        bundle then refers to them in the root directory.
+        :param members_per_bundle: As returned by generate_members, per bundle
+        """
+        shared_members: dict[str, str] = {}
+        if len(members_per_bundle) > 1:
+            shared_members = {n: c for n, c in members_per_bundle[0] if n in self._batch_shareable_member_names}
+            for members in members_per_bundle[1:]:
+                shared_members = {n: c for n, c in members if shared_members.get(n) == c}
+
+        batch_members: list[tuple[str, str]] = list(shared_members.items())
+        index_width: int = len(str(len(members_per_bundle)))
+        for i, members in enumerate(members_per_bundle):
+            sub_dir: str = f"{self.BATCH_SUB_DIR_PREFIX}{i + 1:0{index_width}d}"
+            for member_name, member_content in members:
+                if member_name == self.README_MEMBER_NAME:
+                    member_content = self._build_batch_readme(members, shared_members)
+                if member_name not in shared_members:
+                    batch_members.append((f"{sub_dir}/{member_name}", member_content))
+
+        in_memory_file: BytesIO = BytesIO()
+        for chunk in self._iter_zip_chunks(iter(batch_members)):
+            in_memory_file.write(chunk)
+        return in_memory_file.getvalue()
+
+    def _generate_members(self, export_model: ExportModel) -> Iterator[tuple[str, str]]:
+        # the Lua generator resolves the internal fields, which the HTML generator relies on
         lua_generator_output: LuaGeneratorOutput = self._lua_generator.generate(
             self._source_model_service.internal_model, export_model
         )
-        html_generator_output: HtmlUIGeneratorOutput = self._html_generator.generate(export_model)
-
         html_file_name: str = f"{self._html_generator.app_name}.html"
-        output_script_file_name: str = export_model.lua_export_settings.output_script_name
-        readme_content: str = self._build_readme(html_file_name, output_script_file_name)
+        script_file_names: list[str] = [export_model.lua_export_settings.output_script_name]
 
-        in_memory_file: BytesIO = BytesIO()
-        with PyZipFile(in_memory_file, "w") as zip_file:
-            zip_file.writestr(html_file_name, html_generator_output.html_content)
-            zip_file.writestr(output_script_file_name, lua_generator_output.script_content)
-            zip_file.writestr("add-to-Export.lua", lua_generator_output.export_content)
-            zip_file.writestr("license.txt", self._notices_service.notices.license_txt)
-            zip_file.writestr("readme.txt", readme_content)
-            if first_invalid_zip_file_name := zip_file.testzip() is not None:
-                raise DCSPylotDashInvalidInputException(f"zip file is invalid: {first_invalid_zip_file_name}")
+        yield html_file_name, self._html_generator.generate(export_model).html_content
+        yield script_file_names[0], lua_generator_output.script_content
+        if lua_generator_output.runtime_script_name is not None:
+            script_file_names.append(lua_generator_output.runtime_script_name)
+            yield lua_generator_output.runtime_script_name, lua_generator_output.runtime_content
+        yield self.EXPORT_MEMBER_NAME, lua_generator_output.export_content
+        yield self.LICENSE_MEMBER_NAME, self._notices_service.notices.license_txt
+        yield self.README_MEMBER_NAME, self._build_readme(html_file_name, script_file_names, self.EXPORT_MEMBER_NAME)
 
-        return in_memory_file
+    @staticmethod
+    def _iter_zip_chunks(members: Iterator[tuple[str, str]]) -> Iterator[bytes]:
+        """
+        writestr computes the CRC of each member while writing it, so the archive is not read again for validation.
+        Since the sink is not seekable, sizes and CRCs are written in a data descriptor after each member.
+        """
+        sink: _ChunkSink = _ChunkSink()
+        with PyZipFile(sink, "w") as zip_file:
+            for member_name, member_content in members:
+                zip_file.writestr(member_name, member_content)
+                yield sink.drain()
+        yield sink.drain()
 
     def _build_export_model(self, api_model: APIExportModel) -> ExportModel:
         export_model: ExportModel = ExportModel()
@@ -116,6 +225,16 @@ class GeneratorService:
                 export_model.http_server_settings.bind_port = advanced_settings.lua_bind_port
             if advanced_settings.poll_interval_ms is not None:
                 export_model.ui_export_settings.fetch_data_interval_ms = advanced_settings.poll_interval_ms
+            if advanced_settings.transport is not None:
+                export_model.http_server_settings.transport = advanced_settings.transport
+            if advanced_settings.shared_runtime is not None:
+                export_model.lua_export_settings.shared_runtime = advanced_settings.shared_runtime
+        if export_model.lua_export_settings.shared_runtime:
+            # dashboards that share the runtime run side by side on different ports, so each needs its own script
+            script_name: str = export_model.lua_export_settings.output_script_name.removesuffix(".lua")
+            export_model.lua_export_settings.output_script_name = (
+                f"{script_name}_{export_model.http_server_settings.bind_port}.lua"
+            )
 
         for i_row, row in enumerate(api_model.rows):
             for i_col, field in enumerate(row.fields):
@@ -133,9 +252,11 @@ class GeneratorService:
                     internal_field_name=internal_field.dotted_name,
                     display_name_override=field.display_name,
                     output_unit_override=output_unit,
+                    fragment=self._source_model_service.get_fragment(internal_field.dotted_name, output_unit),
                     row=i_row,
                     col=i_col,
                     decimal_digits=internal_field.default_decimal_digits,
+                    update_tier_override=field.update_tier,
                     color_scale=color_scale_entries,
                 )
                 export_model.fields.append(export_model_field)
@@ -157,15 +278,39 @@ class GeneratorService:
 
         return color_scale_entries
 
-    @staticmethod
-    def _fill_readme(template: str, template_var: ReadmeTemplateVar, value: str) -> str:
-        template_var_string: str = f"%{template_var}%"
-        return template.replace(template_var_string, value)
+    def _build_readme(self, html_file_name: str, script_file_names: list[str], export_file_name: str) -> str:
+        return self._readme_template.render(
+            {
+                ReadmeTemplateVar.HTML_FILE_NAME: html_file_name,
+                ReadmeTemplateVar.OUTPUT_SCRIPT_NAME: " and ".join(script_file_names),
+                ReadmeTemplateVar.EXPORT_FILE_NAME: export_file_name,
+            }
+        )
 
-    def _build_readme(self, html_file_name: str, output_script_file_name: str) -> str:
-        readme_content: str = self._fill_readme(self._readme_template, ReadmeTemplateVar.HTML_FILE_NAME, html_file_name)
-        return self._fill_readme(readme_content, ReadmeTemplateVar.OUTPUT_SCRIPT_NAME, output_script_file_name)
+    def _build_batch_readme(self, members: list[tuple[str, str]], shared_members: dict[str, str]) -> str:
+        """
+        The readme of a bundle in a batch, in which the members of the bundle that have been moved to the root
+        directory are referred to by their path relative to the sub-directory of the bundle
+        :param members: As returned by generate_members
+        """
+
+        def member_path(member_name: str) -> str:
+            return self.BATCH_ROOT_DIR_PREFIX + member_name if member_name in shared_members else member_name
+
+        html_file_name: str = f"{self._html_generator.app_name}.html"
+        script_file_names: list[str] = [
+            member_path(n) for n, _ in members if n.endswith(".lua") and n != self.EXPORT_MEMBER_NAME
+        ]
+        return self._build_readme(member_path(html_file_name), script_file_names, member_path(self.EXPORT_MEMBER_NAME))
 
     @property
     def sample_model(self) -> APIExportModel:
         return self._sample_model
+
+    @property
+    def bundle_cache(self) -> BundleCache:
+        return self._bundle_cache
+
+    @property
+    def bundle_cache_stats(self) -> BundleCacheStats:
+        return self._bundle_cache.stats
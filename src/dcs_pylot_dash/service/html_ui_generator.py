@@ -7,11 +7,11 @@ from typing import ClassVar
 
 from pydantic import BaseModel
 
-from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType
-from dcs_pylot_dash.service.export_model import ExportModel
+from dcs_pylot_dash.service.export_model import ExportModel, DataTransport, HttpServerSettings
 from dcs_pylot_dash.service.notice_service import NoticesService
-from dcs_pylot_dash.service.units import UnitFormatters
+from dcs_pylot_dash.utils.code_emitter import CodeEmitter
 from dcs_pylot_dash.utils.resource_provider import ResourceProvider
+from dcs_pylot_dash.utils.template import CompiledTemplate
 
 LOGGER = logging.getLogger(__name__)
 
@@ -26,6 +26,9 @@ class HtmlTemplateVar(StrEnum):
     COPYRIGHT = auto()
     BIND_ADDRESS = auto()
     BIND_PORT = auto()
+    EVENT_STREAM_PATH = auto()
+    WEBSOCKET_PATH = auto()
+    DELTA_ENABLED = auto()
     SET_INTERVAL_CALL = auto()
     TITLE_MAP_ENTRIES = auto()
     UNIT_MAP_ENTRIES = auto()
@@ -72,6 +75,19 @@ class HtmlUIGenerator:
     _settings: HtmlUiGeneratorSettings
     _resource_provider: ResourceProvider
     _notices_service: NoticesService
+    _main_template: CompiledTemplate
+
+    # Placeholders in the form: //%foo%
+    _comment_template_vars: ClassVar[frozenset[HtmlTemplateVar]] = frozenset(
+        [
+            HtmlTemplateVar.SET_INTERVAL_CALL,
+            HtmlTemplateVar.TITLE_MAP_ENTRIES,
+            HtmlTemplateVar.UNIT_MAP_ENTRIES,
+            HtmlTemplateVar.DECIMAL_DIGITS_MAP_ENTRIES,
+            HtmlTemplateVar.POSITION_MAP_ENTRIES,
+            HtmlTemplateVar.COLOR_SCALE_MAP_ENTRIES,
+        ]
+    )
 
     def __init__(
         self, settings: HtmlUiGeneratorSettings, resource_provider: ResourceProvider, notices_service: NoticesService
@@ -87,60 +103,77 @@ class HtmlUIGenerator:
 
     def _read_template(self) -> None:
         LOGGER.info(f"Reading main template: {self._settings.main_template_name}")
-        self._main_template = self._resource_provider.read_template_file(self._settings.main_template_name)
+        main_template: str = self._resource_provider.read_template_file(self._settings.main_template_name)
+        compiled_template: CompiledTemplate = CompiledTemplate(
+            main_template,
+            (v for v in HtmlTemplateVar if v not in self._comment_template_vars),
+            comment_variables=self._comment_template_vars,
+            delimiter=self._settings.template_var_delimiter,
+        )
+        self._main_template = compiled_template.partial(
+            {
+                HtmlTemplateVar.APP_TITLE: self._settings.app_name,
+                HtmlTemplateVar.APP_VERSION: self._settings.app_version,
+                HtmlTemplateVar.COPYRIGHT: self._notices_service.notices.license_txt,
+            }
+        )
 
-    def _add_line(self, content: str, line: str, *, indent_factor: int = 1) -> str:
-        if len(content) > 0:
-            return content + "\n" + (self._settings.script_indentation * indent_factor) * " " + line
-        else:
-            return line
+    def _create_emitter(self) -> CodeEmitter:
+        return CodeEmitter(self._settings.script_indentation)
 
     def _create_title_map_entries(self, export_model: ExportModel) -> str:
         var_name: str = self._settings.title_map_var_name
-        content: str = ""
+        content: CodeEmitter = self._create_emitter()
         for field in export_model.fields:
-            content = self._add_line(content, f"{var_name}.set('data.{field.name}', '{field.effective_display_name}');")
-        return content
+            content.line(f"{var_name}.set('data.{field.name}', '{field.effective_display_name}');")
+        return content.render()
 
     def _create_unit_map_entries(self, export_model: ExportModel) -> str:
         var_name: str = self._settings.unit_map_var_name
-        content: str = ""
+        content: CodeEmitter = self._create_emitter()
         for field in export_model.fields:
-            content = self._add_line(content, f"{var_name}.set('data.{field.name}', '{field.unit_label}');")
-        return content
+            content.line(f"{var_name}.set('data.{field.name}', '{field.fragment.unit_label}');")
+        return content.render()
 
     def _create_decimal_digits_map_entries(self, export_model: ExportModel) -> str:
         var_name: str = self._settings.decimal_digits_map_var_name
-        content: str = ""
+        content: CodeEmitter = self._create_emitter()
         for field in export_model.fields:
-            has_formatter: bool = UnitFormatters.has_formatter(field.effective_unit)
-            is_number: bool = field.internal_field.return_type == LoReturnType.NUMBER
-            if is_number and not has_formatter:
-                line: str = f"{var_name}.set('data.{field.name}', '{field.decimal_digits}');"
-                content = self._add_line(content, line)
-        return content
+            if field.fragment.has_decimal_digits:
+                content.line(f"{var_name}.set('data.{field.name}', '{field.decimal_digits}');")
+        return content.render()
 
     def _create_position_map_entries(self, export_model: ExportModel) -> str:
         var_name: str = self._settings.position_map_var_name
-        content: str = ""
+        content: CodeEmitter = self._create_emitter()
         for field in export_model.fields:
             if field.has_position:
                 map_value: str = f"[{field.row}, {field.col}]"
-                content = self._add_line(content, f"{var_name}.set('data.{field.name}', {map_value});")
-        return content
+                content.line(f"{var_name}.set('data.{field.name}', {map_value});")
+        return content.render()
 
     def _create_color_scale_map_entries(self, export_model: ExportModel) -> str:
         var_name: str = self._settings.color_scale_map_var_name
-        content: str = ""
+        content: CodeEmitter = self._create_emitter()
         for field in export_model.fields:
             if field.has_color_scale:
-                content = self._add_line(content, f"{var_name}.set('data.{field.name}', []);")
+                content.line(f"{var_name}.set('data.{field.name}', []);")
                 for c in field.color_scale:
                     min_value = c.from_value if c.from_value is not None else "null"
                     max_value = c.to_value if c.to_value is not None else "null"
                     list_entry: str = f"{{min: {min_value}, max: {max_value}, color: '{c.color}'}}"
-                    content = self._add_line(content, f"{var_name}.get('data.{field.name}').push({list_entry});")
-        return content
+                    content.line(f"{var_name}.get('data.{field.name}').push({list_entry});")
+        return content.render()
+
+    @staticmethod
+    def _create_start_call(export_model: ExportModel) -> str:
+        match export_model.http_server_settings.transport:
+            case DataTransport.SSE:
+                return "startEventStream()"
+            case DataTransport.WEBSOCKET:
+                return "startWebSocket()"
+            case _:
+                return f"setInterval(updateData, {export_model.ui_export_settings.fetch_data_interval_ms})"
 
     def generate(self, export_model: ExportModel) -> HtmlUIGeneratorOutput:
         title_map_entries: str = self._create_title_map_entries(export_model)
@@ -149,31 +182,21 @@ class HtmlUIGenerator:
         position_map_entries: str = self._create_position_map_entries(export_model)
         color_scale_map_entries: str = self._create_color_scale_map_entries(export_model)
 
-        html: str = self._main_template
         http_settings = export_model.http_server_settings
-        html = self._fill(html, HtmlTemplateVar.APP_TITLE, self._settings.app_name)
-        html = self._fill(html, HtmlTemplateVar.APP_VERSION, self._settings.app_version)
-        html = self._fill(html, HtmlTemplateVar.COPYRIGHT, self._notices_service.notices.license_txt)
-        html = self._fill(html, HtmlTemplateVar.BIND_ADDRESS, http_settings.bind_address)
-        html = self._fill(html, HtmlTemplateVar.BIND_PORT, str(http_settings.bind_port))
-        html = self._fill(html, HtmlTemplateVar.TITLE_MAP_ENTRIES, title_map_entries, comment=True)
-        html = self._fill(html, HtmlTemplateVar.UNIT_MAP_ENTRIES, unit_map_entries, comment=True)
-        html = self._fill(html, HtmlTemplateVar.DECIMAL_DIGITS_MAP_ENTRIES, decimal_digits_map_entries, comment=True)
-        html = self._fill(html, HtmlTemplateVar.POSITION_MAP_ENTRIES, position_map_entries, comment=True)
-        html = self._fill(html, HtmlTemplateVar.COLOR_SCALE_MAP_ENTRIES, color_scale_map_entries, comment=True)
-
-        html = self._fill(
-            html,
-            HtmlTemplateVar.SET_INTERVAL_CALL,
-            f"setInterval(updateData, {export_model.ui_export_settings.fetch_data_interval_ms})",
-            comment=True,
+        html: str = self._main_template.render(
+            {
+                HtmlTemplateVar.BIND_ADDRESS: http_settings.bind_address,
+                HtmlTemplateVar.BIND_PORT: str(http_settings.bind_port),
+                HtmlTemplateVar.EVENT_STREAM_PATH: HttpServerSettings.EVENT_STREAM_PATH,
+                HtmlTemplateVar.WEBSOCKET_PATH: HttpServerSettings.WEBSOCKET_PATH,
+                HtmlTemplateVar.DELTA_ENABLED: str(export_model.lua_export_settings.is_delta_enabled).lower(),
+                HtmlTemplateVar.TITLE_MAP_ENTRIES: title_map_entries,
+                HtmlTemplateVar.UNIT_MAP_ENTRIES: unit_map_entries,
+                HtmlTemplateVar.DECIMAL_DIGITS_MAP_ENTRIES: decimal_digits_map_entries,
+                HtmlTemplateVar.POSITION_MAP_ENTRIES: position_map_entries,
+                HtmlTemplateVar.COLOR_SCALE_MAP_ENTRIES: color_scale_map_entries,
+                HtmlTemplateVar.SET_INTERVAL_CALL: self._create_start_call(export_model),
+            }
         )
 
         return HtmlUIGeneratorOutput(html_content=html)
-
-    def _fill(self, template: str, template_var: HtmlTemplateVar, value: str, *, comment: bool = False) -> str:
-        delimiter = self._settings.template_var_delimiter
-        template_var_string: str = f"{delimiter}{template_var}{delimiter}"
-        if comment:
-            template_var_string: str = "//" + template_var_string
-        return template.replace(template_var_string, value)
@@ -1,36 +1,70 @@
 # Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
 # SPDX-License-Identifier: MIT
 # License-Filename: LICENSE
+import hashlib
+import json
 import logging
 from enum import StrEnum, auto
-from typing import ClassVar, Any
+from typing import ClassVar
 
 from pydantic import BaseModel
 
-from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType
+from dcs_pylot_dash.service.dcs_common_data_types import LoReturnType, UpdateTier
 from dcs_pylot_dash.service.dcs_model_internal import InternalModel, InternalModelField
 from dcs_pylot_dash.service.export_model import (
     LuaGeneratorOutput,
     ExportModel,
     ExportModelField,
-    LuaExportSettings,
     ExportModelTreeNode,
     HttpServerSettings,
+    DataTransport,
+    UiExportSettings,
+    LuaExportSettings,
 )
+from dcs_pylot_dash.service.field_fragments import FieldFragment
 from dcs_pylot_dash.service.notice_service import NoticesContainer
-from dcs_pylot_dash.service.units import UnitConverter, UnitFormatters
+from dcs_pylot_dash.service.units import UnitFormatters
+from dcs_pylot_dash.utils.code_emitter import CodeEmitter
 from dcs_pylot_dash.utils.resource_provider import ResourceProvider
+from dcs_pylot_dash.utils.template import CompiledTemplate
 
 LOGGER = logging.getLogger(__name__)
 
 
 class LuaTemplateVar(StrEnum):
     OUTPUT_SCRIPT_NAME = auto()
-    DATA_CONTENT = auto()
+    MODEL_CONTENT = auto()
+    LO_FUNCTION_CONTENT = auto()
+    MEMOIZE_FORMATTERS = auto()
+    RUNTIME_BEGIN = auto()
+    RUNTIME_END = auto()
+    RUNTIME_MODULE_NAME = auto()
+    CONFIG_CONTENT = auto()
+    RUNTIME_IMPORTS = auto()
+    RUNTIME_IMPORT_ASSIGNMENTS = auto()
     SOCKET_TIMEOUT = auto()
     BIND_ADDRESS = auto()
     BIND_PORT = auto()
     MAX_CONNECTIONS = auto()
+    KEEP_ALIVE = auto()
+    KEEP_ALIVE_TIMEOUT = auto()
+    KEEP_ALIVE_MAX_REQUESTS = auto()
+    MAX_ACCEPTS_PER_FRAME = auto()
+    MAX_FRAME_TIME_MS = auto()
+    EVENT_STREAM_ENABLED = auto()
+    EVENT_STREAM_PATH = auto()
+    PUSH_INTERVAL_MS = auto()
+    MIN_PUSH_INTERVAL_MS = auto()
+    WEBSOCKET_ENABLED = auto()
+    WEBSOCKET_PATH = auto()
+    SNAPSHOT_SLICE_MS = auto()
+    DELTA_HISTORY_SIZE = auto()
+    SLOW_TIER_INTERVAL_MS = auto()
+    STATIC_TIER_INTERVAL_MS = auto()
+    PROFILING_ENABLED = auto()
+    PROFILING_WINDOW_SIZE = auto()
+    PROFILING_LOG_INTERVAL_MS = auto()
+    STATS_PATH = auto()
     LOG_PREFIX = auto()
     COPYRIGHT = auto()
 
@@ -42,21 +76,78 @@ class LuaGeneratorSettings(BaseModel):
 
     MAIN_TEMPLATE_NAME_DEFAULT: ClassVar[str] = "main.lua.template"
     EXPORT_TEMPLATE_NAME_DEFAULT: ClassVar[str] = "export.lua.template"
+    DASHBOARD_TEMPLATE_NAME_DEFAULT: ClassVar[str] = "dashboard.lua.template"
     TEMPLATE_VAR_DELIMITER_DEFAULT: ClassVar[str] = "%"
+    RUNTIME_MODULE_PREFIX_DEFAULT: ClassVar[str] = "DCSPylotDashRuntime_"
+    RUNTIME_VERSION_LENGTH_DEFAULT: ClassVar[int] = 12
 
     main_template_name: str = MAIN_TEMPLATE_NAME_DEFAULT
     export_template_name: str = EXPORT_TEMPLATE_NAME_DEFAULT
+    # Template of the per-dashboard script, if LuaExportSettings.shared_runtime is set
+    dashboard_template_name: str = DASHBOARD_TEMPLATE_NAME_DEFAULT
     template_var_delimiter: str = TEMPLATE_VAR_DELIMITER_DEFAULT
+    # The runtime module is named by this prefix and a hash of its content, such that different versions can coexist
+    runtime_module_prefix: str = RUNTIME_MODULE_PREFIX_DEFAULT
+    runtime_version_length: int = RUNTIME_VERSION_LENGTH_DEFAULT
 
 
 class LuaGenerator:
     _settings: LuaGeneratorSettings
     _resource_provider: ResourceProvider
     _notices_container: NoticesContainer
-    _main_template: str
-    _export_template: str
+    _main_template: CompiledTemplate
+    _export_template: CompiledTemplate
+    _dashboard_template: CompiledTemplate
+    # The main template rendered as the shared runtime, which is the same for all export models
+    _runtime_content: str
+    _runtime_module_name: str
 
     _data_var: ClassVar[str] = "data"
+    # Variables of the main template that depend on the export model. In the shared runtime, they are read from the
+    # config table of the dashboard script
+    _config_vars: ClassVar[tuple[LuaTemplateVar, ...]] = (
+        LuaTemplateVar.LOG_PREFIX,
+        LuaTemplateVar.MEMOIZE_FORMATTERS,
+        LuaTemplateVar.SOCKET_TIMEOUT,
+        LuaTemplateVar.BIND_ADDRESS,
+        LuaTemplateVar.BIND_PORT,
+        LuaTemplateVar.MAX_CONNECTIONS,
+        LuaTemplateVar.KEEP_ALIVE,
+        LuaTemplateVar.KEEP_ALIVE_TIMEOUT,
+        LuaTemplateVar.KEEP_ALIVE_MAX_REQUESTS,
+        LuaTemplateVar.MAX_ACCEPTS_PER_FRAME,
+        LuaTemplateVar.MAX_FRAME_TIME_MS,
+        LuaTemplateVar.EVENT_STREAM_ENABLED,
+        LuaTemplateVar.PUSH_INTERVAL_MS,
+        LuaTemplateVar.WEBSOCKET_ENABLED,
+        LuaTemplateVar.SNAPSHOT_SLICE_MS,
+        LuaTemplateVar.DELTA_HISTORY_SIZE,
+        LuaTemplateVar.SLOW_TIER_INTERVAL_MS,
+        LuaTemplateVar.STATIC_TIER_INTERVAL_MS,
+        LuaTemplateVar.PROFILING_ENABLED,
+        LuaTemplateVar.PROFILING_WINDOW_SIZE,
+        LuaTemplateVar.PROFILING_LOG_INTERVAL_MS,
+    )
+    # Locals of the main template that the generated model content uses, which the shared runtime hands to the
+    # dashboard script
+    _runtime_imports: ClassVar[tuple[str, ...]] = (
+        "safe_get",
+        "is_tier_due",
+        "tier_values",
+        "record_timing",
+        "collect_list",
+        *UnitFormatters.get_formatters(),
+        "encode_value",
+        "encode_number",
+        "encode_string",
+        "encode_boolean",
+        "table_concat",
+        "JSON",
+    )
+    _shared_local_prefix: ClassVar[str] = "shared_"
+    _list_collector_prefix: ClassVar[str] = "collect_"
+    # Lua 5.1 allows 200 locals per function, which also have to hold the root fields
+    _max_shared_locals: ClassVar[int] = 100
 
     _default_lo_return_values: dict[LoReturnType, str] = {
         LoReturnType.TABLE: "{}",
@@ -77,89 +168,619 @@ class LuaGenerator:
     def _read_templates(self) -> None:
         LOGGER.info(f"Reading main template: {self._settings.main_template_name}")
         main_template: str = self._resource_provider.read_template_file(self._settings.main_template_name)
-        self._main_template = self._fill(main_template, LuaTemplateVar.COPYRIGHT, self._notices_container.license_txt)
-        LOGGER.info(f"Reading export template: {self._settings.main_template_name}")
-        self._export_template = self._resource_provider.read_template_file(self._settings.export_template_name)
+        self._main_template = self._compile(main_template)
+        LOGGER.info(f"Reading export template: {self._settings.export_template_name}")
+        export_template: str = self._resource_provider.read_template_file(self._settings.export_template_name)
+        self._export_template = self._compile(export_template)
+        LOGGER.info(f"Reading dashboard template: {self._settings.dashboard_template_name}")
+        dashboard_template: str = self._resource_provider.read_template_file(self._settings.dashboard_template_name)
+        self._dashboard_template = self._compile(dashboard_template)
+
+        self._runtime_content = self._build_runtime_content(self._main_template)
+        runtime_version: str = hashlib.sha256(self._runtime_content.encode()).hexdigest()
+        self._runtime_module_name = (
+            f"{self._settings.runtime_module_prefix}{runtime_version[: self._settings.runtime_version_length]}"
+        )
+        LOGGER.info(f"Rendered shared runtime: {self._runtime_module_name}")
+        self._main_template = self._main_template.partial(
+            {LuaTemplateVar.RUNTIME_BEGIN: "", LuaTemplateVar.RUNTIME_END: ""}
+        )
+
+    @property
+    def runtime_script_name(self) -> str:
+        return f"{self._runtime_module_name}.lua"
 
-    def _fill(self, template: str, template_var: LuaTemplateVar, value: str) -> str:
-        delimiter = self._settings.template_var_delimiter
-        template_var_string: str = f"{delimiter}{template_var}{delimiter}"
-        return template.replace(template_var_string, value)
+    def _compile(self, template: str) -> CompiledTemplate:
+        compiled_template: CompiledTemplate = CompiledTemplate(
+            template, LuaTemplateVar, delimiter=self._settings.template_var_delimiter
+        )
+        return compiled_template.partial(
+            {
+                LuaTemplateVar.COPYRIGHT: self._notices_container.license_txt,
+                LuaTemplateVar.STATS_PATH: HttpServerSettings.STATS_PATH,
+                LuaTemplateVar.EVENT_STREAM_PATH: HttpServerSettings.EVENT_STREAM_PATH,
+                LuaTemplateVar.WEBSOCKET_PATH: HttpServerSettings.WEBSOCKET_PATH,
+                LuaTemplateVar.MIN_PUSH_INTERVAL_MS: str(UiExportSettings.FETCH_DATA_INTERVAL_MS_MIN),
+            }
+        )
+
+    def _build_runtime_content(self, main_template: CompiledTemplate) -> str:
+        """
+        The main template as a module, which returns a function that starts the HTTP server of one dashboard. It is
+        called with the config table and a function that creates the model functions from the runtime imports.
+        """
+        model_content: CodeEmitter = CodeEmitter(LuaExportSettings.SCRIPT_INDENTATION_DEFAULT, base_level=0)
+        model_content.line("-- Functions of the dashboard, created by its script with the runtime functions they use")
+        model_content.line("local model = build_model({")
+        with model_content.indented():
+            for runtime_import in self._runtime_imports:
+                model_content.line(f"{runtime_import} = {runtime_import},")
+        model_content.line("})")
+        model_content.line("bind_lo_functions = model.bind_lo_functions")
+        model_content.line("new_data, generate_data = model.new_data, model.generate_data")
+        model_content.line("encode_data, encode_fields = model.encode_data, model.encode_fields")
+
+        runtime_begin: str = "\n".join(
+            [
+                "",
+                "-- Shared runtime of DCSPylotDash, loaded once with require by the scripts of all dashboards",
+                "return function(config, build_model)",
+                "",
+                "-- Functions of the dashboard, see build_model below",
+                "local new_data, generate_data, encode_data, encode_fields",
+                "",
+            ]
+        )
+        return main_template.render(
+            {config_var: f"config.{config_var}" for config_var in self._config_vars}
+            | {
+                LuaTemplateVar.RUNTIME_BEGIN: runtime_begin,
+                LuaTemplateVar.RUNTIME_END: "end\n",
+                LuaTemplateVar.LO_FUNCTION_CONTENT: "local bind_lo_functions",
+                LuaTemplateVar.MODEL_CONTENT: model_content.render(),
+            }
+        )
+
+    def _add_sc_root_field_call(
+        self, root_field: InternalModelField, target: str, sc: CodeEmitter, profiling: bool
+    ) -> None:
+        default_value: str = self._default_lo_return_values[root_field.return_type]
+        if profiling:
+            sc.line("started = os.clock()")
+        sc.line(f"{target} = safe_get({root_field.lo_function}, {default_value})")
+        if profiling:
+            sc.line(f'record_timing("{root_field.lo_function}", started)')
+
+    def _add_sc_root_fields(self, export_model: ExportModel, sc: CodeEmitter) -> None:
+        profiling: bool = export_model.lua_export_settings.profiling
+        if profiling:
+            sc.line("local started")
+        root_field_update_tiers: dict[str, UpdateTier] = export_model.root_field_update_tiers
+        # Key: tier, value: root fields, which are called only when their tier is due
+        tiered_root_fields: dict[UpdateTier, list[InternalModelField]] = {}
+        for root_field in export_model.internal_root_fields.values():
+            update_tier: UpdateTier = root_field_update_tiers[root_field.name]
+            if update_tier == UpdateTier.FRAME:
+                self._add_sc_root_field_call(root_field, f"local {root_field.name}", sc, profiling)
+            else:
+                tiered_root_fields.setdefault(update_tier, []).append(root_field)
+
+        for update_tier, root_fields in tiered_root_fields.items():
+            sc.line(f'if is_tier_due("{update_tier}") then')
+            with sc.indented():
+                for root_field in root_fields:
+                    self._add_sc_root_field_call(root_field, f"tier_values.{root_field.name}", sc, profiling)
+            sc.line("end")
+            for root_field in root_fields:
+                sc.line(f"local {root_field.name} = tier_values.{root_field.name}")
+
+    @staticmethod
+    def _is_list_leaf(node: ExportModelTreeNode) -> bool:
+        return (
+            node.has_export_field
+            and node.export_field.internal_field is not None
+            and node.export_field.internal_field.has_list_field_in_hierarchy
+        )
 
     @staticmethod
-    def _build_export_tree(export_model: ExportModel) -> ExportModelTreeNode:
-        root: ExportModelTreeNode = ExportModelTreeNode(name="")
-        for field in export_model.fields:
-            root.add_node(field)
-        return root
+    def _list_fields_in_hierarchy(internal_field: InternalModelField) -> list[InternalModelField]:
+        """
+        :return: The list fields going up in the hierarchy, innermost first
+        """
+        list_fields: list[InternalModelField] = []
+        list_field: InternalModelField | None = internal_field.next_list_field_in_hierarchy
+        while list_field is not None:
+            list_fields.append(list_field)
+            list_field = list_field.next_list_field_in_hierarchy
+        return list_fields
 
     @staticmethod
-    def _add_line(content: str, line: str, settings: LuaExportSettings, *, indent_factor: int = 1) -> str:
-        contents_start: str = content
-        if len(content) > 0:
-            contents_start += "\n" + (settings.script_indentation * indent_factor) * " "
-        return contents_start + line
+    def _relative_path(internal_field: InternalModelField, ancestor: InternalModelField) -> str:
+        names: list[str] = []
+        field: InternalModelField = internal_field
+        while field is not ancestor:
+            names.append(field.name)
+            field = field.parent
+        return ".".join(reversed(names))
 
-    def _add_sc_root_fields(self, export_model: ExportModel, sc: str) -> str:
-        for root_field in export_model.internal_root_fields.values():
-            default_value: str = self._default_lo_return_values[root_field.return_type]
-            sc = self._add_line(
-                sc,
-                f"local {root_field.name} = safe_get({root_field.lo_function}, {default_value})",
-                export_model.lua_export_settings,
-            )
-        return sc
+    @staticmethod
+    def _loop_vars(depth: int) -> tuple[str, str]:
+        if depth == 1:
+            return "i", "v"
+        return f"i{depth}", f"v{depth}"
 
-    def _add_sc_node(self, node: ExportModelTreeNode, sc: str, settings: LuaExportSettings) -> str:
-        if node.has_export_field:  # then all necessary objects must have been created before
-            internal_field: InternalModelField = node.export_field.internal_field
-            if internal_field.has_list_field_in_hierarchy:  # list fields cannot be leaves
-                list_field: InternalModelField = internal_field.next_list_field_in_hierarchy
-                sc = self._add_line(sc, f"for i, v in ipairs({list_field.dotted_name}) do", settings)
-                node_at_index: str = f"{self._data_var}.{node.parent.name}"
-                sc = self._add_line(sc, f"{node_at_index}[i] = {{}}", settings, indent_factor=2)
-                var_name: str = f"{node_at_index}[i].{node.local_name}"
-                var_value: str = f"{internal_field.parent.dotted_name}[i].{internal_field.name}"
-                sc = self._add_line(sc, f"{var_name} = {var_value}", settings, indent_factor=2)
-                sc = self._add_line(sc, "end", settings)
+    def _add_sc_list_element(
+        self,
+        list_field: InternalModelField,
+        element: str,
+        targets: list[tuple[str, InternalModelField]],
+        sc: CodeEmitter,
+        depth: int,
+    ) -> None:
+        """
+        Assigns the values of all targets from one element of list_field. Targets below a nested list are grouped by
+        that list, and receive a list of values from a single nested loop.
+        :param element: Lua expression for the current element of list_field
+        :param targets: (Lua expression to assign to, internal field) pairs
+        """
+        nested_targets: dict[str, list[tuple[str, InternalModelField]]] = {}
+        nested_lists: dict[str, InternalModelField] = {}
+        for target, internal_field in targets:
+            list_fields: list[InternalModelField] = self._list_fields_in_hierarchy(internal_field)
+            list_index: int = list_fields.index(list_field)
+            if list_index == 0:
+                sc.line(f"{target} = {element}.{self._relative_path(internal_field, list_field)}")
             else:
-                line: str = f"{self._data_var}.{node.name} = "
-                if UnitFormatters.has_formatter(node.export_field.effective_unit):
-                    formatter_function: str | None = UnitFormatters.get_formatter(node.export_field.effective_unit)
-                    line += f"{formatter_function}({internal_field.dotted_name})"
-                else:
-                    line = f"{self._data_var}.{node.name} = "
-                    if internal_field.return_type == LoReturnType.NUMBER:
-                        line += f"({internal_field.dotted_name} or 0)"
-                    else:
-                        line += f"{internal_field.dotted_name}"
-
-                    if internal_field.abs_base_value is not None:
-                        line += f" * {internal_field.abs_base_value}"
-                    if node.export_field.output_unit_override is not None:
-                        factor: float | None = UnitConverter.get_conversion_factor(
-                            internal_field.unit, node.export_field.output_unit_override
-                        )
-                        if factor is not None and factor != 1.0:
-                            line += f" * {factor}"
-                sc = self._add_line(sc, line, settings)
+                nested_list: InternalModelField = list_fields[list_index - 1]
+                nested_lists[nested_list.dotted_name] = nested_list
+                nested_targets.setdefault(nested_list.dotted_name, []).append((target, internal_field))
+
+        for list_name, list_targets in nested_targets.items():
+            nested_list = nested_lists[list_name]
+            index_var, element_var = self._loop_vars(depth + 1)
+            for target, _ in list_targets:
+                sc.line(f"{target} = {{}}")
+            nested_list_value: str = f"{element}.{self._relative_path(nested_list, list_field)}"
+            sc.line(f"for {index_var}, {element_var} in ipairs({nested_list_value} or {{}}) do")
+            with sc.indented():
+                self._add_sc_list_element(
+                    nested_list,
+                    element_var,
+                    [(f"{target}[{index_var}]", internal_field) for target, internal_field in list_targets],
+                    sc,
+                    depth + 1,
+                )
+            sc.line("end")
+
+    @staticmethod
+    def _outermost_list_field(node: ExportModelTreeNode) -> InternalModelField:
+        return LuaGenerator._list_fields_in_hierarchy(node.export_field.internal_field)[-1]
+
+    def _group_list_leaves(
+        self, node: ExportModelTreeNode
+    ) -> tuple[list[ExportModelTreeNode], dict[str, list[ExportModelTreeNode]]]:
+        """
+        :return: The children of node that are not list leaves, and the list leaves grouped by their outermost list
+        field. Key: InternalModelField.dotted_name of the outermost list field
+        """
+        other_nodes: list[ExportModelTreeNode] = []
+        list_nodes: dict[str, list[ExportModelTreeNode]] = {}
+        for child_node in node.nodes.values():
+            if self._is_list_leaf(child_node):
+                list_nodes.setdefault(self._outermost_list_field(child_node).dotted_name, []).append(child_node)
+            else:
+                other_nodes.append(child_node)
+        return other_nodes, list_nodes
+
+    def _add_sc_list_nodes(
+        self,
+        target: str,
+        list_nodes: list[ExportModelTreeNode],
+        sc: CodeEmitter,
+        reuse_elements: bool,
+        list_value: str | None = None,
+        elements_per_yield: int = 0,
+    ) -> None:
+        """
+        One loop over the outermost list field of list_nodes, which allocates each element once
+        :param reuse_elements: Whether the elements may already have been created by a loop over another list
+        :param list_value: Lua expression for the list field, defaults to reading the list field
+        :param elements_per_yield: If > 0, the loop runs in a coroutine and yields after this number of elements
+        """
+        list_field: InternalModelField = self._outermost_list_field(list_nodes[0])
+        if list_value is None:
+            list_value = f"{list_field.dotted_name} or {{}}"
+        index_var, element_var = self._loop_vars(1)
+        sc.line(f"for {index_var}, {element_var} in ipairs({list_value}) do")
+        with sc.indented():
+            sc.line(f"local element = {target}[{index_var}] or {{}}" if reuse_elements else "local element = {}")
+            targets: list[tuple[str, InternalModelField]] = [
+                (f"element.{node.local_name}", node.export_field.internal_field) for node in list_nodes
+            ]
+            self._add_sc_list_element(list_field, element_var, targets, sc, 1)
+            sc.line(f"{target}[{index_var}] = element")
+            if elements_per_yield > 0:
+                sc.line(f"if {index_var} % {elements_per_yield} == 0 then")
+                with sc.indented():
+                    sc.line("coroutine.yield()")
+                sc.line("end")
+        sc.line("end")
+
+    def _add_sc_children(
+        self,
+        node: ExportModelTreeNode,
+        target: str,
+        sc: CodeEmitter,
+        reuse_tables: bool,
+        shared_locals: dict[str, str],
+        list_collectors: dict[str, str],
+    ) -> None:
+        other_nodes, list_nodes = self._group_list_leaves(node)
+        for child_node in other_nodes:
+            self._add_sc_node(child_node, sc, reuse_tables, shared_locals, list_collectors)
+        for index, nodes in enumerate(list_nodes.values()):
+            self._add_sc_list_nodes(target, nodes, sc, reuse_elements=index > 0)
+
+    def _add_sc_node(
+        self,
+        node: ExportModelTreeNode,
+        sc: CodeEmitter,
+        reuse_tables: bool,
+        shared_locals: dict[str, str],
+        list_collectors: dict[str, str],
+    ) -> None:
+        """
+        :param reuse_tables: Whether the table for node was created by new_data. Lists have a different length in each
+        call, so list nodes and everything below them are always created
+        :param shared_locals: Key: InternalModelField.dotted_name, value: the local that holds the value of the field
+        :param list_collectors: Key: ExportModelTreeNode.name, value: the collect_list call that returns the list
+        """
+        if node.has_export_field:  # then all necessary objects must have been created before
+            fragment: FieldFragment = node.export_field.fragment
+            shared_local: str | None = shared_locals.get(fragment.field_id)
+            lua_value: str = fragment.lua_value if shared_local is None else fragment.lua_value_from(shared_local)
+            sc.line(f"{self._data_var}.{node.name} = {lua_value}")
+        elif node.name in list_collectors:
+            other_nodes, _ = self._group_list_leaves(node)
+            if len(other_nodes) == 0:
+                sc.line(f"{self._data_var}.{node.name} = {list_collectors[node.name]}")
+                return
+            # the other fields are set on a copy, since the collected list is shared by the data of several calls
+            sc.line(f"{self._data_var}.{node.name} = {{}}")
+            sc.line(f"for i, element in ipairs({list_collectors[node.name]}) do")
+            with sc.indented():
+                sc.line(f"{self._data_var}.{node.name}[i] = element")
+            sc.line("end")
+            for child_node in other_nodes:
+                self._add_sc_node(child_node, sc, False, shared_locals, list_collectors)
         else:
-            sc = self._add_line(sc, f"{self._data_var}.{node.name} = {{}}", settings)
-            for child_node in node.nodes.values():
-                sc = self._add_sc_node(child_node, sc, settings)
-        return sc
-
-    def _add_sc_data(self, export_model: ExportModel, sc: str) -> str:
-        tree: ExportModelTreeNode = self._build_export_tree(export_model)
-        for node in tree.nodes.values():
-            sc = self._add_sc_node(node, sc, export_model.lua_export_settings)
-        return sc
-
-    def _build_script_content(self, export_model: ExportModel) -> str:
-        sc: str = ""
-        sc = self._add_sc_root_fields(export_model, sc)
-        sc = self._add_sc_data(export_model, sc)
-        return sc
+            is_created: bool = not reuse_tables or self._is_list_node(node)
+            if is_created:
+                sc.line(f"{self._data_var}.{node.name} = {{}}")
+            self._add_sc_children(
+                node, f"{self._data_var}.{node.name}", sc, not is_created, shared_locals, list_collectors
+            )
+
+    def _add_sc_shared_locals(self, export_model: ExportModel, sc: CodeEmitter) -> dict[str, str]:
+        """
+        Internal fields that are exported more than once, e.g., in different units, are read into a local once, such
+        that the nested table path is only traversed once. Root fields and list fields already are locals or loops.
+        :return: Key: InternalModelField.dotted_name, value: name of the local
+        """
+        # Key: InternalModelField.dotted_name
+        field_counts: dict[str, int] = {}
+        for export_field in export_model.fields:
+            internal_field: InternalModelField | None = export_field.internal_field
+            if internal_field is None or internal_field.parent is None or export_field.references_list_field:
+                continue
+            field_counts[internal_field.dotted_name] = field_counts.get(internal_field.dotted_name, 0) + 1
+
+        shared_locals: dict[str, str] = {}
+        for dotted_name, count in field_counts.items():
+            if count < 2:
+                continue
+            if len(shared_locals) == self._max_shared_locals:
+                LOGGER.warning(f"More than {self._max_shared_locals} shared fields, the rest is read repeatedly")
+                break
+            shared_local: str = self._shared_local_prefix + dotted_name.replace(".", "_")
+            sc.line(f"local {shared_local} = {dotted_name}")
+            shared_locals[dotted_name] = shared_local
+        return shared_locals
+
+    def _add_sc_data(
+        self, export_model: ExportModel, tree: ExportModelTreeNode, sc: CodeEmitter, list_collectors: dict[str, str]
+    ) -> None:
+        optimize_script: bool = export_model.lua_export_settings.optimize_script
+        shared_locals: dict[str, str] = self._add_sc_shared_locals(export_model, sc) if optimize_script else {}
+        self._add_sc_children(tree, self._data_var, sc, optimize_script, shared_locals, list_collectors)
+
+    def _build_script_content(
+        self, export_model: ExportModel, tree: ExportModelTreeNode, list_collectors: dict[str, str]
+    ) -> str:
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation, base_level=0)
+        sc.line(f"function generate_data({self._data_var})")
+        with sc.indented():
+            self._add_sc_root_fields(export_model, sc)
+            self._add_sc_data(export_model, tree, sc, list_collectors)
+            sc.line(f"return {self._data_var}")
+        sc.line("end")
+        return sc.render()
+
+    def _add_list_collector(
+        self, node: ExportModelTreeNode, sc: CodeEmitter, elements_per_yield: int, list_collectors: dict[str, str]
+    ) -> None:
+        """
+        Adds a function that collects all lists of node into one new list, for collect_list
+        """
+        _, list_nodes = self._group_list_leaves(node)
+        collector: str = self._list_collector_prefix + node.name.replace(".", "_")
+        list_vars: list[str] = [f"list_{index}" for index in range(1, len(list_nodes) + 1)]
+        sc.line(f"local function {collector}({', '.join(list_vars)})")
+        with sc.indented():
+            sc.line("local collected = {}")
+            for index, nodes in enumerate(list_nodes.values()):
+                self._add_sc_list_nodes(
+                    "collected",
+                    nodes,
+                    sc,
+                    reuse_elements=index > 0,
+                    list_value=list_vars[index],
+                    elements_per_yield=elements_per_yield,
+                )
+            sc.line("return collected")
+        sc.line("end")
+        list_values: list[str] = [f"{list_field_name} or {{}}" for list_field_name in list_nodes]
+        list_collectors[node.name] = (
+            f"collect_list({self._lua_string(node.name)}, {collector}, {', '.join(list_values)})"
+        )
+
+    def _add_list_collectors(
+        self, node: ExportModelTreeNode, sc: CodeEmitter, elements_per_yield: int, list_collectors: dict[str, str]
+    ) -> None:
+        for child_node in node.nodes.values():
+            if child_node.has_export_field:
+                continue
+            if self._is_list_node(child_node):
+                self._add_list_collector(child_node, sc, elements_per_yield, list_collectors)
+            self._add_list_collectors(child_node, sc, elements_per_yield, list_collectors)
+
+    def _build_list_collector_content(
+        self, export_model: ExportModel, tree: ExportModelTreeNode
+    ) -> tuple[str | None, dict[str, str]]:
+        """
+        With list_elements_per_frame, the lists of all list nodes except the root are collected over several frames,
+        see collect_list. The other fields of a list node are still read in every call of generate_data.
+        :return: The collector functions (None if there are none), and key: ExportModelTreeNode.name, value: the
+        collect_list call that returns the list
+        """
+        list_collectors: dict[str, str] = {}
+        elements_per_frame: int = export_model.lua_export_settings.list_elements_per_frame
+        if elements_per_frame == 0:
+            return None, list_collectors
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation, base_level=0)
+        self._add_list_collectors(tree, sc, elements_per_frame, list_collectors)
+        if len(list_collectors) == 0:
+            return None, list_collectors
+        return sc.render(), list_collectors
+
+    def _build_model_content(self, export_model: ExportModel, tree: ExportModelTreeNode) -> str:
+        """
+        The functions that depend on the export model: new_data, generate_data, encode_data and encode_fields
+        """
+        list_collector_content, list_collectors = self._build_list_collector_content(export_model, tree)
+        sections: list[str] = [
+            "-- Create the table filled by generate_data\n" + self._build_data_constructor_content(export_model, tree)
+        ]
+        if list_collector_content is not None:
+            sections.append("-- Collect lists over several calls of generate_data\n" + list_collector_content)
+        sections.append("-- Generate data from DCS\n" + self._build_script_content(export_model, tree, list_collectors))
+        sections.append(
+            "-- Encode the table returned by generate_data\n" + self._build_encoder_content(export_model, tree)
+        )
+        sections.append(
+            "-- Encode each field of the table returned by generate_data\n"
+            + self._build_fields_encoder_content(export_model, tree)
+        )
+        return "\n\n".join(sections)
+
+    @staticmethod
+    def _build_config_values(export_model: ExportModel) -> dict[str, str]:
+        lua_settings: LuaExportSettings = export_model.lua_export_settings
+        http_settings: HttpServerSettings = export_model.http_server_settings
+        return {
+            LuaTemplateVar.LOG_PREFIX: f'"{lua_settings.log_prefix}"',
+            LuaTemplateVar.MEMOIZE_FORMATTERS: str(lua_settings.optimize_script).lower(),
+            LuaTemplateVar.SNAPSHOT_SLICE_MS: str(lua_settings.snapshot_slice_ms),
+            LuaTemplateVar.DELTA_HISTORY_SIZE: str(lua_settings.delta_history_size),
+            LuaTemplateVar.SLOW_TIER_INTERVAL_MS: str(lua_settings.slow_tier_interval_ms),
+            LuaTemplateVar.STATIC_TIER_INTERVAL_MS: str(lua_settings.static_tier_interval_ms),
+            LuaTemplateVar.PROFILING_ENABLED: str(lua_settings.profiling).lower(),
+            LuaTemplateVar.PROFILING_WINDOW_SIZE: str(lua_settings.profiling_window_size),
+            LuaTemplateVar.PROFILING_LOG_INTERVAL_MS: str(lua_settings.profiling_log_interval_ms),
+            LuaTemplateVar.SOCKET_TIMEOUT: str(http_settings.socket_timeout),
+            LuaTemplateVar.BIND_ADDRESS: f'"{http_settings.bind_address}"',
+            LuaTemplateVar.BIND_PORT: str(http_settings.bind_port),
+            LuaTemplateVar.MAX_CONNECTIONS: str(http_settings.max_connections),
+            LuaTemplateVar.KEEP_ALIVE: str(http_settings.keep_alive).lower(),
+            LuaTemplateVar.KEEP_ALIVE_TIMEOUT: str(http_settings.keep_alive_timeout),
+            LuaTemplateVar.KEEP_ALIVE_MAX_REQUESTS: str(http_settings.keep_alive_max_requests),
+            LuaTemplateVar.MAX_ACCEPTS_PER_FRAME: str(http_settings.max_accepts_per_frame),
+            LuaTemplateVar.MAX_FRAME_TIME_MS: str(http_settings.max_frame_time_ms),
+            LuaTemplateVar.EVENT_STREAM_ENABLED: str(http_settings.transport == DataTransport.SSE).lower(),
+            LuaTemplateVar.PUSH_INTERVAL_MS: str(export_model.ui_export_settings.fetch_data_interval_ms),
+            LuaTemplateVar.WEBSOCKET_ENABLED: str(http_settings.transport == DataTransport.WEBSOCKET).lower(),
+        }
+
+    def _build_config_content(self, export_model: ExportModel, config_values: dict[str, str]) -> str:
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation, base_level=0)
+        with sc.indented():
+            for config_var in self._config_vars:
+                sc.line(f"{config_var} = {config_values[config_var]},")
+        return sc.render()
+
+    def _build_runtime_import_assignments(self, export_model: ExportModel) -> str:
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation)
+        for runtime_import in self._runtime_imports:
+            sc.line(f"{runtime_import} = rt.{runtime_import}")
+        return sc.render()
+
+    def _add_constructor_node(self, node: ExportModelTreeNode, sc: CodeEmitter) -> None:
+        for child_node in node.nodes.values():
+            if child_node.has_export_field:  # the key is reserved, the value is set by generate_data
+                sc.line(f"{child_node.local_name} = false,")
+            elif self._is_list_node(child_node):
+                sc.line(f"{child_node.local_name} = {{}},")
+            else:
+                sc.line(f"{child_node.local_name} = {{")
+                with sc.indented():
+                    self._add_constructor_node(child_node, sc)
+                sc.line("},")
+
+    def _build_data_constructor_content(self, export_model: ExportModel, tree: ExportModelTreeNode) -> str:
+        """
+        With optimize_script, all tables (except lists) are created by a single nested constructor, such that
+        generate_data only assigns the values
+        """
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation, base_level=0)
+        sc.line("function new_data()")
+        with sc.indented():
+            if export_model.lua_export_settings.optimize_script and len(tree.nodes) > 0:
+                sc.line("return {")
+                with sc.indented():
+                    self._add_constructor_node(tree, sc)
+                sc.line("}")
+            else:
+                sc.line("return {}")
+        sc.line("end")
+        return sc.render()
+
+    def _build_lo_function_content(self, export_model: ExportModel) -> str:
+        """
+        With optimize_script, the LoGet* functions are bound to locals in LuaExportStart, such that generate_data
+        does not look them up in the global table
+        """
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation, base_level=0)
+        lo_functions: list[str] = []
+        if export_model.lua_export_settings.optimize_script:
+            lo_functions = list(dict.fromkeys(f.lo_function for f in export_model.internal_root_fields.values()))
+        if len(lo_functions) > 0:
+            sc.line(f"local {', '.join(lo_functions)}")
+        sc.line("local function bind_lo_functions()")
+        with sc.indented():
+            for lo_function in lo_functions:
+                sc.line(f"{lo_function} = _G.{lo_function}")
+        sc.line("end")
+        return sc.render()
+
+    @staticmethod
+    def _is_list_node(node: ExportModelTreeNode) -> bool:
+        return any(LuaGenerator._is_list_leaf(child_node) for child_node in node.nodes.values())
+
+    @staticmethod
+    def _encode_field_expression(node: ExportModelTreeNode) -> str:
+        value: str = f"{LuaGenerator._data_var}.{node.name}"
+        export_field: ExportModelField = node.export_field
+        if export_field.internal_field is None or export_field.fragment is None:
+            return f"encode_value({value})"
+        if export_field.fragment.has_decimal_digits:
+            return f"encode_number({value}, '%.{export_field.decimal_digits}f')"
+        if UnitFormatters.get_formatter(export_field.fragment.unit) is not None:
+            return f"encode_string({value})"
+        match export_field.internal_field.return_type:
+            case LoReturnType.STRING:
+                return f"encode_string({value})"
+            case LoReturnType.BOOLEAN:
+                return f"encode_boolean({value})"
+        return f"encode_value({value})"
+
+    def _add_encoder_node(self, node: ExportModelTreeNode, parts: list[tuple[bool, str]]) -> None:
+        """
+        Appends the encoded JSON object for node to parts, as (is_literal, literal or Lua expression) pairs
+        """
+        parts.append((True, "{"))
+        for index, child_node in enumerate(node.nodes.values()):
+            parts.append((True, ("," if index > 0 else "") + json.dumps(child_node.local_name) + ":"))
+            if child_node.has_export_field:
+                parts.append((False, self._encode_field_expression(child_node)))
+            elif self._is_list_node(child_node):  # unknown length, left to the generic encoder
+                parts.append((False, f"encode_value({self._data_var}.{child_node.name})"))
+            else:
+                self._add_encoder_node(child_node, parts)
+        parts.append((True, "}"))
+
+    @staticmethod
+    def _merge_literals(parts: list[tuple[bool, str]]) -> list[tuple[bool, str]]:
+        merged_parts: list[tuple[bool, str]] = []
+        for is_literal, part in parts:
+            if is_literal and len(merged_parts) > 0 and merged_parts[-1][0]:
+                merged_parts[-1] = (True, merged_parts[-1][1] + part)
+            else:
+                merged_parts.append((is_literal, part))
+        return merged_parts
+
+    @staticmethod
+    def _lua_string(value: str) -> str:
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+    def _build_encoder_content(self, export_model: ExportModel, tree: ExportModelTreeNode) -> str:
+        """
+        The encoder writes into a buffer whose slots are fixed by the export tree. Slots with key literals are
+        filled once when the script is loaded, such that each call only formats the values and joins the buffer.
+        """
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation, base_level=0)
+        if not export_model.lua_export_settings.specialized_encoder:
+            sc.line("function encode_data(data)")
+            with sc.indented():
+                sc.line("return JSON:encode(data)")
+            sc.line("end")
+            return sc.render()
+
+        parts: list[tuple[bool, str]] = []
+        self._add_encoder_node(tree, parts)
+        parts = self._merge_literals(parts)
+        sc.line("local encode_buffer = {}")
+        for index, (is_literal, part) in enumerate(parts, start=1):
+            if is_literal:
+                sc.line(f"encode_buffer[{index}] = {self._lua_string(part)}")
+        sc.line(f"function encode_data({self._data_var})")
+        with sc.indented():
+            sc.line("local buffer = encode_buffer")
+            for index, (is_literal, part) in enumerate(parts, start=1):
+                if not is_literal:
+                    sc.line(f"buffer[{index}] = {part}")
+            sc.line(f'return table_concat(buffer, "", 1, {len(parts)})')
+        sc.line("end")
+        return sc.render()
+
+    def _add_fields_encoder_node(self, node: ExportModelTreeNode, sc: CodeEmitter, specialized_encoder: bool) -> None:
+        for child_node in node.nodes.values():
+            if child_node.has_export_field and specialized_encoder:
+                sc.line(f"{child_node.local_name} = {self._encode_field_expression(child_node)},")
+            elif child_node.has_export_field or self._is_list_node(child_node):
+                sc.line(f"{child_node.local_name} = encode_value({self._data_var}.{child_node.name}),")
+            else:
+                sc.line(f"{child_node.local_name} = {{")
+                with sc.indented():
+                    self._add_fields_encoder_node(child_node, sc, specialized_encoder)
+                sc.line("},")
+
+    def _build_fields_encoder_content(self, export_model: ExportModel, tree: ExportModelTreeNode) -> str:
+        """
+        encode_fields returns the table of generate_data with each field (and each list as a whole) encoded like by
+        encode_data, such that deltas and selected fields are compared and sent at the output resolution of a field
+        """
+        sc: CodeEmitter = CodeEmitter(export_model.lua_export_settings.script_indentation, base_level=0)
+        sc.line(f"function encode_fields({self._data_var})")
+        with sc.indented():
+            if len(tree.nodes) > 0:
+                sc.line("return {")
+                with sc.indented():
+                    self._add_fields_encoder_node(tree, sc, export_model.lua_export_settings.specialized_encoder)
+                sc.line("}")
+            else:
+                sc.line("return {}")
+        sc.line("end")
+        return sc.render()
 
     @staticmethod
     def _resolve_field(internal_model: InternalModel, export_model_field: ExportModelField) -> InternalModelField:
@@ -168,6 +789,8 @@ class LuaGenerator:
             LOGGER.warning(f"Field {export_model_field.internal_field_name} not found in model")
         else:
             export_model_field.internal_field = internal_field
+            if export_model_field.fragment is None:
+                export_model_field.fragment = FieldFragment.create(internal_field, export_model_field.effective_unit)
         return internal_field
 
     def generate(self, internal_model: InternalModel, export_model: ExportModel) -> LuaGeneratorOutput:
@@ -184,29 +807,44 @@ class LuaGenerator:
         for f in export_model.fields:
             self._resolve_field(internal_model, f)
 
-        quoted_log_prefix: str = f'"{export_model.lua_export_settings.log_prefix}"'
-
-        export_content: str = self._fill(
-            self._export_template,
-            LuaTemplateVar.OUTPUT_SCRIPT_NAME,
-            export_model.lua_export_settings.output_script_name,
+        config_values: dict[str, str] = self._build_config_values(export_model)
+        export_content: str = self._export_template.render(
+            {
+                LuaTemplateVar.OUTPUT_SCRIPT_NAME: export_model.lua_export_settings.output_script_name,
+                LuaTemplateVar.LOG_PREFIX: config_values[LuaTemplateVar.LOG_PREFIX],
+            }
         )
-        export_content = self._fill(export_content, LuaTemplateVar.COPYRIGHT, self._notices_container.license_txt)
-        export_content = self._fill(export_content, LuaTemplateVar.LOG_PREFIX, quoted_log_prefix)
 
-        sc: str = self._fill(self._main_template, LuaTemplateVar.DATA_CONTENT, self._build_script_content(export_model))
+        tree: ExportModelTreeNode = ExportModelTreeNode.build(export_model.fields)
+        lo_function_content: str = self._build_lo_function_content(export_model)
+        model_content: str = self._build_model_content(export_model, tree)
 
-        def _fill_sc(sc_: str, template_var: LuaTemplateVar, value: Any) -> str:
-            return self._fill(sc_, template_var, str(value))
-
-        sc = _fill_sc(sc, LuaTemplateVar.LOG_PREFIX, quoted_log_prefix)
-        http_settings: HttpServerSettings = export_model.http_server_settings
-        sc = _fill_sc(sc, LuaTemplateVar.SOCKET_TIMEOUT, http_settings.socket_timeout)
-        sc = _fill_sc(sc, LuaTemplateVar.BIND_ADDRESS, f'"{http_settings.bind_address}"')
-        sc = _fill_sc(sc, LuaTemplateVar.BIND_PORT, http_settings.bind_port)
-        sc = _fill_sc(sc, LuaTemplateVar.MAX_CONNECTIONS, http_settings.max_connections)
+        if export_model.lua_export_settings.shared_runtime:
+            script_content: str = self._dashboard_template.render(
+                {
+                    LuaTemplateVar.RUNTIME_MODULE_NAME: self._runtime_module_name,
+                    LuaTemplateVar.CONFIG_CONTENT: self._build_config_content(export_model, config_values),
+                    LuaTemplateVar.RUNTIME_IMPORTS: f"local {', '.join(self._runtime_imports)}",
+                    LuaTemplateVar.RUNTIME_IMPORT_ASSIGNMENTS: self._build_runtime_import_assignments(export_model),
+                    LuaTemplateVar.LO_FUNCTION_CONTENT: lo_function_content,
+                    LuaTemplateVar.MODEL_CONTENT: model_content,
+                }
+            )
+            return LuaGeneratorOutput(
+                export_content=export_content,
+                script_content=script_content,
+                runtime_script_name=self.runtime_script_name,
+                runtime_content=self._runtime_content,
+            )
 
+        script_content = self._main_template.render(
+            config_values
+            | {
+                LuaTemplateVar.LO_FUNCTION_CONTENT: lo_function_content,
+                LuaTemplateVar.MODEL_CONTENT: model_content,
+            }
+        )
         return LuaGeneratorOutput(
             export_content=export_content,
-            script_content=sc,
+            script_content=script_content,
         )
@@ -6,7 +6,8 @@ from typing import Final
 from dcs_pylot_dash.api.api_model import APISourceModel, APIUnit, APISourceField
 from dcs_pylot_dash.service.dcs_model_external import ExternalModel
 from dcs_pylot_dash.service.dcs_model_internal import InternalModel, InternalModelField
-from dcs_pylot_dash.service.units import Unit, UnitConverter, UnitDisplayNames, UnitLabels
+from dcs_pylot_dash.service.field_fragments import FieldFragmentTable, FieldFragment
+from dcs_pylot_dash.service.units import Unit, UnitDisplayNames, UnitLabels
 from dcs_pylot_dash.utils.resource_provider import ResourceProvider
 
 
@@ -17,6 +18,7 @@ class SourceModelService:
     _resource_provider: ResourceProvider
     _external_model: ExternalModel
     _internal_model: InternalModel
+    _field_fragments: FieldFragmentTable
     _api_source_model: APISourceModel
 
     def __init__(self, resource_provider: ResourceProvider):
@@ -30,10 +32,11 @@ class SourceModelService:
         internal_model: InternalModel = InternalModel(external_model)
         internal_model.populate()
         self._internal_model = internal_model
-        self._api_source_model = self._build_api_source_model(internal_model)
+        self._field_fragments = FieldFragmentTable(internal_model)
+        self._api_source_model = self._build_api_source_model(internal_model, self._field_fragments)
 
     @staticmethod
-    def _build_api_source_model(internal_model: InternalModel) -> APISourceModel:
+    def _build_api_source_model(internal_model: InternalModel, field_fragments: FieldFragmentTable) -> APISourceModel:
         api_units: list[APIUnit] = []
         api_fields: list[APISourceField] = []
 
@@ -44,13 +47,13 @@ class SourceModelService:
             api_units.append(api_unit)
 
         for field in internal_model.leaf_fields:
-            available_unit_ids: list[Unit] = list(UnitConverter.get_convertable_units(field.unit))
-            available_unit_ids.sort()
+            available_unit_ids: list[Unit] = sorted(field_fragments.get_allowed_units(field.dotted_name))
             api_field: APISourceField = APISourceField(
                 display_name=field.effective_display_name,
                 field_id=field.dotted_name,
                 default_unit_id=field.preferred_unit if field.preferred_unit is not None else field.unit,
                 available_unit_ids=available_unit_ids,
+                default_update_tier=field.effective_default_update_tier,
             )
             api_fields.append(api_field)
 
@@ -68,13 +71,15 @@ class SourceModelService:
         return self._internal_model.get_field(field_id)
 
     def get_unit_for_field(self, field_id: str, unit_id: str) -> Unit | None:
-        field: InternalModelField | None = self.get_field(field_id)
-        if field is None:
+        available_units_for_field: frozenset[Unit] | None = self._field_fragments.get_allowed_units(field_id)
+        if available_units_for_field is None:
             return None
         if unit_id not in Unit:
             return None
         desired_unit: Unit = Unit(unit_id)
-        available_units_for_field: list[Unit] = list(UnitConverter.get_convertable_units(field.unit))
         if desired_unit not in available_units_for_field:
             return None
         return desired_unit
+
+    def get_fragment(self, field_id: str, unit: Unit) -> FieldFragment | None:
+        return self._field_fragments.get(field_id, unit)
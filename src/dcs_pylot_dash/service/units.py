@@ -120,6 +120,10 @@ class UnitFormatters:
     def get_formatter(cls, unit: Unit) -> str | None:
         return cls._formatters.get(unit)
 
+    @classmethod
+    def get_formatters(cls) -> list[str]:
+        return list(cls._formatters.values())
+
     @classmethod
     def get_convertable_units(cls, src: Unit) -> set[Unit]:
         """
@@ -0,0 +1,50 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+from contextlib import contextmanager
+from typing import Iterator, Self
+
+
+class CodeEmitter:
+    """
+    Line buffer for generated code. Lines are collected together with their indentation level and joined once in
+    render, so that the cost is linear in the size of the output.
+
+    The first line is rendered relative to base_level, because it replaces a template placeholder that is already
+    indented by the template itself.
+    """
+
+    _indentation: int
+    _base_level: int
+    _level: int
+    _lines: list[tuple[int, str]]
+
+    def __init__(self, indentation: int, *, base_level: int = 1) -> None:
+        self._indentation = indentation
+        self._base_level = base_level
+        self._level = base_level
+        self._lines = []
+
+    def line(self, line: str) -> Self:
+        self._lines.append((self._level, line))
+        return self
+
+    @contextmanager
+    def indented(self) -> Iterator[Self]:
+        self._level += 1
+        try:
+            yield self
+        finally:
+            self._level -= 1
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self._lines) == 0
+
+    def render(self) -> str:
+        if self.is_empty:
+            return ""
+        first_level, first_line = self._lines[0]
+        rendered_lines: list[str] = [" " * (self._indentation * (first_level - self._base_level)) + first_line]
+        rendered_lines.extend(" " * (self._indentation * level) + line for level, line in self._lines[1:])
+        return "\n".join(rendered_lines)
@@ -0,0 +1,75 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import re
+from re import Pattern, Match
+from typing import ClassVar, Iterable, Mapping, Self
+
+
+class CompiledTemplate:
+    """
+    A template that is parsed once into literal chunks and variable slots, and rendered with a single join.
+
+    Placeholders have the form %var% (with a configurable delimiter). Variables in comment_variables are only
+    matched in the form //%var%, which keeps the template valid JS.
+    """
+
+    COMMENT_PREFIX: ClassVar[str] = "//"
+
+    # literal chunks; slots hold an empty string until rendered
+    _segments: list[str]
+    # index into _segments, variable name
+    _slots: list[tuple[int, str]]
+
+    def __init__(
+        self,
+        template: str,
+        variables: Iterable[str],
+        *,
+        comment_variables: Iterable[str] = (),
+        delimiter: str = "%",
+    ) -> None:
+        placeholders: dict[str, str] = {f"{delimiter}{v}{delimiter}": v for v in variables}
+        placeholders |= {f"{self.COMMENT_PREFIX}{delimiter}{v}{delimiter}": v for v in comment_variables}
+        self._segments = []
+        self._slots = []
+        if len(placeholders) == 0:
+            self._segments.append(template)
+            return
+
+        # longest first, such that a variable name that is a prefix of another one does not shadow it
+        pattern: Pattern = re.compile("|".join(re.escape(p) for p in sorted(placeholders, key=len, reverse=True)))
+        position: int = 0
+        match: Match
+        for match in pattern.finditer(template):
+            self._segments.append(template[position : match.start()])
+            self._slots.append((len(self._segments), placeholders[match.group()]))
+            self._segments.append("")
+            position = match.end()
+        self._segments.append(template[position:])
+
+    def partial(self, values: Mapping[str, str]) -> Self:
+        """
+        :param values: Values for a subset of the variables, e.g., those that are the same for every render call
+        :return: A copy of this template with the given variables filled in
+        """
+        template: Self = object.__new__(type(self))
+        template._segments = self._segments.copy()
+        template._slots = []
+        for index, variable in self._slots:
+            if variable in values:
+                template._segments[index] = values[variable]
+            else:
+                template._slots.append((index, variable))
+        return template
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """
+        :param values: Values for all remaining variables
+        :return: The rendered template
+        :raises KeyError: If a value for a variable is missing
+        """
+        segments: list[str] = self._segments.copy()
+        for index, variable in self._slots:
+            segments[index] = values[variable]
+        return "".join(segments)
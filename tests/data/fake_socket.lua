@@ -0,0 +1,138 @@
+-- Stand-in for LuaSocket that never blocks. Tests connect clients with fake.connect, feed their input and inspect
+-- everything the server sent to them.
+local fake = {now = 0, pending = {}}
+
+local Client = {}
+Client.__index = Client
+
+function Client:settimeout() end
+
+function Client:close()
+    self.closed = true
+end
+
+-- Returns the remaining input as partial result, like a socket with a timeout of 0 that has no more data
+function Client:receive_partial(prefix)
+    local partial = prefix .. self.input
+    self.input = ""
+    return nil, self.closed_remote and "closed" or "timeout", partial
+end
+
+function Client:receive(pattern, prefix)
+    prefix = prefix or ""
+    -- simulates the time a slow receive takes, see serve_clients
+    fake.now = fake.now + self.receive_cost
+    if pattern == "*l" then
+        local index = string.find(self.input, "\n", 1, true)
+        if index == nil then
+            return self:receive_partial(prefix)
+        end
+        local line = string.gsub(string.sub(self.input, 1, index - 1), "\r$", "")
+        self.input = string.sub(self.input, index + 1)
+        return prefix .. line
+    elseif pattern == "*a" or string.len(self.input) < pattern then
+        return self:receive_partial(prefix)
+    end
+    local data = string.sub(self.input, 1, pattern)
+    self.input = string.sub(self.input, pattern + 1)
+    return prefix .. data
+end
+
+-- Sends at most send_limit bytes per call
+function Client:send(data, i)
+    i = i or 1
+    if self.send_error then
+        return nil, self.send_error, i - 1
+    end
+    local last = math.min(string.len(data), i - 1 + self.send_limit)
+    self.sent = self.sent .. string.sub(data, i, last)
+    self.send_calls = self.send_calls + 1
+    if last < string.len(data) then
+        return nil, "timeout", last
+    end
+    return last
+end
+
+local Server = {is_server = true}
+Server.__index = Server
+
+function Server:setoption() end
+function Server:listen() end
+function Server:settimeout() end
+function Server:close() end
+
+function Server:bind(address, port)
+    self.port = port
+end
+
+-- Returns the index of the first pending client that connects to the port of server, if any
+local function find_pending(server)
+    for index, client in ipairs(fake.pending) do
+        if client.port == nil or client.port == server.port then
+            return index
+        end
+    end
+    return nil
+end
+
+function Server:accept()
+    local index = find_pending(self)
+    return index and table.remove(fake.pending, index)
+end
+
+local function add_selected(result, socket)
+    result[#result + 1] = socket
+    result[socket] = true
+end
+
+local socket = {}
+
+function socket.tcp()
+    return setmetatable({}, Server)
+end
+
+function socket.gettime()
+    return fake.now
+end
+
+function socket.select(read_sockets, write_sockets)
+    local readable, writable = {}, {}
+    for _, s in ipairs(read_sockets) do
+        if s.is_server then
+            if find_pending(s) then
+                add_selected(readable, s)
+            end
+        elseif s.input ~= "" or s.closed_remote then
+            add_selected(readable, s)
+        end
+    end
+    for _, s in ipairs(write_sockets or {}) do
+        if not s.blocked then
+            add_selected(writable, s)
+        end
+    end
+    return readable, writable
+end
+
+-- port: Optional, a client without port connects to any server
+function fake.connect(input, port)
+    local client = setmetatable({
+        port = port,
+        input = input or "",
+        sent = "",
+        send_calls = 0,
+        send_limit = math.huge,
+        send_error = nil,
+        receive_cost = 0,
+        closed = false,
+        -- the connection has been closed by the client
+        closed_remote = false,
+        -- the send buffer is full, such that select does not report the client as writable
+        blocked = false,
+    }, Client)
+    fake.pending[#fake.pending + 1] = client
+    return client
+end
+
+fake.socket = socket
+return fake
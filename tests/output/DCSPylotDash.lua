@@ -8,23 +8,44 @@ previousFunctionDefinitions.LuaExportStart = LuaExportStart
 previousFunctionDefinitions.LuaExportAfterNextFrame = LuaExportAfterNextFrame
 previousFunctionDefinitions.LuaExportStop = LuaExportStop
 
+-- Standard library functions used every frame, localized to avoid the global and table lookups
+local math_floor, math_ceil, math_abs, math_huge = math.floor, math.ceil, math.abs, math.huge
+local string_format, string_len, string_sub = string.format, string.len, string.sub
+local string_find, string_gsub, string_byte = string.find, string.gsub, string.byte
+local table_concat = table.concat
+
 -- internal functions
 
 local function to_deg_min_sec(deg_dec)
-   local deg = deg_dec > 0 and math.floor(deg_dec) or math.ceil(deg_dec)
-   local min_dec = math.abs(deg_dec - deg) * 60
-   local min = math.floor(min_dec)
+   local deg = deg_dec > 0 and math_floor(deg_dec) or math_ceil(deg_dec)
+   local min_dec = math_abs(deg_dec - deg) * 60
+   local min = math_floor(min_dec)
    local sec_dec = (min_dec - min) * 60
    return deg, min_dec, min, sec_dec
 end
 
+-- The minutes and seconds are rounded to the displayed precision before formatting, such that e.g. 59.6 seconds carry
+-- into the minutes and are shown as 00", instead of 60" in the same minute
+
 local function to_dcml_str(nesw, deg, min_dec)
-    return nesw .. " " .. string.format("%02d", math.abs(deg)) .. "°" .. string.format("%06.3f'", min_dec)
+    local deg_abs, min_rounded = math_abs(deg), math_floor(min_dec * 1000 + 0.5) / 1000
+    if min_rounded >= 60 then
+        deg_abs, min_rounded = deg_abs + 1, min_rounded - 60
+    end
+    return nesw .. " " .. string_format("%02d", deg_abs) .. "°" .. string_format("%06.3f'", min_rounded)
 end
 
 local function to_sec_str(nesw, deg, min, sec_dec, precise)
-    local sec_str = precise and string.format("%05.2f\"", sec_dec) or string.format("%02d", math.floor(sec_dec + 0.5)) .. "\""
-    return nesw .. " " .. string.format("%02d", math.abs(deg)) .. "°" .. string.format("%02d",min) .. "'" .. sec_str
+    local resolution = precise and 100 or 1
+    local deg_abs, sec_rounded = math_abs(deg), math_floor(sec_dec * resolution + 0.5) / resolution
+    if sec_rounded >= 60 then
+        min, sec_rounded = min + 1, sec_rounded - 60
+        if min >= 60 then
+            deg_abs, min = deg_abs + 1, min - 60
+        end
+    end
+    local sec_str = precise and string_format("%05.2f\"", sec_rounded) or string_format("%02d", sec_rounded) .. "\""
+    return nesw .. " " .. string_format("%02d", deg_abs) .. "°" .. string_format("%02d",min) .. "'" .. sec_str
 end
 
 local function is_number(n)
@@ -77,6 +98,40 @@ local to_lon_sec_precise_str = function(lon_dec)
     return to_lon_sec_str(lon_dec, true)
 end
 
+-- memoized single value functions, which are called by generate_data every frame
+
+local memoize_formatters = true
+
+-- Returns a formatter that reuses its last output while the input stays within one resolution step. The steps are
+-- centered on the rounding of the formatted output, so the same step yields the same string (up to floating point
+-- rounding within a tiny fraction of the resolution at the step boundaries)
+local function memoize_formatter(formatter, resolution)
+    if not memoize_formatters then
+        return formatter
+    end
+    local last_step, last_value
+    return function(value)
+        if not is_number(value) then
+            return formatter(value)
+        end
+        local step = math_floor(value / resolution + 0.5)
+        if step ~= last_step then
+            last_step = step
+            last_value = formatter(value)
+        end
+        return last_value
+    end
+end
+
+-- New locals shadow the plain formatters, which keeps the precise variants above bound to the plain ones
+local degrees_per_minute, degrees_per_second = 1 / 60, 1 / 3600
+local to_lat_dcml_str = memoize_formatter(to_lat_dcml_str, 0.001 * degrees_per_minute)
+local to_lon_dcml_str = memoize_formatter(to_lon_dcml_str, 0.001 * degrees_per_minute)
+local to_lat_sec_str = memoize_formatter(to_lat_sec_str, degrees_per_second)
+local to_lon_sec_str = memoize_formatter(to_lon_sec_str, degrees_per_second)
+local to_lat_sec_precise_str = memoize_formatter(to_lat_sec_precise_str, 0.01 * degrees_per_second)
+local to_lon_sec_precise_str = memoize_formatter(to_lon_sec_precise_str, 0.01 * degrees_per_second)
+
 -- public functions for pair values
 
 local function to_lat_lon_dcml_str(lat_dec, lon_dec)
@@ -113,7 +168,124 @@ local JSON = require("json")
 -- HTTP Server Configuration
 local server_host = "127.0.0.1"
 local server_port = 52025
+local max_connections = 5
+local keep_alive = true
+local keep_alive_timeout = 5
+local keep_alive_max_requests = 1000
+local max_accepts_per_frame = 4
+local max_frame_time = 2 / 1000
+-- Push mode: Clients requesting the event stream path receive a snapshot event every push_interval
+local event_stream_enabled = false
+local event_stream_path = "/events"
+local push_interval = 200 / 1000
+-- WebSocket mode: Clients upgrading on the WebSocket path receive a snapshot frame every push_interval (or the interval
+-- requested by a control message), see handle_websocket_message
+local websocket_enabled = false
+local websocket_path = "/ws"
+local min_push_interval = 100 / 1000
+-- Maximum size of a message received from a WebSocket client
+local websocket_max_message_size = 4096
 local server = nil
+-- Only contains the server, used for selecting pending connections
+local server_set = {}
+-- Open client connections, see accept_clients
+local clients = {}
+
+local keep_alive_headers = "Connection: keep-alive\r\n" ..
+                    "Keep-Alive: timeout=" .. keep_alive_timeout .. ", max=" .. keep_alive_max_requests .. "\r\n"
+local close_headers = "Connection: close\r\n"
+local event_stream_headers = "HTTP/1.1 200 OK\r\n" ..
+                    "Content-Type: text/event-stream\r\n" ..
+                    "Cache-Control: no-cache\r\n" ..
+                    "Access-Control-Allow-Origin: *\r\n" ..
+                    "Connection: keep-alive\r\n\r\n" ..
+                    -- reconnection delay of the EventSource in ms
+                    "retry: 1000\n\n"
+
+local websocket_guid = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+local base64_chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+local bad_request_response = "HTTP/1.1 400 Bad Request\r\n" ..
+                    "Content-Length: 0\r\n" ..
+                    close_headers .. "\r\n"
+
+-- Snapshot cache: All requests within one slice are served the same encoded data, which is generated at most once per
+-- frame. Metadata is prepended under the key _meta, which is not part of the exported data.
+local snapshot_slice = 100 / 1000
+local snapshot_meta_prefix = '{"_meta":{"snapshot_slice_ms":' .. 100 .. ',"snapshot_age_ms":'
+-- {time = frame_time at generation, seq = sequence number, data = data table, fields = encoded fields (see
+-- get_snapshot_fields), rest = encoded data without the opening brace, deltas = key: base sequence number, value:
+-- encoded delta or false}
+local snapshot = nil
+-- Sequence number of the last snapshot. Starts at the time of LuaExportStart in ms, such that sequence numbers from
+-- earlier sessions are never found in the history
+local snapshot_seq = 0
+-- Delta encoding: Requests with ?since=<seq> only receive the entries that changed since the snapshot seq, as long as
+-- it is one of the last delta_history_size snapshots. Fields are compared by their encoded values, such that changes
+-- below the output resolution of a field are not sent. Key: sequence number, value: encoded fields
+local delta_history_size = 16
+local snapshot_history = {}
+-- Set once per frame in LuaExportAfterNextFrame
+local frame_time = 0
+-- Table from new_data, which generate_data refills for each snapshot
+local snapshot_data = nil
+
+-- Profiling: Rolling window of the last profiling_window_size os.clock timings (in seconds) per key, served on the
+-- stats path and logged every profiling_log_interval. 0: no periodic logging
+local profiling_enabled = false
+local profiling_window_size = 256
+local profiling_log_interval = 10000 / 1000
+local stats_path = "/stats"
+-- Key: timing key, value: {samples = ring buffer of timings, next_index = index of the next sample}
+local timings = {}
+local last_profiling_log = 0
+
+local function record_timing(key, started)
+    local elapsed = os.clock() - started
+    local timing = timings[key]
+    if timing == nil then
+        timing = {samples = {}, next_index = 1}
+        timings[key] = timing
+    end
+    timing.samples[timing.next_index] = elapsed
+    timing.next_index = timing.next_index % profiling_window_size + 1
+end
+
+-- Key: timing key, value: statistics of the window in ms
+local function get_timing_stats()
+    local stats = {}
+    for key, timing in pairs(timings) do
+        local sorted = {}
+        local sum = 0
+        for i, sample in ipairs(timing.samples) do
+            sorted[i] = sample
+            sum = sum + sample
+        end
+        table.sort(sorted)
+        local count = #sorted
+        stats[key] = {
+            count = count,
+            min_ms = sorted[1] * 1000,
+            mean_ms = sum / count * 1000,
+            max_ms = sorted[count] * 1000,
+            p99_ms = sorted[math.max(1, math_ceil(count * 0.99))] * 1000
+        }
+    end
+    return stats
+end
+
+local function log_timing_stats()
+    local stats = get_timing_stats()
+    local keys = {}
+    for key in pairs(stats) do
+        keys[#keys + 1] = key
+    end
+    table.sort(keys)
+    for _, key in ipairs(keys) do
+        local s = stats[key]
+        log.write("DCSPylotDash", log.INFO, string_format("%s: count=%d min=%.3fms mean=%.3fms max=%.3fms p99=%.3fms",
+            key, s.count, s.min_ms, s.mean_ms, s.max_ms, s.p99_ms))
+    end
+end
 
 -- Helper function to safely get data
 local function safe_get(func, default)
@@ -125,16 +297,89 @@ local function safe_get(func, default)
     end
 end
 
+-- Update tiers: The LoGet* functions of root fields in a slower tier are only called once per interval (in seconds),
+-- generate_data reuses their cached results in between
+local tier_intervals = {slow = 1000 / 1000, static = 10000 / 1000}
+-- Key: tier, value: frame_time of the last call
+local tier_times = {}
+-- Key: root field name, value: cached result
+local tier_values = {}
+
+-- Whether the functions of the tier are due in this frame. If so, they are considered called
+local function is_tier_due(tier)
+    local last_time = tier_times[tier]
+    if last_time == nil or frame_time - last_time >= tier_intervals[tier] then
+        tier_times[tier] = frame_time
+        return true
+    end
+    return false
+end
+
+-- Time-sliced list export: collect_list starts a pass that runs collect in a coroutine, which yields after a number of
+-- list elements. advance_list_passes resumes each running pass once per frame, such that a long list is collected over
+-- several frames, however often generate_data is called. Until a pass is complete, the list of the last complete pass
+-- is returned (initially empty), so each returned list is a consistent snapshot of the source lists at the start of a
+-- pass, which lags behind by the duration of a pass.
+-- Key: name of the list, value: {pass = coroutine of the running pass, published = list of the last complete pass}
+local list_passes = {}
+
+local function collect_list(name, collect, ...)
+    local list_pass = list_passes[name]
+    if list_pass == nil then
+        list_pass = {published = {}}
+        list_passes[name] = list_pass
+    end
+    if list_pass.pass == nil then
+        local sources, source_count = {...}, select("#", ...)
+        list_pass.pass = coroutine.create(function()
+            return collect(unpack(sources, 1, source_count))
+        end)
+    end
+    return list_pass.published
+end
+
+-- Called once per frame, publishes the lists of completed passes
+local function advance_list_passes()
+    for name, list_pass in pairs(list_passes) do
+        if list_pass.pass ~= nil then
+            local success, result = coroutine.resume(list_pass.pass)
+            if not success then
+                log.write("DCSPylotDash", log.ERROR, "Failed to collect " .. name .. ": " .. tostring(result))
+                list_pass.pass = nil
+            elseif coroutine.status(list_pass.pass) == "dead" then
+                list_pass.published = result
+                list_pass.pass = nil
+            end
+        end
+    end
+end
+
+-- LoGet* functions called by generate_data
+local LoGetIndicatedAirSpeed, LoGetMachNumber, LoGetTrueAirSpeed, LoGetMagneticYaw, LoGetAltitudeAboveSeaLevel, LoGetAltitudeAboveGroundLevel, LoGetEngineInfo, LoGetPayloadInfo
+local function bind_lo_functions()
+    LoGetIndicatedAirSpeed = _G.LoGetIndicatedAirSpeed
+    LoGetMachNumber = _G.LoGetMachNumber
+    LoGetTrueAirSpeed = _G.LoGetTrueAirSpeed
+    LoGetMagneticYaw = _G.LoGetMagneticYaw
+    LoGetAltitudeAboveSeaLevel = _G.LoGetAltitudeAboveSeaLevel
+    LoGetAltitudeAboveGroundLevel = _G.LoGetAltitudeAboveGroundLevel
+    LoGetEngineInfo = _G.LoGetEngineInfo
+    LoGetPayloadInfo = _G.LoGetPayloadInfo
+end
+
 -- Initialize HTTP Server
 function LuaExportStart()
     local success, err = pcall(function()
+        bind_lo_functions()
         -- Create TCP server socket
         server = socket.tcp()
         if server then
             server:setoption("reuseaddr", true)
             server:bind(server_host, server_port)
-            server:listen(5)
+            server:listen(max_connections)
             server:settimeout(0) -- Non-blocking
+            server_set = {server}
+            snapshot_seq = math_floor(socket.gettime() * 1000)
             log.write("DCSPylotDash", log.INFO, "HTTP Server started on " .. server_host .. ":" .. server_port)
         else
             log.write("DCSPylotDash", log.ERROR, "Failed to create server socket")
@@ -146,33 +391,729 @@ function LuaExportStart()
     end
 end
 
--- Handle HTTP requests
-local function handle_http_request(client_socket)
-    local request, err = client_socket:receive()
-    if not request then
-        client_socket:close()
+-- Value encoders for encode_data, which fall back to the generic encoder for unexpected types
+local json_escapes = {['"'] = '\\"', ['\\'] = '\\\\', ['\n'] = '\\n', ['\r'] = '\\r', ['\t'] = '\\t'}
+
+local function encode_value(value)
+    if value == nil then
+        return "null"
+    end
+    return JSON:encode(value)
+end
+
+local function encode_number(value, number_format)
+    if type(value) ~= "number" then
+        return encode_value(value)
+    end
+    if value ~= value or value == math_huge or value == -math_huge then
+        return "null"
+    end
+    return string_format(number_format, value)
+end
+
+local function encode_string(value)
+    if type(value) ~= "string" then
+        return encode_value(value)
+    end
+    if not string_find(value, '[%c"\\]') then
+        return '"' .. value .. '"'
+    end
+    local escaped = string_gsub(value, '[%c"\\]', function(c)
+        return json_escapes[c] or string_format("\\u%04x", string_byte(c))
+    end)
+    return '"' .. escaped .. '"'
+end
+
+local function encode_boolean(value)
+    if type(value) ~= "boolean" then
+        return encode_value(value)
+    end
+    return value and "true" or "false"
+end
+
+-- Encoded JSON object without the opening brace, to be appended to the _meta entry
+local function to_rest(encoded)
+    if string_len(encoded) > 2 then
+        return "," .. string_sub(encoded, 2)
+    end
+    return "}"
+end
+
+-- Joins encoded fields (see encode_fields) into a JSON object
+local function join_fields(fields)
+    local parts = {}
+    for key, value in pairs(fields) do
+        parts[#parts + 1] = encode_string(key) .. ":" .. (type(value) == "table" and join_fields(value) or value)
+    end
+    return "{" .. table_concat(parts, ",") .. "}"
+end
+
+-- Copies the values at the given paths (dotted names split into chunks) from data into a new table
+local function select_fields(data, selected_paths)
+    local selected = {}
+    for _, path in ipairs(selected_paths) do
+        local source = data
+        local target = selected
+        for i, chunk in ipairs(path) do
+            if type(source) ~= "table" or source[chunk] == nil then
+                break
+            end
+            if i == #path then
+                target[chunk] = source[chunk]
+            else
+                target[chunk] = target[chunk] or {}
+                source = source[chunk]
+                target = target[chunk]
+            end
+        end
+    end
+    return selected
+end
+
+-- Returns the encoded fields that differ from base, where lists are compared and sent as a whole. Both are returned
+-- by encode_fields, so they have the same keys
+local function diff_fields(base, fields)
+    local delta = {}
+    for key, value in pairs(fields) do
+        if type(value) == "table" then
+            local child_delta = diff_fields(base[key], value)
+            if next(child_delta) ~= nil then
+                delta[key] = child_delta
+            end
+        elseif value ~= base[key] then
+            delta[key] = value
+        end
+    end
+    return delta
+end
+
+-- The data of the snapshot with each field encoded like in encode_data, created on first use
+local function get_snapshot_fields()
+    if snapshot.fields == nil then
+        snapshot.fields = encode_fields(snapshot.data)
+    end
+    return snapshot.fields
+end
+
+local function refresh_snapshot()
+    if snapshot == nil or (frame_time ~= snapshot.time and frame_time - snapshot.time >= snapshot_slice) then
+        local started = profiling_enabled and os.clock()
+        if snapshot_data == nil then
+            snapshot_data = new_data()
+        end
+        local data = generate_data(snapshot_data)
+        if profiling_enabled then
+            record_timing("generate_data", started)
+            started = os.clock()
+        end
+        snapshot_seq = snapshot_seq + 1
+        snapshot = {time = frame_time, seq = snapshot_seq, data = data, rest = to_rest(encode_data(data)), deltas = {}}
+        if delta_history_size > 0 then
+            snapshot_history[snapshot_seq] = get_snapshot_fields()
+            snapshot_history[snapshot_seq - delta_history_size] = nil
+        end
+        if profiling_enabled then
+            record_timing("encode", started)
+        end
+    end
+end
+
+-- Returns the encoded delta since the given sequence number, or false if there is none
+local function get_delta_rest(since)
+    local delta_rest = snapshot.deltas[since]
+    if delta_rest == nil then
+        delta_rest = false
+        local base = snapshot_history[since]
+        if base then
+            delta_rest = to_rest(join_fields(diff_fields(base, get_snapshot_fields())))
+        end
+        snapshot.deltas[since] = delta_rest
+    end
+    return delta_rest
+end
+
+-- selected_paths: Optional, see select_fields
+-- since: Optional sequence number of the snapshot the client already has, see get_delta_rest
+-- Returns the body and the sequence number of the snapshot
+local function get_snapshot_body(selected_paths, since)
+    refresh_snapshot()
+    local rest = snapshot.rest
+    local delta_meta = ',"delta":false}'
+    if selected_paths then
+        rest = to_rest(join_fields(select_fields(get_snapshot_fields(), selected_paths)))
+    elseif since and delta_history_size > 0 then
+        local delta_rest = get_delta_rest(since)
+        if delta_rest then
+            rest = delta_rest
+            delta_meta = ',"delta":true,"base_seq":' .. since .. '}'
+        end
+    end
+    local age_ms = math_floor((frame_time - snapshot.time) * 1000 + 0.5)
+    return snapshot_meta_prefix .. age_ms .. ',"seq":' .. snapshot.seq .. delta_meta .. rest, snapshot.seq
+end
+
+-- Snapshot for a stream client: A delta since the last snapshot sent to it, unless it selected fields
+local function get_stream_body(client)
+    local since = nil
+    if not client.selected_paths then
+        since = client.last_seq
+    end
+    local body, seq = get_snapshot_body(client.selected_paths, since)
+    client.last_seq = seq
+    return body
+end
+
+-- Bitwise operations on unsigned 32 bit integers, since Lua 5.1 has no bit library. Only used for the WebSocket
+-- handshake and for unmasking the small messages received from WebSocket clients.
+local and4, or4, xor4 = {}, {}, {}
+for a = 0, 15 do
+    and4[a], or4[a], xor4[a] = {}, {}, {}
+    for b = 0, 15 do
+        local and_result, or_result, xor_result, bit_value, x, y = 0, 0, 0, 1, a, b
+        for _ = 1, 4 do
+            local bit_x, bit_y = x % 2, y % 2
+            and_result = and_result + bit_x * bit_y * bit_value
+            or_result = or_result + math.max(bit_x, bit_y) * bit_value
+            xor_result = xor_result + ((bit_x + bit_y) % 2) * bit_value
+            x, y, bit_value = math_floor(x / 2), math_floor(y / 2), bit_value * 2
+        end
+        and4[a][b], or4[a][b], xor4[a][b] = and_result, or_result, xor_result
+    end
+end
+
+local function bit_op(a, b, table4, nibbles)
+    local result, shift = 0, 1
+    for _ = 1, nibbles do
+        result = result + table4[a % 16][b % 16] * shift
+        a, b, shift = math_floor(a / 16), math_floor(b / 16), shift * 16
+    end
+    return result
+end
+
+local function band(a, b) return bit_op(a, b, and4, 8) end
+local function bor(a, b) return bit_op(a, b, or4, 8) end
+local function bxor(a, b) return bit_op(a, b, xor4, 8) end
+local function bnot(a) return 4294967295 - a end
+local function rotl(a, n) return (a % 2 ^ (32 - n)) * 2 ^ n + math_floor(a / 2 ^ (32 - n)) end
+
+-- Returns the 20 byte SHA-1 digest of message
+local function sha1(message)
+    local h0, h1, h2, h3, h4 = 0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476, 0xC3D2E1F0
+    local bit_length = string_len(message) * 8
+    local length_bytes = {}
+    for i = 7, 0, -1 do
+        length_bytes[#length_bytes + 1] = string.char(math_floor(bit_length / 256 ^ i) % 256)
+    end
+    message = message .. "\128" .. string.rep("\0", (55 - string_len(message)) % 64) .. table_concat(length_bytes)
+
+    for chunk_start = 1, string_len(message), 64 do
+        local w = {}
+        for i = 0, 15 do
+            local b1, b2, b3, b4 = string_byte(message, chunk_start + i * 4, chunk_start + i * 4 + 3)
+            w[i] = ((b1 * 256 + b2) * 256 + b3) * 256 + b4
+        end
+        for i = 16, 79 do
+            w[i] = rotl(bxor(bxor(w[i - 3], w[i - 8]), bxor(w[i - 14], w[i - 16])), 1)
+        end
+        local a, b, c, d, e = h0, h1, h2, h3, h4
+        for i = 0, 79 do
+            local f, k
+            if i < 20 then
+                f, k = bor(band(b, c), band(bnot(b), d)), 0x5A827999
+            elseif i < 40 then
+                f, k = bxor(bxor(b, c), d), 0x6ED9EBA1
+            elseif i < 60 then
+                f, k = bor(bor(band(b, c), band(b, d)), band(c, d)), 0x8F1BBCDC
+            else
+                f, k = bxor(bxor(b, c), d), 0xCA62C1D6
+            end
+            local temp = (rotl(a, 5) + f + e + k + w[i]) % 4294967296
+            a, b, c, d, e = temp, a, rotl(b, 30), c, d
+        end
+        h0 = (h0 + a) % 4294967296
+        h1 = (h1 + b) % 4294967296
+        h2 = (h2 + c) % 4294967296
+        h3 = (h3 + d) % 4294967296
+        h4 = (h4 + e) % 4294967296
+    end
+
+    local digest = {}
+    for _, h in ipairs({h0, h1, h2, h3, h4}) do
+        for i = 3, 0, -1 do
+            digest[#digest + 1] = string.char(math_floor(h / 256 ^ i) % 256)
+        end
+    end
+    return table_concat(digest)
+end
+
+local function base64_encode(data)
+    local encoded = {}
+    for i = 1, string_len(data), 3 do
+        local b1, b2, b3 = string_byte(data, i, i + 2)
+        local n = b1 * 65536 + (b2 or 0) * 256 + (b3 or 0)
+        local c1, c2, c3, c4 = math_floor(n / 262144) % 64, math_floor(n / 4096) % 64, math_floor(n / 64) % 64, n % 64
+        encoded[#encoded + 1] = string_sub(base64_chars, c1 + 1, c1 + 1) .. string_sub(base64_chars, c2 + 1, c2 + 1) ..
+                (b2 and string_sub(base64_chars, c3 + 1, c3 + 1) or "=") ..
+                (b3 and string_sub(base64_chars, c4 + 1, c4 + 1) or "=")
+    end
+    return table_concat(encoded)
+end
+
+-- Server frames are never masked or fragmented
+local function websocket_frame(opcode, payload)
+    local length = string_len(payload)
+    local header
+    if length < 126 then
+        header = string.char(128 + opcode, length)
+    elseif length < 65536 then
+        header = string.char(128 + opcode, 126, math_floor(length / 256), length % 256)
+    else
+        header = string.char(128 + opcode, 127, 0, 0, 0, 0, math_floor(length / 16777216) % 256,
+                math_floor(length / 65536) % 256, math_floor(length / 256) % 256, length % 256)
+    end
+    return header .. payload
+end
+
+-- Returns the opcode, the unmasked payload and the index after the frame,
+-- nil if the frame is incomplete, or false if the frame exceeds websocket_max_message_size
+local function parse_websocket_frame(buffer)
+    local buffer_length = string_len(buffer)
+    if buffer_length < 2 then
+        return nil
+    end
+    local b1, b2 = string_byte(buffer, 1, 2)
+    local opcode = b1 % 16
+    local is_masked = b2 >= 128
+    local length = b2 % 128
+    local index = 3
+    if length == 126 then
+        if buffer_length < 4 then
+            return nil
+        end
+        local l1, l2 = string_byte(buffer, 3, 4)
+        length = l1 * 256 + l2
+        index = 5
+    elseif length == 127 then
+        return false
+    end
+    if length > websocket_max_message_size then
+        return false
+    end
+    local mask_index = index
+    if is_masked then
+        index = index + 4
+    end
+    if buffer_length < index + length - 1 then
+        return nil
+    end
+    local payload = string_sub(buffer, index, index + length - 1)
+    if is_masked then
+        local mask = {string_byte(buffer, mask_index, mask_index + 3)}
+        local unmasked = {}
+        for i = 1, length do
+            unmasked[i] = string.char(bit_op(string_byte(payload, i), mask[(i - 1) % 4 + 1], xor4, 2))
+        end
+        payload = table_concat(unmasked)
+    end
+    return opcode, payload, index + length
+end
+
+-- Adds data to the pending response, such that it is sent after everything that is already pending
+local function queue_response(client, data)
+    if client.response then
+        client.response = client.response .. data
+    else
+        client.response = data
+        client.response_index = 1
+    end
+end
+
+-- Control messages, e.g.: {"type": "pause"}, {"type": "resume"}, {"type": "rate", "interval_ms": 500},
+-- {"type": "select", "fields": ["ias.kts", "mach"]} (an empty or missing fields list selects all fields)
+local function handle_websocket_message(client, payload)
+    local success, message = pcall(function()
+        return JSON:decode(payload)
+    end)
+    if not success or type(message) ~= "table" then
         return
     end
+    if message.type == "pause" then
+        client.paused = true
+    elseif message.type == "resume" then
+        client.paused = false
+    elseif message.type == "rate" and type(message.interval_ms) == "number" then
+        client.push_interval = math.max(message.interval_ms / 1000, min_push_interval)
+    elseif message.type == "select" then
+        local selected_paths = nil
+        if type(message.fields) == "table" and #message.fields > 0 then
+            selected_paths = {}
+            for _, name in ipairs(message.fields) do
+                local path = {}
+                for chunk in string.gmatch(tostring(name), "[^.]+") do
+                    path[#path + 1] = chunk
+                end
+                selected_paths[#selected_paths + 1] = path
+            end
+        end
+        client.selected_paths = selected_paths
+        -- the client only has the previously selected fields, such that the next snapshot must not be a delta
+        client.last_seq = nil
+    end
+end
 
-    -- Simple HTTP GET response
-    local response_body = generate_json_data()
-    local response = "HTTP/1.1 200 OK\r\n" ..
+-- Handles all complete frames in the receive buffer. Returns false if the connection has to be closed
+local function handle_websocket_input(client, received)
+    client.websocket_buffer = client.websocket_buffer .. received
+    while true do
+        local opcode, payload, next_index = parse_websocket_frame(client.websocket_buffer)
+        if opcode == nil then
+            return true
+        end
+        if opcode == false or opcode == 8 then
+            -- close, answered on a best effort basis
+            client.socket:send(websocket_frame(8, ""))
+            return false
+        end
+        client.websocket_buffer = string_sub(client.websocket_buffer, next_index)
+        if opcode == 1 then
+            handle_websocket_message(client, payload)
+        elseif opcode == 9 then
+            queue_response(client, websocket_frame(10, payload))
+        end
+        -- other opcodes, e.g., pongs and fragmented messages, are ignored
+    end
+end
+
+-- Reads as much of the current request as is available without blocking.
+-- Returns true once the request line, all headers and the body (which is discarded) have been received,
+-- or nil and an error if the connection is broken.
+local function receive_request(client)
+    while client.body_remaining == nil do
+        local line, err, partial = client.socket:receive("*l", client.partial)
+        if not line then
+            if err ~= "timeout" then
+                return nil, err
+            end
+            client.partial = partial
+            return false
+        end
+        client.partial = nil
+        if client.request_line == nil then
+            -- empty lines before the request line are ignored
+            if line ~= "" then
+                client.request_line = line
+            end
+        elseif line == "" then
+            client.body_remaining = tonumber(client.headers["content-length"]) or 0
+        else
+            local name, value = string.match(line, "^([^:]+):%s*(.-)%s*$")
+            if name then
+                client.headers[string.lower(name)] = value
+            end
+        end
+    end
+
+    if client.body_remaining > 0 then
+        local body, err, partial = client.socket:receive(client.body_remaining)
+        if not body then
+            if err ~= "timeout" then
+                return nil, err
+            end
+            client.body_remaining = client.body_remaining - string_len(partial)
+            return false
+        end
+        client.body_remaining = 0
+    end
+    return true
+end
+
+local function wants_keep_alive(client)
+    if not keep_alive or client.requests >= keep_alive_max_requests then
+        return false
+    end
+    local connection = string.lower(client.headers["connection"] or "")
+    if string_find(client.request_line, "HTTP/1.0", 1, true) then
+        return connection == "keep-alive"
+    end
+    return connection ~= "close"
+end
+
+-- Sends as much of the pending response as possible without blocking.
+-- Returns true once the response has been sent completely, or nil and an error if the connection is broken.
+local function send_response(client)
+    local started = profiling_enabled and os.clock()
+    local last_sent, err, partial_last_sent = client.socket:send(client.response, client.response_index)
+    if profiling_enabled then
+        record_timing("send", started)
+    end
+    if not last_sent then
+        if err ~= "timeout" then
+            return nil, err
+        end
+        last_sent = partial_last_sent
+    end
+    if last_sent >= client.response_index then
+        client.last_active = frame_time
+    end
+    if last_sent < string_len(client.response) then
+        client.response_index = last_sent + 1
+        return false
+    end
+    client.response = nil
+    client.response_index = nil
+    return true
+end
+
+local function build_json_response(response_body, keep_open)
+    return "HTTP/1.1 200 OK\r\n" ..
                     "Content-Type: application/json\r\n" ..
-                    "Content-Length: " .. string.len(response_body) .. "\r\n" ..
+                    "Content-Length: " .. string_len(response_body) .. "\r\n" ..
                     "Access-Control-Allow-Origin: *\r\n" ..
                     "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n" ..
                     "Access-Control-Allow-Headers: Content-Type\r\n" ..
-                    "Connection: close\r\n\r\n" ..
+                    (keep_open and keep_alive_headers or close_headers) .. "\r\n" ..
                     response_body
+end
 
-    client_socket:send(response)
-    client_socket:close()
+-- Handle HTTP requests: Prepares the response, which is sent by send_response
+local function handle_http_request(client)
+    client.requests = client.requests + 1
+    local path = string.match(client.request_line, "^%S+%s+([^%s?]+)")
+    local since = tonumber(string.match(client.request_line, "^%S+%s+%S*[?&]since=(%d+)") or "")
+    local headers = client.headers
+    local keep_open = wants_keep_alive(client)
+    client.request_line = nil
+    client.headers = {}
+    client.body_remaining = nil
+    if event_stream_enabled and path == event_stream_path then
+        client.stream = "sse"
+        client.response = event_stream_headers .. "data: " .. get_stream_body(client) .. "\n\n"
+        client.response_index = 1
+        client.last_event = frame_time
+        return
+    end
+    if websocket_enabled and path == websocket_path then
+        local key = headers["sec-websocket-key"]
+        if key == nil or string.lower(headers["upgrade"] or "") ~= "websocket" then
+            client.response = bad_request_response
+            client.response_index = 1
+            client.close_after_response = true
+            return
+        end
+        client.response = "HTTP/1.1 101 Switching Protocols\r\n" ..
+                    "Upgrade: websocket\r\n" ..
+                    "Connection: Upgrade\r\n" ..
+                    "Sec-WebSocket-Accept: " .. base64_encode(sha1(key .. websocket_guid)) .. "\r\n\r\n" ..
+                    websocket_frame(1, get_stream_body(client))
+        client.response_index = 1
+        client.stream = "websocket"
+        client.last_event = frame_time
+        return
+    end
+
+    -- Simple HTTP GET response
+    local response_body
+    if profiling_enabled and path == stats_path then
+        response_body = JSON:encode(get_timing_stats())
+    else
+        response_body = get_snapshot_body(nil, since)
+    end
+    client.response = build_json_response(response_body, keep_open)
+    client.response_index = 1
+    client.close_after_response = not keep_open
+end
+
+-- Accepts pending connections, up to max_accepts_per_frame and max_connections
+local function accept_clients(server_readable)
+    local accepted = 0
+    while server_readable and accepted < max_accepts_per_frame and #clients < max_connections do
+        local client_socket = server:accept()
+        if not client_socket then
+            return
+        end
+        -- client sockets never block, regardless of the server socket timeout
+        client_socket:settimeout(0)
+        clients[#clients + 1] = {
+            socket = client_socket,
+            -- partially received line, see receive_request
+            partial = nil,
+            request_line = nil,
+            -- keys are lower case
+            headers = {},
+            -- nil until all headers have been received
+            body_remaining = nil,
+            -- not nil while a response is being sent, see send_response
+            response = nil,
+            response_index = nil,
+            close_after_response = false,
+            -- "sse" or "websocket" once the client requested a stream, see serve_stream_client
+            stream = nil,
+            last_event = nil,
+            -- only changed by WebSocket control messages, see handle_websocket_message
+            paused = false,
+            push_interval = push_interval,
+            selected_paths = nil,
+            -- sequence number of the last snapshot sent to a stream client, see get_stream_body
+            last_seq = nil,
+            -- received data that does not form a complete WebSocket frame yet
+            websocket_buffer = "",
+            requests = 0,
+            last_active = frame_time,
+            -- new clients are read once without waiting for select, since their request has usually arrived already
+            is_new = true,
+        }
+        accepted = accepted + 1
+        server_readable = socket.select(server_set, nil, 0)[server] ~= nil
+    end
+    -- further connections wait in the backlog of the server socket
+end
+
+-- Pushes a snapshot event (SSE) or frame (WebSocket) to a stream client every push_interval
+local function serve_stream_client(client, readable, writable)
+    -- pending before this frame, i.e., the socket has been selected for writing
+    local pending = client.response ~= nil
+    if readable[client.socket] then
+        -- only WebSocket clients send data, besides closing the connection
+        local _, err, received = client.socket:receive("*a")
+        if err ~= "timeout" then
+            return false
+        end
+        if client.stream == "websocket" and not handle_websocket_input(client, received) then
+            return false
+        end
+    end
+    -- slow clients skip snapshots instead of queueing them
+    if not pending and not client.paused and frame_time - client.last_event >= client.push_interval then
+        if client.stream == "websocket" then
+            queue_response(client, websocket_frame(1, get_stream_body(client)))
+        else
+            queue_response(client, "data: " .. get_stream_body(client) .. "\n\n")
+        end
+        client.last_event = frame_time
+    end
+    if not client.response then
+        return true
+    end
+    if pending and not writable[client.socket] then
+        return frame_time - client.last_active <= keep_alive_timeout
+    end
+    return send_response(client) ~= nil
+end
+
+-- Advances the state of a single client: Either sends the pending response or receives the next request.
+-- Returns false if the connection has to be closed.
+local function serve_client(client, readable, writable)
+    if client.stream then
+        return serve_stream_client(client, readable, writable)
+    end
+    local is_new = client.is_new
+    client.is_new = false
+
+    if client.response then
+        if not writable[client.socket] then
+            return frame_time - client.last_active <= keep_alive_timeout
+        end
+    elseif readable[client.socket] or is_new then
+        local complete, err = receive_request(client)
+        if complete == nil then
+            return false
+        end
+        client.last_active = frame_time
+        if complete then
+            handle_http_request(client)
+        end
+    end
+
+    if not client.response then
+        return frame_time - client.last_active <= keep_alive_timeout
+    end
+    -- most responses fit into the send buffer, such that they are sent within the frame of the request
+    local sent, err = send_response(client)
+    if sent == nil then
+        return false
+    end
+    return not (sent and client.close_after_response)
+end
+
+-- Drives all clients without blocking. Stops after max_frame_time has been spent in this frame; the clients that were
+-- not served are served first in the next frame.
+local function serve_clients()
+    local read_sockets = {server}
+    local write_sockets = {}
+    for _, client in ipairs(clients) do
+        if client.response then
+            write_sockets[#write_sockets + 1] = client.socket
+        end
+        -- event stream clients are always read to detect closed connections
+        if not client.response or client.stream then
+            read_sockets[#read_sockets + 1] = client.socket
+        end
+    end
+    local readable, writable = socket.select(read_sockets, write_sockets, 0)
+    accept_clients(readable[server] ~= nil)
+
+    local deadline = frame_time + max_frame_time
+    local not_served = {}
+    local served = {}
+    local out_of_time = false
+    for i, client in ipairs(clients) do
+        -- at least one client is served per frame
+        out_of_time = out_of_time or (i > 1 and socket.gettime() > deadline)
+        if out_of_time then
+            not_served[#not_served + 1] = client
+        elseif serve_client(client, readable, writable) then
+            served[#served + 1] = client
+        else
+            client.socket:close()
+        end
+    end
+    for _, client in ipairs(served) do
+        not_served[#not_served + 1] = client
+    end
+    clients = not_served
 end
 
--- Generate JSON data from DCS
-function generate_json_data()
-    local data = {}
+local function close_clients()
+    for _, client in ipairs(clients) do
+        client.socket:close()
+    end
+    clients = {}
+end
+
+-- Create the table filled by generate_data
+function new_data()
+    return {
+        ias = {
+            kts = false,
+        },
+        mach = false,
+        tas = {
+            kts = false,
+        },
+        heading = {
+            degrees = false,
+        },
+        altitude = {
+            msl = {
+                ft = false,
+            },
+            agl = {
+                ft = false,
+            },
+        },
+        fuel = {
+            internal = {
+                lbs = false,
+            },
+        },
+        arms = {
+            gun_rounds = false,
+        },
+    }
+end
 
+-- Generate data from DCS
+function generate_data(data)
     local airspeed = safe_get(LoGetIndicatedAirSpeed, 0)
     local mach = safe_get(LoGetMachNumber, 0)
     local tas = safe_get(LoGetTrueAirSpeed, 0)
@@ -181,25 +1122,71 @@ function generate_json_data()
     local altitude_agl = safe_get(LoGetAltitudeAboveGroundLevel, 0)
     local engine_info = safe_get(LoGetEngineInfo, {})
     local payload_info = safe_get(LoGetPayloadInfo, {})
-    data.ias = {}
     data.ias.kts = (airspeed or 0) * 1.9438400000000629
     data.mach = (mach or 0)
-    data.tas = {}
     data.tas.kts = (tas or 0) * 1.9438400000000629
-    data.heading = {}
     data.heading.degrees = (heading or 0) * 57.29577951308232
-    data.altitude = {}
-    data.altitude.msl = {}
     data.altitude.msl.ft = (altitude_msl or 0) * 3.28084
-    data.altitude.agl = {}
     data.altitude.agl.ft = (altitude_agl or 0) * 3.28084
-    data.fuel = {}
-    data.fuel.internal = {}
     data.fuel.internal.lbs = (engine_info.fuel_internal or 0) * 12000.0
-    data.arms = {}
     data.arms.gun_rounds = (payload_info.Cannon.shells or 0)
+    return data
+end
+
+-- Encode the table returned by generate_data
+local encode_buffer = {}
+encode_buffer[1] = '{"ias":{"kts":'
+encode_buffer[3] = '},"mach":'
+encode_buffer[5] = ',"tas":{"kts":'
+encode_buffer[7] = '},"heading":{"degrees":'
+encode_buffer[9] = '},"altitude":{"msl":{"ft":'
+encode_buffer[11] = '},"agl":{"ft":'
+encode_buffer[13] = '}},"fuel":{"internal":{"lbs":'
+encode_buffer[15] = '}},"arms":{"gun_rounds":'
+encode_buffer[17] = '}}'
+function encode_data(data)
+    local buffer = encode_buffer
+    buffer[2] = encode_number(data.ias.kts, '%.0f')
+    buffer[4] = encode_number(data.mach, '%.2f')
+    buffer[6] = encode_number(data.tas.kts, '%.0f')
+    buffer[8] = encode_number(data.heading.degrees, '%.0f')
+    buffer[10] = encode_number(data.altitude.msl.ft, '%.0f')
+    buffer[12] = encode_number(data.altitude.agl.ft, '%.0f')
+    buffer[14] = encode_number(data.fuel.internal.lbs, '%.0f')
+    buffer[16] = encode_number(data.arms.gun_rounds, '%.0f')
+    return table_concat(buffer, "", 1, 17)
+end
 
-    return JSON:encode(data)
+-- Encode each field of the table returned by generate_data
+function encode_fields(data)
+    return {
+        ias = {
+            kts = encode_number(data.ias.kts, '%.0f'),
+        },
+        mach = encode_number(data.mach, '%.2f'),
+        tas = {
+            kts = encode_number(data.tas.kts, '%.0f'),
+        },
+        heading = {
+            degrees = encode_number(data.heading.degrees, '%.0f'),
+        },
+        altitude = {
+            msl = {
+                ft = encode_number(data.altitude.msl.ft, '%.0f'),
+            },
+            agl = {
+                ft = encode_number(data.altitude.agl.ft, '%.0f'),
+            },
+        },
+        fuel = {
+            internal = {
+                lbs = encode_number(data.fuel.internal.lbs, '%.0f'),
+            },
+        },
+        arms = {
+            gun_rounds = encode_number(data.arms.gun_rounds, '%.0f'),
+        },
+    }
 end
 
 -- Main export function called every frame
@@ -209,11 +1196,20 @@ function LuaExportAfterNextFrame()
             return
         end
 
-        -- Accept new connections
-        local client_socket = server:accept()
-        if client_socket then
-            client_socket:settimeout(0)
-            handle_http_request(client_socket)
+        frame_time = socket.gettime()
+        local started = profiling_enabled and os.clock()
+
+        -- Accept new connections and serve all clients
+        serve_clients()
+        -- Collect the next elements of the lists requested by generate_data
+        advance_list_passes()
+
+        if profiling_enabled then
+            record_timing("frame", started)
+            if profiling_log_interval > 0 and frame_time - last_profiling_log >= profiling_log_interval then
+                last_profiling_log = frame_time
+                log_timing_stats()
+            end
         end
     end)
 
@@ -225,6 +1221,17 @@ end
 -- Cleanup on mission end
 function LuaExportStop()
     local success, error = pcall(function()
+        close_clients()
+        snapshot = nil
+        snapshot_data = nil
+        snapshot_history = {}
+        tier_times = {}
+        -- cleared in place, since the data module of a shared runtime holds a reference to the table
+        for root_field in pairs(tier_values) do
+            tier_values[root_field] = nil
+        end
+        timings = {}
+        list_passes = {}
         if server then
             server:close()
             server = nil
@@ -2,15 +2,19 @@
 # SPDX-License-Identifier: MIT
 # License-Filename: LICENSE
 import os
+from io import BytesIO
 from pathlib import Path
+from zipfile import ZipFile
 
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient, ASGITransport, Response
 
-from dcs_pylot_dash.api.api_model import APIExportModel
+from dcs_pylot_dash.api.api_model import APIExportModel, APIExportModelAdvancedSettings
 from dcs_pylot_dash.api.api_routes import APIRoutes
 from dcs_pylot_dash.app import DcsPylotDash
+from dcs_pylot_dash.service.export_model import DataTransport
+from dcs_pylot_dash.service.lua_generator import LuaGeneratorSettings
 
 
 @pytest.fixture
@@ -45,3 +49,104 @@ async def test_generate(app_client: AsyncClient) -> None:
     response = await app_client.post(APIRoutes.GENERATE, json=api_export_model.model_dump())
     response.raise_for_status()
     assert response.headers["Content-Type"] == "application/zip"
+
+
+async def test_generate_cached(app_client: AsyncClient) -> None:
+    response: Response = await app_client.get(APIRoutes.SAMPLE_MODEL)
+    response.raise_for_status()
+    api_export_model: APIExportModel = APIExportModel.model_validate(response.json())
+    first: Response = await app_client.post(APIRoutes.GENERATE, json=api_export_model.model_dump())
+    second: Response = await app_client.post(APIRoutes.GENERATE, json=api_export_model.model_dump())
+    first.raise_for_status()
+    second.raise_for_status()
+    assert first.content == second.content
+
+
+@pytest.fixture
+def streaming(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DCS_PYLOT_DASH_GENERATE_STREAMING", "true")
+
+
+@pytest.mark.usefixtures("streaming")
+async def test_generate_streaming(app_client: AsyncClient) -> None:
+    response: Response = await app_client.get(APIRoutes.SAMPLE_MODEL)
+    response.raise_for_status()
+    api_export_model: APIExportModel = APIExportModel.model_validate(response.json())
+    response = await app_client.post(APIRoutes.GENERATE, json=api_export_model.model_dump())
+    response.raise_for_status()
+    with ZipFile(BytesIO(response.content)) as zip_file:
+        assert zip_file.testzip() is None
+    # the export model is validated before the response starts
+    api_export_model.rows[0].fields[0].field_id = "no_such_field"
+    response = await app_client.post(APIRoutes.GENERATE, json=api_export_model.model_dump())
+    assert response.status_code == 400
+
+
+async def test_generate_websocket(app_client: AsyncClient) -> None:
+    response: Response = await app_client.get(APIRoutes.SAMPLE_MODEL)
+    response.raise_for_status()
+    api_export_model: APIExportModel = APIExportModel.model_validate(response.json())
+    api_export_model.advanced_settings = APIExportModelAdvancedSettings(transport=DataTransport.WEBSOCKET)
+    response = await app_client.post(APIRoutes.GENERATE, json=api_export_model.model_dump())
+    response.raise_for_status()
+    with ZipFile(BytesIO(response.content)) as zip_file:
+        script_content: str = zip_file.read("DCSPylotDash.lua").decode("utf-8")
+        html_content: str = zip_file.read("DCSPylotDash.html").decode("utf-8")
+    assert "local websocket_enabled = true" in script_content
+    assert "startWebSocket();" in html_content
+
+
+async def test_generate_batch(app_client: AsyncClient) -> None:
+    response: Response = await app_client.get(APIRoutes.SAMPLE_MODEL)
+    response.raise_for_status()
+    api_export_model: APIExportModel = APIExportModel.model_validate(response.json())
+    other_api_export_model: APIExportModel = api_export_model.model_copy(deep=True)
+    other_api_export_model.rows = other_api_export_model.rows[:1]
+    batch: dict = {"bundles": [api_export_model.model_dump(), other_api_export_model.model_dump()]}
+    response = await app_client.post(APIRoutes.GENERATE_BATCH, json=batch)
+    response.raise_for_status()
+    assert response.headers["Content-Type"] == "application/zip"
+    with ZipFile(BytesIO(response.content)) as zip_file:
+        names: list[str] = zip_file.namelist()
+        readme: str = zip_file.read("bundle_2/readme.txt").decode("utf-8")
+    assert "license.txt" in names
+    assert "add-to-Export.lua" in names
+    assert "bundle_1/DCSPylotDash.lua" in names
+    assert "bundle_2/DCSPylotDash.lua" in names
+    assert "bundle_1/license.txt" not in names
+    # the readme of each bundle refers to the shared members in the root directory
+    assert "readme.txt" not in names
+    assert "Append the content of ..\\add-to-Export.lua to" in readme
+    assert "Copy DCSPylotDash.lua to" in readme
+    assert "Open DCSPylotDash.html in" in readme
+
+
+async def test_generate_batch_shared_runtime(app_client: AsyncClient) -> None:
+    response: Response = await app_client.get(APIRoutes.SAMPLE_MODEL)
+    response.raise_for_status()
+    api_export_model: APIExportModel = APIExportModel.model_validate(response.json())
+    api_export_model.advanced_settings = APIExportModelAdvancedSettings(shared_runtime=True, lua_bind_port=52025)
+    other_api_export_model: APIExportModel = api_export_model.model_copy(deep=True)
+    other_api_export_model.rows = other_api_export_model.rows[:1]
+    other_api_export_model.advanced_settings.lua_bind_port = 52026
+    batch: dict = {"bundles": [api_export_model.model_dump(), other_api_export_model.model_dump()]}
+    response = await app_client.post(APIRoutes.GENERATE_BATCH, json=batch)
+    response.raise_for_status()
+    with ZipFile(BytesIO(response.content)) as zip_file:
+        names: list[str] = zip_file.namelist()
+        script_content: str = zip_file.read("bundle_1/DCSPylotDash_52025.lua").decode("utf-8")
+        export_contents: list[str] = [zip_file.read(f"bundle_{i}/add-to-Export.lua").decode("utf-8") for i in (1, 2)]
+        readme: str = zip_file.read("bundle_1/readme.txt").decode("utf-8")
+    runtime_names: list[str] = [n for n in names if n.startswith(LuaGeneratorSettings.RUNTIME_MODULE_PREFIX_DEFAULT)]
+    assert len(runtime_names) == 1
+    assert f'require("{runtime_names[0].removesuffix(".lua")}")' in script_content
+    assert f"Copy DCSPylotDash_52025.lua and ..\\{runtime_names[0]} to" in readme
+    # each dashboard is loaded by its own script, such that both can be installed side by side
+    assert "bundle_2/DCSPylotDash_52026.lua" in names
+    assert "dofile(lfs.writedir()..[[Scripts\\DCSPylotDash_52025.lua]])" in export_contents[0]
+    assert "dofile(lfs.writedir()..[[Scripts\\DCSPylotDash_52026.lua]])" in export_contents[1]
+
+
+async def test_generate_batch_empty(app_client: AsyncClient) -> None:
+    response: Response = await app_client.post(APIRoutes.GENERATE_BATCH, json={"bundles": []})
+    assert response.status_code == 400
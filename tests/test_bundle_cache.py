@@ -0,0 +1,49 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+from dcs_pylot_dash.api.api_model import APIExportModel, APIExportRow, APIExportField, APIExportModelAdvancedSettings
+from dcs_pylot_dash.service.bundle_cache import BundleCache, BundleCacheStats
+from dcs_pylot_dash.service.units import Unit
+
+
+def _api_model(unit: Unit = Unit.KNOTS) -> APIExportModel:
+    field: APIExportField = APIExportField(display_name="IAS", field_id="airspeed", unit_id=unit)
+    return APIExportModel(rows=[APIExportRow(fields=[field])])
+
+
+def test_key_is_canonical():
+    assert BundleCache.key_for(_api_model()) == BundleCache.key_for(_api_model())
+    assert BundleCache.key_for(_api_model()) != BundleCache.key_for(_api_model(Unit.KMH))
+    with_empty_settings: APIExportModel = _api_model()
+    with_empty_settings.advanced_settings = APIExportModelAdvancedSettings()
+    assert BundleCache.key_for(with_empty_settings) == BundleCache.key_for(_api_model())
+
+
+def test_lru_eviction_by_entries():
+    cache: BundleCache = BundleCache(max_entries=2, max_bytes=1024)
+    cache.put("a", b"a")
+    cache.put("b", b"b")
+    assert cache.get("a") == b"a"
+    cache.put("c", b"c")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a"
+    assert cache.get("c") == b"c"
+    assert cache.stats == BundleCacheStats(hits=3, misses=1, evictions=1, entries=2, size_bytes=2)
+
+
+def test_eviction_by_bytes():
+    cache: BundleCache = BundleCache(max_entries=10, max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"123")
+    assert cache.get("a") is None
+    assert cache.stats.size_bytes == 8
+    cache.put("too_large", b"12345678901")
+    assert cache.get("too_large") is None
+    assert cache.stats.entries == 2
+
+
+def test_disabled():
+    cache: BundleCache = BundleCache(max_entries=0, max_bytes=1024)
+    cache.put("a", b"a")
+    assert cache.get("a") is None
@@ -0,0 +1,26 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+from dcs_pylot_dash.utils.code_emitter import CodeEmitter
+
+
+def test_render():
+    emitter: CodeEmitter = CodeEmitter(4)
+    emitter.line("for i, v in ipairs(list) do")
+    with emitter.indented():
+        emitter.line("data.list[i] = v")
+    emitter.line("end")
+    assert emitter.render() == "for i, v in ipairs(list) do\n        data.list[i] = v\n    end"
+
+
+def test_render_empty():
+    assert CodeEmitter(4).render() == ""
+
+
+def test_render_many_lines():
+    emitter: CodeEmitter = CodeEmitter(2, base_level=0)
+    for i in range(10000):
+        emitter.line(f"data.val_{i} = {i}")
+    rendered_lines: list[str] = emitter.render().split("\n")
+    assert len(rendered_lines) == 10000
+    assert rendered_lines[-1] == "data.val_9999 = 9999"
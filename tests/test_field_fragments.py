@@ -0,0 +1,40 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+from pathlib import Path
+
+import pytest
+
+from dcs_pylot_dash.service.dcs_model_external import ExternalModel
+from dcs_pylot_dash.service.dcs_model_internal import InternalModel
+from dcs_pylot_dash.service.field_fragments import FieldFragmentTable, FieldFragment
+from dcs_pylot_dash.service.units import Unit, UnitConverter
+
+
+@pytest.fixture
+def field_fragments() -> FieldFragmentTable:
+    src_json_path: Path = Path(__file__).parent / "data" / "external_model_1.json"
+    external_model: ExternalModel = ExternalModel.model_validate_json(src_json_path.read_text())
+    return FieldFragmentTable(InternalModel(external_model).populate())
+
+
+def test_allowed_units(field_fragments: FieldFragmentTable):
+    assert field_fragments.get_allowed_units("airspeed") == UnitConverter.SPEED_UNITS
+    assert field_fragments.get_allowed_units("no_such_field") is None
+
+
+def test_fragments(field_fragments: FieldFragmentTable):
+    knots: FieldFragment = field_fragments.get("airspeed", Unit.KNOTS)
+    assert knots.lua_value == f"(airspeed or 0) * {UnitConverter.get_conversion_factor(Unit.MS, Unit.KNOTS)}"
+    assert knots.unit_label == "kts"
+    assert knots.has_decimal_digits
+
+    fuel: FieldFragment = field_fragments.get("engine_info.fuel_internal", Unit.POUNDS)
+    assert fuel.lua_value == "(engine_info.fuel_internal or 0) * 12000.0"
+    fuel_kg: FieldFragment = field_fragments.get("engine_info.fuel_internal", Unit.KILOGRAMS)
+    kg_factor: float = 12000.0 * UnitConverter.get_conversion_factor(Unit.POUNDS, Unit.KILOGRAMS)
+    assert fuel_kg.lua_value == f"(engine_info.fuel_internal or 0) * {kg_factor}"
+
+    assert field_fragments.get("pilot_name", Unit.NONE).lua_value == "pilot_name"
+    assert not field_fragments.get("pilot_name", Unit.NONE).has_decimal_digits
+    assert field_fragments.get("airspeed", Unit.POUNDS) is None
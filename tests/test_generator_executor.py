@@ -0,0 +1,87 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+from zipfile import ZipFile
+
+import pytest
+
+from dcs_pylot_dash.api.api_model import APIExportModel
+from dcs_pylot_dash.app_settings import DCSPylotDashAppSettings, GeneratorExecutorType
+from dcs_pylot_dash.service.export_model import ExportModel
+from dcs_pylot_dash.service.generator_executor import GeneratorExecutor
+from dcs_pylot_dash.service.generator_service import GeneratorService
+from dcs_pylot_dash.service.notice_service import NoticesService, NoticesSettings
+from dcs_pylot_dash.service.source_model_service import SourceModelService
+from dcs_pylot_dash.utils.resource_provider import ResourceProvider
+
+
+@pytest.fixture
+def generator_service() -> GeneratorService:
+    repo_path: Path = Path(__file__).parent.parent
+    os.environ |= {
+        "DCS_PYLOT_DASH_LICENSE_FILE_PATH_OVERRIDE": str(repo_path / "LICENSE"),
+        "DCS_PYLOT_DASH_PRIVACY_POLICY_FILE_PATH_OVERRIDE": str(repo_path / "privacy_policy.md"),
+        "DCS_PYLOT_DASH_THIRD_PARTY_LICENSES_FILE_PATH_OVERRIDE": str(repo_path / "third_party_licenses.txt"),
+        "DCS_PYLOT_DASH_TERMS_OF_SERVICE_FILE_PATH_OVERRIDE": str(repo_path / "terms_of_service.md"),
+    }
+    resource_provider: ResourceProvider = ResourceProvider()
+    notices_service: NoticesService = NoticesService(NoticesSettings(), resource_provider)
+    return GeneratorService(
+        DCSPylotDashAppSettings(), SourceModelService(resource_provider), notices_service, resource_provider
+    )
+
+
+@pytest.mark.parametrize("executor_type", [GeneratorExecutorType.THREAD, GeneratorExecutorType.PROCESS])
+async def test_export_model(generator_service: GeneratorService, executor_type: GeneratorExecutorType) -> None:
+    app_settings: DCSPylotDashAppSettings = DCSPylotDashAppSettings(
+        generator_executor=executor_type, generator_max_workers=1
+    )
+    generator_executor: GeneratorExecutor = GeneratorExecutor(app_settings, generator_service)
+    try:
+        bundle: bytes = await generator_executor.export_model(generator_service.sample_model)
+        with ZipFile(BytesIO(bundle)) as zip_file:
+            assert "license.txt" in zip_file.namelist()
+        assert await generator_executor.export_model(generator_service.sample_model) == bundle
+        assert generator_service.bundle_cache_stats.hits == 1
+    finally:
+        generator_executor.shutdown()
+
+
+@pytest.mark.parametrize("executor_type", [GeneratorExecutorType.THREAD, GeneratorExecutorType.PROCESS])
+async def test_stream_model(
+    generator_service: GeneratorService,
+    executor_type: GeneratorExecutorType,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    app_settings: DCSPylotDashAppSettings = DCSPylotDashAppSettings(
+        generator_executor=executor_type, generate_streaming=True
+    )
+    generator_executor: GeneratorExecutor = GeneratorExecutor(app_settings, generator_service)
+    assert ("Streamed bundles are generated in threads" in caplog.text) == (
+        executor_type == GeneratorExecutorType.PROCESS
+    )
+    # the eager validation does not block the event loop
+    validating_threads: list[threading.Thread] = []
+    build_export_model = generator_service._build_export_model
+
+    def record_thread(api_model: APIExportModel) -> ExportModel:
+        validating_threads.append(threading.current_thread())
+        return build_export_model(api_model)
+
+    monkeypatch.setattr(generator_service, "_build_export_model", record_thread)
+    try:
+        chunks: list[bytes] = list(await generator_executor.stream_model(generator_service.sample_model))
+        assert len(validating_threads) == 1 and validating_threads[0] is not threading.main_thread()
+        assert len(chunks) > 1
+        with ZipFile(BytesIO(b"".join(chunks))) as zip_file:
+            assert zip_file.testzip() is None
+            assert "readme.txt" in zip_file.namelist()
+        cached_chunks: list[bytes] = list(await generator_executor.stream_model(generator_service.sample_model))
+        assert cached_chunks == [b"".join(chunks)]
+    finally:
+        generator_executor.shutdown()
@@ -7,7 +7,7 @@ import pytest
 
 from dcs_pylot_dash.service.dcs_model_external import ExternalModel
 from dcs_pylot_dash.service.dcs_model_internal import InternalModel
-from dcs_pylot_dash.service.export_model import ExportModel
+from dcs_pylot_dash.service.export_model import ExportModel, DataTransport
 from dcs_pylot_dash.service.html_ui_generator import HtmlUIGenerator, HtmlUiGeneratorSettings, HtmlUIGeneratorOutput
 from dcs_pylot_dash.service.lua_generator import LuaGenerator, LuaGeneratorSettings
 from dcs_pylot_dash.service.notice_service import NoticesContainer, NoticesService, NoticesSettings
@@ -57,3 +57,33 @@ def test_generate(model_external: ExternalModel, export_model: ExportModel):
     html_output_file_path.write_text(html_generator_output.html_content, encoding="utf-8")
     lua_script_output_file_path.write_text(lua_generator_output.script_content, encoding="utf-8")
     export_output_file_path.write_text(lua_generator_output.export_content, encoding="utf-8")
+
+
+def test_generate_transport(model_external: ExternalModel, export_model: ExportModel):
+    internal_model = InternalModel(model_external)
+    internal_model.populate()
+    resource_provider: ResourceProvider = ResourceProvider()
+    notices_container: NoticesContainer = NoticesContainer(
+        license_txt="", third_party_licenses_txt="", privacy_policy_md="", terms_of_service_md=""
+    )
+    # resolves the fields
+    LuaGenerator(LuaGeneratorSettings(), resource_provider, notices_container).generate(internal_model, export_model)
+    notices_service: NoticesService = NoticesService(NoticesSettings(), resource_provider)
+    html_generator: HtmlUIGenerator = HtmlUIGenerator(HtmlUiGeneratorSettings(), resource_provider, notices_service)
+
+    html_content: str = html_generator.generate(export_model).html_content
+    assert f"setInterval(updateData, {export_model.ui_export_settings.fetch_data_interval_ms});" in html_content
+
+    export_model.http_server_settings.transport = DataTransport.SSE
+    html_content = html_generator.generate(export_model).html_content
+    assert "startEventStream();" in html_content
+    assert "setInterval(updateData" not in html_content
+
+    export_model.http_server_settings.transport = DataTransport.WEBSOCKET
+    html_content = html_generator.generate(export_model).html_content
+    assert "startWebSocket();" in html_content
+
+    assert "const deltaEnabled = true;" in html_content
+    export_model.lua_export_settings.delta_history_size = 0
+    html_content = html_generator.generate(export_model).html_content
+    assert "const deltaEnabled = false;" in html_content
@@ -0,0 +1,102 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import gc
+import logging
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from dcs_pylot_dash.service.dcs_common_data_types import UpdateTier
+from dcs_pylot_dash.service.dcs_model_external import ExternalModel
+from dcs_pylot_dash.service.dcs_model_internal import InternalModel, InternalModelField, InternalModelError
+
+LOGGER = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def internal_model() -> InternalModel:
+    src_json_path: Path = Path(__file__).parent / "data" / "external_model_1.json"
+    external_model: ExternalModel = ExternalModel.model_validate_json(src_json_path.read_text())
+    return InternalModel(external_model).populate()
+
+
+def test_hierarchy(internal_model: InternalModel):
+    count: InternalModelField = internal_model.get_field("payload_info.Stations.count")
+    assert count.dotted_name == "payload_info.Stations.count"
+    assert count.effective_display_name == "payload_info.Stations.count"
+    assert count.root_field is internal_model.get_field("payload_info")
+    assert count.next_list_field_in_hierarchy is internal_model.get_field("payload_info.Stations")
+    assert internal_model.get_field("payload_info.Cannon.shells").next_list_field_in_hierarchy is None
+
+
+def test_hierarchy_is_frozen(internal_model: InternalModel):
+    shells: InternalModelField = internal_model.get_field("payload_info.Cannon.shells")
+    with pytest.raises(InternalModelError):
+        shells.parent = None
+    with pytest.raises(InternalModelError):
+        shells.unit = None
+    with pytest.raises(TypeError):
+        internal_model.get_field("payload_info").fields["foo"] = shells
+    assert shells.fields is internal_model.get_field("mach").list_fields
+
+
+def test_repopulate(internal_model: InternalModel):
+    dotted_names: list[str] = [f.dotted_name for f in internal_model.fields]
+    internal_model.populate()
+    assert [f.dotted_name for f in internal_model.fields] == dotted_names
+    assert all(internal_model.get_field(n).dotted_name == n for n in dotted_names)
+
+
+def test_memory_per_field():
+    """
+    Retained bytes per field of a synthetic external model with 10k leaf fields. The figure is only logged, the
+    assertions check the layout that keeps it low: slotted fields and a single shared mapping for all leaves.
+    """
+    leaf_field: dict = {"lo_return_type": "number", "unit": "meters"}
+    table_field: dict = {"lo_return_type": "table", "fields": {f"value_{i}": leaf_field for i in range(100)}}
+    external_model: ExternalModel = ExternalModel.model_validate(
+        {"fields": {f"table_{i}": table_field | {"lo_function": f"LoGetTable{i}"} for i in range(100)}}
+    )
+
+    tracemalloc.start()
+    try:
+        before: int = tracemalloc.get_traced_memory()[0]
+        internal_model: InternalModel = InternalModel(external_model).populate()
+        gc.collect()
+        retained: int = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    field_count: int = len(internal_model.fields)
+    bytes_per_field: float = retained / field_count
+    LOGGER.info(f"{field_count} fields, {bytes_per_field:.0f} bytes per field")
+    assert field_count == 10100
+    value: InternalModelField = internal_model.get_field("table_0.value_0")
+    assert not hasattr(value, "__dict__")
+    assert value.fields is internal_model.get_field("table_99.value_99").fields
+    assert value.list_fields is value.prototype_implementations
+
+
+def test_effective_default_update_tier():
+    external_model: ExternalModel = ExternalModel.model_validate(
+        {
+            "fields": {
+                "mach": {"lo_function": "LoGetMachNumber", "lo_return_type": "number"},
+                "self": {
+                    "lo_function": "LoGetSelfData",
+                    "lo_return_type": "table",
+                    "default_update_tier": "slow",
+                    "fields": {
+                        "Name": {"lo_return_type": "string", "default_update_tier": "static"},
+                        "Heading": {"lo_return_type": "number"},
+                    },
+                },
+            }
+        }
+    )
+    internal_model: InternalModel = InternalModel(external_model).populate()
+    assert internal_model.get_field("mach").effective_default_update_tier == UpdateTier.FRAME
+    assert internal_model.get_field("self.Heading").effective_default_update_tier == UpdateTier.SLOW
+    assert internal_model.get_field("self.Name").effective_default_update_tier == UpdateTier.STATIC
@@ -0,0 +1,108 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import logging
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from dcs_pylot_dash.service.dcs_model_external import ExternalModel
+from dcs_pylot_dash.service.dcs_model_internal import InternalModel
+from dcs_pylot_dash.service.export_model import ExportModel
+from dcs_pylot_dash.service.lua_generator import LuaGenerator, LuaGeneratorSettings
+from dcs_pylot_dash.service.notice_service import NoticesContainer
+from dcs_pylot_dash.utils.resource_provider import ResourceProvider
+
+LOGGER = logging.getLogger(__name__)
+
+LUA_EXECUTABLE: str | None = shutil.which("lua")
+
+ITERATIONS: int = 200_000
+
+# Loads a generated script with stubbed DCS functions and LuaSocket, and prints the os.clock time of ITERATIONS calls
+# of generate_data
+BENCHMARK_SCRIPT: str = """
+local script_path, iterations = arg[1], tonumber(arg[2])
+log = {INFO = 1, ERROR = 2, write = function(...) end}
+package.preload["socket"] = function()
+    return {tcp = function() return nil end, gettime = os.clock}
+end
+package.preload["json"] = function()
+    return {encode = function(self, value) return "" end, decode = function(self, value) return {} end}
+end
+local engine_info = {fuel_internal = 0.5}
+local payload_info = {Cannon = {shells = 100}, Stations = {}}
+function LoGetIndicatedAirSpeed() return 120 end
+function LoGetMachNumber() return 0.5 end
+function LoGetTrueAirSpeed() return 130 end
+function LoGetMagneticYaw() return 1.2 end
+function LoGetAltitudeAboveSeaLevel() return 3000 end
+function LoGetAltitudeAboveGroundLevel() return 2500 end
+function LoGetEngineInfo() return engine_info end
+function LoGetPayloadInfo() return payload_info end
+dofile(script_path)
+LuaExportStart()
+local data = new_data()
+local started = os.clock()
+for i = 1, iterations do
+    generate_data(data)
+end
+print(os.clock() - started)
+"""
+
+
+@pytest.fixture
+def internal_model() -> InternalModel:
+    src_json_path: Path = Path(__file__).parent / "data" / "external_model_1.json"
+    external_model: ExternalModel = ExternalModel.model_validate_json(src_json_path.read_text())
+    return InternalModel(external_model).populate()
+
+
+@pytest.fixture
+def export_model() -> ExportModel:
+    src_json_path: Path = Path(__file__).parent / "data" / "export_model_3.json"
+    return ExportModel.model_validate_json(src_json_path.read_text())
+
+
+@pytest.fixture
+def generator() -> LuaGenerator:
+    resource_provider: ResourceProvider = ResourceProvider()
+    return LuaGenerator(
+        LuaGeneratorSettings(),
+        resource_provider,
+        NoticesContainer(license_txt="", third_party_licenses_txt="", privacy_policy_md="", terms_of_service_md=""),
+    )
+
+
+def _run_benchmark(script_content: str, tmp_path: Path, name: str) -> float:
+    script_path: Path = tmp_path / f"{name}.lua"
+    script_path.write_text(script_content)
+    benchmark_path: Path = tmp_path / "benchmark.lua"
+    benchmark_path.write_text(BENCHMARK_SCRIPT)
+    result: subprocess.CompletedProcess = subprocess.run(
+        [LUA_EXECUTABLE, str(benchmark_path), str(script_path), str(ITERATIONS)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.skipif(LUA_EXECUTABLE is None, reason="lua is not on PATH")
+def test_optimized_generate_data(
+    internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator, tmp_path: Path
+):
+    export_model.lua_export_settings.optimize_script = False
+    naive_script: str = generator.generate(internal_model, export_model).script_content
+    export_model.lua_export_settings.optimize_script = True
+    optimized_script: str = generator.generate(internal_model, export_model).script_content
+
+    naive_seconds: float = _run_benchmark(naive_script, tmp_path, "naive")
+    optimized_seconds: float = _run_benchmark(optimized_script, tmp_path, "optimized")
+    LOGGER.info(
+        f"generate_data x {ITERATIONS}: naive={naive_seconds:.3f}s, optimized={optimized_seconds:.3f}s, "
+        f"speedup={naive_seconds / optimized_seconds:.2f}"
+    )
+    assert optimized_seconds < naive_seconds
@@ -5,11 +5,22 @@ from pathlib import Path
 
 import pytest
 
+from dcs_pylot_dash.service.dcs_common_data_types import UpdateTier
 from dcs_pylot_dash.service.dcs_model_external import ExternalModel
 from dcs_pylot_dash.service.dcs_model_internal import InternalModel
-from dcs_pylot_dash.service.export_model import ExportModel, LuaGeneratorOutput
-from dcs_pylot_dash.service.lua_generator import LuaGenerator, LuaGeneratorSettings
+from dcs_pylot_dash.service.export_model import (
+    ExportModel,
+    LuaGeneratorOutput,
+    ExportModelTreeNode,
+    ExportModelField,
+    InvalidExportModelError,
+    HttpServerSettings,
+    DataTransport,
+    LuaExportSettings,
+)
+from dcs_pylot_dash.service.lua_generator import LuaGenerator, LuaGeneratorSettings, LuaTemplateVar
 from dcs_pylot_dash.service.notice_service import NoticesContainer
+from dcs_pylot_dash.service.units import Unit
 from dcs_pylot_dash.utils.resource_provider import ResourceProvider
 
 
@@ -28,15 +39,275 @@ def export_model() -> ExportModel:
     return ExportModel.model_validate_json(src_json)
 
 
-def test_generate(model_external: ExternalModel, export_model: ExportModel):
+@pytest.fixture
+def internal_model(model_external: ExternalModel) -> InternalModel:
     internal_model = InternalModel(model_external)
     internal_model.populate()
-    assert internal_model
+    return internal_model
+
+
+@pytest.fixture
+def generator() -> LuaGenerator:
     resource_provider: ResourceProvider = ResourceProvider()
-    generator: LuaGenerator = LuaGenerator(
+    return LuaGenerator(
         LuaGeneratorSettings(),
         resource_provider,
         NoticesContainer(license_txt="", third_party_licenses_txt="", privacy_policy_md="", terms_of_service_md=""),
     )
+
+
+def test_generate(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    assert internal_model
     generator_output: LuaGeneratorOutput = generator.generate(internal_model, export_model)
     assert generator_output
+
+
+def test_generate_keep_alive(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert "local keep_alive = true" in script_content
+    assert f"local keep_alive_timeout = {HttpServerSettings.KEEP_ALIVE_TIMEOUT_DEFAULT}" in script_content
+
+    export_model.http_server_settings.keep_alive = False
+    export_model.http_server_settings.keep_alive_max_requests = 10
+    script_content = generator.generate(internal_model, export_model).script_content
+    assert "local keep_alive = false" in script_content
+    assert "local keep_alive_max_requests = 10" in script_content
+
+
+def test_export_tree(export_model: ExportModel):
+    tree: ExportModelTreeNode = ExportModelTreeNode.build(export_model.fields)
+    assert tree.name == ""
+    assert tree.parent is None
+    leaves: list[ExportModelTreeNode] = []
+    nodes: list[ExportModelTreeNode] = [tree]
+    while len(nodes) > 0:
+        node: ExportModelTreeNode = nodes.pop()
+        if node.has_export_field:
+            leaves.append(node)
+            assert len(node.nodes) == 0
+            assert node.name == node.export_field.name
+            assert node.local_name == node.export_field.name_chunks[-1]
+            assert tree.get_node(node.name) is node
+        nodes.extend(reversed(node.nodes.values()))
+    assert sorted(leaf.name for leaf in leaves) == sorted(field.name for field in export_model.fields)
+    assert tree.get_node("does.not.exist") is None
+
+
+def test_export_tree_mixed_leaf(export_model: ExportModel):
+    field: ExportModelField = export_model.fields[0]
+    nested_field: ExportModelField = field.model_copy(update={"name": f"{field.name}.nested"})
+    with pytest.raises(InvalidExportModelError):
+        ExportModelTreeNode.build([field, nested_field])
+
+
+def test_generate_snapshot_slice(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.lua_export_settings.snapshot_slice_ms = 250
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert "local snapshot_slice = 250 / 1000" in script_content
+    assert "\"snapshot_slice_ms\":' .. 250 .. '," in script_content
+
+
+def test_generate_frame_budget(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.http_server_settings.max_accepts_per_frame = 2
+    export_model.http_server_settings.max_frame_time_ms = 5
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert "local max_accepts_per_frame = 2" in script_content
+    assert "local max_frame_time = 5 / 1000" in script_content
+
+
+def test_generate_event_stream(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert "local event_stream_enabled = false" in script_content
+
+    export_model.http_server_settings.transport = DataTransport.SSE
+    script_content = generator.generate(internal_model, export_model).script_content
+    assert "local event_stream_enabled = true" in script_content
+    assert f'local event_stream_path = "{HttpServerSettings.EVENT_STREAM_PATH}"' in script_content
+
+
+def test_generate_delta_history(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert f"local delta_history_size = {LuaExportSettings.DELTA_HISTORY_SIZE_DEFAULT}" in script_content
+
+    export_model.lua_export_settings.delta_history_size = 0
+    script_content = generator.generate(internal_model, export_model).script_content
+    assert "local delta_history_size = 0" in script_content
+
+
+def test_generate_specialized_encoder(
+    internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator
+):
+    export_model.fields.append(ExportModelField(name="pilot", internal_field_name="pilot_name"))
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.count", internal_field_name="payload_info.Stations.count")
+    )
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert 'encode_buffer[1] = \'{"ias":{"kts":\'' in script_content
+    assert "buffer[2] = encode_number(data.ias.kts, '%.0f')" in script_content
+    assert "encode_number(data.mach, '%.2f')" in script_content
+    assert "encode_string(data.pilot)" in script_content
+    # lists are left to the generic encoder
+    assert "encode_value(data.weapons.stations)" in script_content
+
+    export_model.lua_export_settings.specialized_encoder = False
+    script_content = generator.generate(internal_model, export_model).script_content
+    assert "encode_buffer" not in script_content
+    assert "return JSON:encode(data)" in script_content
+
+
+def test_generate_fused_list_loop(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.count", internal_field_name="payload_info.Stations.count")
+    )
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert script_content.count("in ipairs(payload_info.Stations or {}) do") == 1
+    assert script_content.count("local element = {}") == 1
+    assert "element.clsid = v.CLSID" in script_content
+    assert "element.count = v.count" in script_content
+    assert "data.weapons.stations[i] = element" in script_content
+
+
+def test_generate_time_sliced_lists(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.count", internal_field_name="payload_info.Stations.count")
+    )
+    export_model.lua_export_settings.list_elements_per_frame = 2
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert "local function collect_weapons_stations(list_1)" in script_content
+    assert "for i, v in ipairs(list_1) do" in script_content
+    assert "collected[i] = element\n        if i % 2 == 0 then\n            coroutine.yield()" in script_content
+    assert (
+        "data.weapons.stations = collect_list('weapons.stations', collect_weapons_stations, payload_info.Stations or {})"
+        in script_content
+    )
+    assert "data.weapons.stations[i] = element" not in script_content
+
+
+def test_generate_time_sliced_lists_with_other_fields(
+    internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator
+):
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.shells", internal_field_name="payload_info.Cannon.shells")
+    )
+    export_model.lua_export_settings.list_elements_per_frame = 2
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert (
+        "data.weapons.stations = {}\n"
+        "    for i, element in ipairs(collect_list('weapons.stations', collect_weapons_stations, payload_info.Stations"
+        " or {})) do\n"
+        "        data.weapons.stations[i] = element\n"
+        "    end\n"
+        "    data.weapons.stations.shells = " in script_content
+    )
+
+
+def test_generate_update_tiers(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.fields.append(
+        ExportModelField(name="pilot", internal_field_name="pilot_name", update_tier_override=UpdateTier.STATIC)
+    )
+    export_model.fields.append(
+        ExportModelField(
+            name="stations.count",
+            internal_field_name="payload_info.Stations.count",
+            update_tier_override=UpdateTier.SLOW,
+        )
+    )
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert (
+        'if is_tier_due("static") then\n        tier_values.pilot_name = safe_get(LoGetPilotName, "")' in script_content
+    )
+    assert "local pilot_name = tier_values.pilot_name" in script_content
+    # payload_info.Cannon.shells is exported in the frame tier, which is faster
+    assert "local payload_info = safe_get(LoGetPayloadInfo, {})" in script_content
+    assert 'is_tier_due("slow")' not in script_content
+    assert "local mach = safe_get(LoGetMachNumber, 0)" in script_content
+
+
+def test_generate_profiling(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert "local profiling_enabled = false" in script_content
+    assert 'record_timing("LoGetMachNumber"' not in script_content
+
+    export_model.lua_export_settings.profiling = True
+    script_content = generator.generate(internal_model, export_model).script_content
+    assert "local profiling_enabled = true" in script_content
+    assert f'local stats_path = "{HttpServerSettings.STATS_PATH}"' in script_content
+    assert (
+        "started = os.clock()\n    local mach = safe_get(LoGetMachNumber, 0)\n"
+        '    record_timing("LoGetMachNumber", started)' in script_content
+    )
+
+
+def test_generate_optimized_script(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert "function new_data()" in script_content
+    assert "    LoGetMachNumber = _G.LoGetMachNumber" in script_content
+    assert "data.ias = {}" not in script_content
+    assert "local memoize_formatters = true" in script_content
+
+    export_model.lua_export_settings.optimize_script = False
+    script_content = generator.generate(internal_model, export_model).script_content
+    assert "function new_data()\n    return {}\nend" in script_content
+    assert "local memoize_formatters = false" in script_content
+    assert "_G.LoGetMachNumber" not in script_content
+    assert "data.ias = {}" in script_content
+
+
+def test_generate_shared_field(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.fields.append(
+        ExportModelField(
+            name="fuel.internal.kg",
+            internal_field_name="engine_info.fuel_internal",
+            output_unit_override=Unit.KILOGRAMS,
+        )
+    )
+    export_model.fields.append(ExportModelField(name="tas.ms", internal_field_name="tas", output_unit_override=Unit.MS))
+    script_content: str = generator.generate(internal_model, export_model).script_content
+    assert script_content.count("engine_info.fuel_internal") == 1
+    assert "local shared_engine_info_fuel_internal = engine_info.fuel_internal" in script_content
+    assert "data.fuel.internal.lbs = (shared_engine_info_fuel_internal or 0) * 12000.0" in script_content
+    assert "data.fuel.internal.kg = (shared_engine_info_fuel_internal or 0) * " in script_content
+    # root fields already are locals
+    assert "shared_tas" not in script_content
+    assert "data.tas.ms = (tas or 0)" in script_content
+
+    export_model.lua_export_settings.optimize_script = False
+    script_content = generator.generate(internal_model, export_model).script_content
+    assert "shared_engine_info_fuel_internal" not in script_content
+
+
+def test_generate_shared_runtime(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    single_output: LuaGeneratorOutput = generator.generate(internal_model, export_model)
+    assert single_output.runtime_script_name is None
+    assert single_output.runtime_content is None
+
+    export_model.lua_export_settings.shared_runtime = True
+    export_model.http_server_settings.bind_port = 50123
+    output: LuaGeneratorOutput = generator.generate(internal_model, export_model)
+    runtime_module_name: str = output.runtime_script_name.removesuffix(".lua")
+    assert runtime_module_name.startswith(LuaGeneratorSettings.RUNTIME_MODULE_PREFIX_DEFAULT)
+    assert f'local runtime = require("{runtime_module_name}")' in output.script_content
+    assert "    bind_port = 50123," in output.script_content
+    assert "function generate_data(data)" in output.script_content
+    assert "LuaExportStart" not in output.script_content
+
+    assert "return function(config, build_model)" in output.runtime_content
+    assert "local server_port = config.bind_port" in output.runtime_content
+    assert "function generate_data(data)" not in output.runtime_content
+    assert "%" + LuaTemplateVar.MODEL_CONTENT + "%" not in output.runtime_content
+
+    # the runtime does not depend on the export model
+    export_model.fields = export_model.fields[:1]
+    export_model.http_server_settings.transport = DataTransport.SSE
+    other_output: LuaGeneratorOutput = generator.generate(internal_model, export_model)
+    assert other_output.runtime_script_name == output.runtime_script_name
+    assert other_output.runtime_content == output.runtime_content
@@ -0,0 +1,890 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import base64
+import hashlib
+import json
+import logging
+import math
+import random
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from dcs_pylot_dash.service.dcs_model_external import ExternalModel
+from dcs_pylot_dash.service.dcs_model_internal import InternalModel
+from dcs_pylot_dash.service.export_model import (
+    DataTransport,
+    ExportModel,
+    ExportModelField,
+    HttpServerSettings,
+    LuaGeneratorOutput,
+)
+from dcs_pylot_dash.service.lua_generator import LuaGenerator, LuaGeneratorSettings
+from dcs_pylot_dash.service.notice_service import NoticesContainer
+from dcs_pylot_dash.service.source_model_service import SourceModelService
+from dcs_pylot_dash.service.units import Unit, UnitConverter
+from dcs_pylot_dash.utils.resource_provider import ResourceProvider
+
+# DCS runs Lua 5.1
+lua51 = pytest.importorskip("lupa.lua51")
+
+LOGGER = logging.getLogger(__name__)
+
+DATA_PATH: Path = Path(__file__).parent / "data"
+
+# The DCS environment: log, lfs, the LoGet* functions of the fields in export_model_3.json, and LoGetSelfData for the
+# coordinates of the default external model
+DCS_STUBS: bytes = b"""
+LOGGED_ERRORS = {}
+log = {INFO = 1, ERROR = 2}
+function log.write(prefix, level, message)
+    if level == log.ERROR then
+        LOGGED_ERRORS[#LOGGED_ERRORS + 1] = message
+    end
+end
+MACH = 0.5
+ENGINE_INFO = {fuel_internal = 0.5}
+PAYLOAD_INFO = {Cannon = {shells = 100}, Stations = {}}
+function LoGetIndicatedAirSpeed() return 120 end
+function LoGetMachNumber() return MACH end
+function LoGetTrueAirSpeed() return 130 end
+function LoGetMagneticYaw() return 1.2 end
+function LoGetAltitudeAboveSeaLevel() return 3000 end
+function LoGetAltitudeAboveGroundLevel() return 2500 end
+function LoGetEngineInfo() return ENGINE_INFO end
+function LoGetPayloadInfo() return PAYLOAD_INFO end
+SELF_DATA = {LatLongAlt = {Lat = 0, Long = 0}}
+function LoGetSelfData() return SELF_DATA end
+package.preload["socket"] = function() return FAKE.socket end
+package.preload["json"] = function() return JSON_MODULE end
+package.preload["lfs"] = function() return {writedir = function() return WRITE_DIR end} end
+"""
+
+
+class LuaExport:
+    """
+    Generated scripts, loaded with the DCS stubs, LuaSocket replaced by fake_socket.lua, and a JSON module backed by
+    the json module of Python. Lua strings are bytes on the Python side.
+    """
+
+    def __init__(self, *script_contents: str, write_dir: Path | None = None) -> None:
+        """
+        :param write_dir: Returned by lfs.writedir, i.e., the Saved Games directory of DCS
+        """
+        self.lua = lua51.LuaRuntime(encoding=None)
+        self.fake = self.lua.execute((DATA_PATH / "fake_socket.lua").read_bytes())
+        lua_globals = self.lua.globals()
+        lua_globals.FAKE = self.fake
+        lua_globals.JSON_MODULE = self.lua.table_from({b"encode": self._encode, b"decode": self._decode})
+        lua_globals.WRITE_DIR = f"{write_dir}/".encode() if write_dir is not None else b""
+        self.lua.execute(DCS_STUBS)
+        for script_content in script_contents:
+            self.lua.execute(script_content.encode())
+
+    def to_python(self, value: Any) -> Any:
+        if lua51.lua_type(value) == "table":
+            items: dict = {key: self.to_python(item) for key, item in value.items()}
+            if len(items) > 0 and all(isinstance(key, int) for key in items):
+                return [items[index] for index in sorted(items)]
+            return {key.decode(): item for key, item in items.items()}
+        if isinstance(value, bytes):
+            return value.decode()
+        return value
+
+    def to_lua(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return self.lua.table_from({key.encode(): self.to_lua(item) for key, item in value.items()})
+        if isinstance(value, list):
+            return self.lua.table_from([self.to_lua(item) for item in value])
+        if isinstance(value, str):
+            return value.encode()
+        return value
+
+    def _encode(self, _json_module: Any, value: Any) -> bytes:
+        return json.dumps(self.to_python(value)).encode()
+
+    def _decode(self, _json_module: Any, value: bytes) -> Any:
+        return self.to_lua(json.loads(value))
+
+    def start(self) -> None:
+        self.lua.globals().LuaExportStart()
+
+    def frame(self, seconds: float = 0.05) -> None:
+        self.fake.now = self.fake.now + seconds
+        self.lua.globals().LuaExportAfterNextFrame()
+
+    def stop(self) -> None:
+        self.lua.globals().LuaExportStop()
+
+    def connect(self, request: bytes = b"", port: int | None = None) -> Any:
+        """
+        :param port: The port of the server to connect to, any server if None
+        :return: The fake client socket, see fake_socket.lua
+        """
+        return self.fake.connect(request, port)
+
+    @property
+    def pending_connections(self) -> int:
+        return len(self.fake.pending)
+
+    @property
+    def logged_errors(self) -> list[str]:
+        return self.to_python(self.lua.globals().LOGGED_ERRORS) or []
+
+
+def get_request(path: str = "/", connection: str = "keep-alive") -> bytes:
+    return f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: {connection}\r\n\r\n".encode()
+
+
+def parse_events(sent: bytes) -> tuple[list[str], list[dict]]:
+    """
+    :return: The header lines and the data of each complete event of an event stream
+    """
+    head, separator, stream = sent.partition(b"\r\n\r\n")
+    assert separator, f"incomplete headers: {head!r}"
+    messages: list[bytes] = stream.split(b"\n\n")
+    assert messages[0] == b"retry: 1000"
+    assert messages[-1] == b"", "incomplete event"
+    events: list[dict] = []
+    for message in messages[1:-1]:
+        assert message.startswith(b"data: ") and b"\n" not in message
+        events.append(json.loads(message.removeprefix(b"data: ")))
+    return head.decode().split("\r\n"), events
+
+
+def websocket_request(key: str = "dGhlIHNhbXBsZSBub25jZQ==") -> bytes:
+    return (
+        f"GET {HttpServerSettings.WEBSOCKET_PATH} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+    ).encode()
+
+
+def client_frame(opcode: int, payload: bytes, mask: bytes = b"\x37\xfa\x21\x3d") -> bytes:
+    """
+    :return: A masked frame, as sent by browsers
+    """
+    length: int = len(payload)
+    if length < 126:
+        header: bytes = bytes([0x80 | opcode, 0x80 | length])
+    elif length < 65536:
+        header = bytes([0x80 | opcode, 0x80 | 126]) + length.to_bytes(2, "big")
+    else:
+        header = bytes([0x80 | opcode, 0x80 | 127]) + length.to_bytes(8, "big")
+    return header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def control_message(message: dict, length: int) -> bytes:
+    """
+    :return: The message as JSON, padded with whitespace to length bytes
+    """
+    encoded: bytes = json.dumps(message).encode()
+    return encoded + b" " * (length - len(encoded))
+
+
+def parse_websocket(sent: bytes) -> tuple[list[str], list[tuple[int, bytes]]]:
+    """
+    :return: The header lines of the handshake response, and the opcode and payload of each complete server frame
+    """
+    head, separator, stream = sent.partition(b"\r\n\r\n")
+    assert separator, f"incomplete headers: {head!r}"
+    frames: list[tuple[int, bytes]] = []
+    while len(stream) > 0:
+        assert stream[0] & 0x80, "fragmented frame"
+        assert not stream[1] & 0x80, "masked server frame"
+        length: int = stream[1] & 0x7F
+        index: int = 2
+        if length == 126:
+            length, index = int.from_bytes(stream[2:4], "big"), 4
+        elif length == 127:
+            length, index = int.from_bytes(stream[2:10], "big"), 10
+        assert len(stream) >= index + length, "incomplete frame"
+        frames.append((stream[0] & 0x0F, stream[index : index + length]))
+        stream = stream[index + length :]
+    return head.decode().split("\r\n"), frames
+
+
+def parse_responses(sent: bytes) -> list[tuple[dict[str, str], bytes]]:
+    """
+    :return: The headers (lower case names) and body of each complete response in sent
+    """
+    responses: list[tuple[dict[str, str], bytes]] = []
+    while len(sent) > 0:
+        head, separator, rest = sent.partition(b"\r\n\r\n")
+        assert separator, f"incomplete headers: {head!r}"
+        lines: list[str] = head.decode().split("\r\n")
+        assert lines[0].startswith("HTTP/1.1 ")
+        headers: dict[str, str] = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        content_length: int = int(headers["content-length"])
+        assert len(rest) >= content_length, "incomplete body"
+        responses.append((headers, rest[:content_length]))
+        sent = rest[content_length:]
+    return responses
+
+
+@pytest.fixture
+def internal_model() -> InternalModel:
+    src_json_path: Path = DATA_PATH / "external_model_1.json"
+    external_model: ExternalModel = ExternalModel.model_validate_json(src_json_path.read_text())
+    return InternalModel(external_model).populate()
+
+
+@pytest.fixture
+def export_model() -> ExportModel:
+    src_json_path: Path = DATA_PATH / "export_model_3.json"
+    return ExportModel.model_validate_json(src_json_path.read_text())
+
+
+@pytest.fixture
+def generator() -> LuaGenerator:
+    resource_provider: ResourceProvider = ResourceProvider()
+    return LuaGenerator(
+        LuaGeneratorSettings(),
+        resource_provider,
+        NoticesContainer(license_txt="", third_party_licenses_txt="", privacy_policy_md="", terms_of_service_md=""),
+    )
+
+
+def load_export(generator: LuaGenerator, internal_model: InternalModel, export_model: ExportModel) -> LuaExport:
+    lua_export: LuaExport = LuaExport(generator.generate(internal_model, export_model).script_content)
+    lua_export.start()
+    return lua_export
+
+
+def test_poll(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    client = lua_export.connect(get_request())
+    lua_export.frame()
+    [(headers, body)] = parse_responses(client.sent)
+    assert headers["connection"] == "keep-alive"
+    data: dict = json.loads(body)
+    assert data["mach"] == 0.5
+    assert data["arms"]["gun_rounds"] == 100
+    assert not client.closed
+    lua_export.stop()
+    assert client.closed
+    assert lua_export.logged_errors == []
+
+
+def test_slow_client_does_not_block_frame(
+    internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator
+):
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    request: bytes = get_request(connection="close")
+    split_index: int = request.index(b"close") + 2
+    slow_client = lua_export.connect(request[:10])
+    client = lua_export.connect(get_request())
+    lua_export.frame()
+    assert slow_client.sent == b""
+    assert len(parse_responses(client.sent)) == 1
+
+    # partially received lines are kept until the rest arrives
+    slow_client.input = request[10:split_index]
+    lua_export.frame()
+    assert slow_client.sent == b""
+    slow_client.input = request[split_index:]
+    lua_export.frame()
+    [(headers, _)] = parse_responses(slow_client.sent)
+    assert headers["connection"] == "close"
+    assert slow_client.closed
+
+
+def test_partial_send_resumes(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    client = lua_export.connect(get_request())
+    client.send_limit = 100
+    lua_export.frame()
+    assert len(client.sent) == 100
+
+    # a full send buffer: the client is not writable, so the response is not continued
+    client.blocked = True
+    lua_export.frame()
+    assert len(client.sent) == 100
+    client.blocked = False
+
+    frames: int = 1
+    while b"}" not in client.sent[-1:]:
+        lua_export.frame()
+        frames += 1
+        assert frames < 100
+    [(headers, body)] = parse_responses(client.sent)
+    assert json.loads(body)["mach"] == 0.5
+    # one send call per frame, each continuing where the previous one stopped
+    assert client.send_calls == frames
+    assert not client.closed
+
+    # the connection is kept alive for the next request
+    client.send_limit = 1_000_000
+    client.input = get_request()
+    lua_export.frame()
+    assert len(parse_responses(client.sent)) == 2
+
+
+def test_max_accepts_per_frame(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.http_server_settings.max_accepts_per_frame = 2
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    clients: list = [lua_export.connect(get_request(connection="close")) for _ in range(5)]
+    lua_export.frame()
+    assert lua_export.pending_connections == 3
+    assert [len(client.sent) > 0 for client in clients] == [True, True, False, False, False]
+    lua_export.frame()
+    assert lua_export.pending_connections == 1
+    lua_export.frame()
+    assert lua_export.pending_connections == 0
+    assert all(len(parse_responses(client.sent)) == 1 and client.closed for client in clients)
+
+
+def test_max_frame_time(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.http_server_settings.max_frame_time_ms = 10
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    clients: list = [lua_export.connect() for _ in range(3)]
+    lua_export.frame()
+    for client in clients:
+        # each receive exceeds the budget of the frame
+        client.receive_cost = 0.02
+        client.input = get_request()
+
+    served: list[int] = []
+    for _ in range(3):
+        lua_export.frame()
+        served.append(sum(1 for client in clients if len(client.sent) > 0))
+    # at least one client is served per frame, and the clients that were not served are served first in the next one
+    assert served == [1, 2, 3]
+
+
+def test_event_stream(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.http_server_settings.transport = DataTransport.SSE
+    export_model.ui_export_settings.fetch_data_interval_ms = 100
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    client = lua_export.connect(get_request(HttpServerSettings.EVENT_STREAM_PATH))
+    lua_export.frame()
+    header_lines, events = parse_events(client.sent)
+    assert header_lines[0] == "HTTP/1.1 200 OK"
+    assert "Content-Type: text/event-stream" in header_lines
+    assert "Cache-Control: no-cache" in header_lines
+    assert not any(line.startswith("Content-Length") for line in header_lines)
+    [event] = events
+    assert event["_meta"]["delta"] is False
+    assert event["mach"] == 0.5
+
+    # one event per push interval, each a delta since the previous event
+    lua_export.frame(0.06)
+    assert len(parse_events(client.sent)[1]) == 1
+    lua_export.lua.globals().MACH = 0.8
+    lua_export.frame(0.06)
+    events = parse_events(client.sent)[1]
+    assert len(events) == 2
+    assert events[1]["_meta"]["delta"] is True
+    assert events[1]["_meta"]["base_seq"] == event["_meta"]["seq"]
+    assert {key: value for key, value in events[1].items() if key != "_meta"} == {"mach": 0.8}
+
+    # a failing send drops the stream client
+    client.send_error = b"closed"
+    lua_export.frame(0.2)
+    assert client.closed
+    send_calls: int = client.send_calls
+    lua_export.frame(0.2)
+    assert client.send_calls == send_calls
+
+
+def test_event_stream_client_closed(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.http_server_settings.transport = DataTransport.SSE
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    client = lua_export.connect(get_request(HttpServerSettings.EVENT_STREAM_PATH))
+    lua_export.frame()
+    assert len(parse_events(client.sent)[1]) == 1
+    client.closed_remote = True
+    lua_export.frame()
+    assert client.closed
+
+
+@pytest.fixture
+def websocket_export_model(export_model: ExportModel) -> ExportModel:
+    export_model.http_server_settings.transport = DataTransport.WEBSOCKET
+    export_model.ui_export_settings.fetch_data_interval_ms = 100
+    return export_model
+
+
+def test_websocket_handshake(
+    internal_model: InternalModel, websocket_export_model: ExportModel, generator: LuaGenerator
+):
+    lua_export: LuaExport = load_export(generator, internal_model, websocket_export_model)
+    # the sample of RFC 6455, section 1.3
+    client = lua_export.connect(websocket_request())
+    lua_export.frame()
+    header_lines, frames = parse_websocket(client.sent)
+    assert header_lines[0] == "HTTP/1.1 101 Switching Protocols"
+    assert "Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=" in header_lines
+    [(opcode, payload)] = frames
+    assert opcode == 1
+    assert json.loads(payload)["mach"] == 0.5
+
+    # SHA-1 pads the key and the GUID (36 bytes) to 64 byte blocks: 55 and 56 bytes are the edge cases
+    for key in ("a" * 19, "b" * 20, "c" * 28, "d" * 100):
+        client = lua_export.connect(websocket_request(key))
+        lua_export.frame()
+        expected_accept: str = base64.b64encode(
+            hashlib.sha1((key + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()).digest()
+        ).decode()
+        assert f"Sec-WebSocket-Accept: {expected_accept}" in parse_websocket(client.sent)[0]
+
+
+def test_websocket_bad_request(
+    internal_model: InternalModel, websocket_export_model: ExportModel, generator: LuaGenerator
+):
+    lua_export: LuaExport = load_export(generator, internal_model, websocket_export_model)
+    client = lua_export.connect(get_request(HttpServerSettings.WEBSOCKET_PATH))
+    lua_export.frame()
+    assert client.sent.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert client.closed
+
+
+def test_websocket_control_messages(
+    internal_model: InternalModel, websocket_export_model: ExportModel, generator: LuaGenerator
+):
+    lua_export: LuaExport = load_export(generator, internal_model, websocket_export_model)
+    client = lua_export.connect(websocket_request())
+    lua_export.frame()
+    assert len(parse_websocket(client.sent)[1]) == 1
+
+    # the largest payload with a 7 bit length
+    client.input = client_frame(1, control_message({"type": "pause"}, 125))
+    lua_export.frame(0.2)
+    lua_export.frame(0.2)
+    assert len(parse_websocket(client.sent)[1]) == 1
+
+    # the smallest payload with a 16 bit length
+    client.input = client_frame(1, control_message({"type": "resume"}, 126))
+    lua_export.frame(0.2)
+    frames: list[tuple[int, bytes]] = parse_websocket(client.sent)[1]
+    assert len(frames) == 2
+    assert json.loads(frames[1][1])["_meta"]["delta"] is True
+
+    # frames may arrive in pieces, and several at once
+    select_frame: bytes = client_frame(1, control_message({"type": "select", "fields": ["mach", "ias.kts"]}, 200))
+    client.input = select_frame[:3]
+    lua_export.frame(0.01)
+    client.input = select_frame[3:] + client_frame(9, b"ping")
+    lua_export.frame(0.2)
+    frames = parse_websocket(client.sent)[1]
+    assert frames[2] == (10, b"ping")
+    selected: dict = json.loads(frames[3][1])
+    assert selected["_meta"]["delta"] is False
+    assert selected.keys() == {"_meta", "mach", "ias"}
+    # selected fields are encoded like full snapshots, at the decimal digits of each field
+    assert selected["ias"]["kts"] == round(120 * 1.94384)
+
+    client.input = client_frame(1, control_message({"type": "rate", "interval_ms": 1000}, 50))
+    lua_export.frame(0.2)
+    lua_export.frame(0.5)
+    assert len(parse_websocket(client.sent)[1]) == 4
+    lua_export.frame(0.5)
+    assert len(parse_websocket(client.sent)[1]) == 5
+    assert not client.closed
+
+
+@pytest.mark.parametrize("length", [4097, 65536])
+def test_websocket_message_too_large(
+    internal_model: InternalModel, websocket_export_model: ExportModel, generator: LuaGenerator, length: int
+):
+    lua_export: LuaExport = load_export(generator, internal_model, websocket_export_model)
+    client = lua_export.connect(websocket_request())
+    lua_export.frame()
+    client.input = client_frame(1, control_message({"type": "pause"}, length))
+    lua_export.frame()
+    assert parse_websocket(client.sent)[1][-1] == (8, b"")
+    assert client.closed
+
+
+def test_websocket_large_snapshot(
+    internal_model: InternalModel, websocket_export_model: ExportModel, generator: LuaGenerator
+):
+    websocket_export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    lua_export: LuaExport = load_export(generator, internal_model, websocket_export_model)
+    stations = lua_export.lua.globals().PAYLOAD_INFO.Stations
+    for index in range(1, 2001):
+        stations[index] = lua_export.to_lua({"CLSID": f"{{{index:036d}}}"})
+    client = lua_export.connect(websocket_request())
+    lua_export.frame()
+    [(opcode, payload)] = parse_websocket(client.sent)[1]
+    # a 64 bit length
+    assert len(payload) >= 65536
+    assert len(json.loads(payload)["weapons"]["stations"]) == 2000
+
+
+def poll(lua_export: LuaExport, path: str = "/", seconds: float = 0.2) -> dict:
+    """
+    :param seconds: Time since the last frame. The default exceeds the snapshot slice, such that a new snapshot is made
+    :return: The received data
+    """
+    client = lua_export.connect(get_request(path, connection="close"))
+    lua_export.frame(seconds)
+    [(_, body)] = parse_responses(client.sent)
+    return json.loads(body)
+
+
+def without_meta(data: dict) -> dict:
+    return {key: value for key, value in data.items() if key != "_meta"}
+
+
+def test_delta(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.lua_export_settings.delta_history_size = 2
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    full: dict = poll(lua_export)
+    seq: int = full["_meta"]["seq"]
+    assert full["_meta"]["delta"] is False
+    assert full["mach"] == 0.5
+
+    # requests within one snapshot slice are served the same snapshot
+    assert poll(lua_export, f"/?since={seq}", seconds=0.01)["_meta"]["seq"] == seq
+
+    lua_export.lua.globals().MACH = 0.8
+    delta: dict = poll(lua_export, f"/?since={seq}")
+    assert delta["_meta"]["seq"] == seq + 1
+    assert delta["_meta"]["delta"] is True
+    assert delta["_meta"]["base_seq"] == seq
+    assert without_meta(delta) == {"mach": 0.8}
+
+    unchanged: dict = poll(lua_export, f"/?since={seq + 1}")
+    assert unchanged["_meta"]["seq"] == seq + 2
+    assert unchanged["_meta"]["delta"] is True
+    assert without_meta(unchanged) == {}
+
+    # seq has left the history of the last 2 snapshots: a full snapshot is sent instead
+    fallback: dict = poll(lua_export, f"/?since={seq}")
+    assert fallback["_meta"]["seq"] == seq + 3
+    assert fallback["_meta"]["delta"] is False
+    assert "base_seq" not in fallback["_meta"]
+    assert without_meta(fallback) == without_meta(full) | {"mach": 0.8}
+
+    # unknown sequence numbers, e.g., from an earlier session
+    assert poll(lua_export, "/?since=123456789")["_meta"]["delta"] is False
+
+
+def test_delta_output_resolution(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.lua_export_settings.delta_history_size = 2
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    lua_globals = lua_export.lua.globals()
+    full: dict = poll(lua_export)
+    seq: int = full["_meta"]["seq"]
+    assert full["mach"] == 0.5
+    assert full["fuel"]["internal"]["lbs"] == 6000
+
+    # changes below the decimal digits of the fields are not sent
+    lua_globals.MACH = 0.50001
+    lua_globals.ENGINE_INFO.fuel_internal = 0.5000001
+    unchanged: dict = poll(lua_export, f"/?since={seq}")
+    assert unchanged["_meta"]["delta"] is True
+    assert without_meta(unchanged) == {}
+
+    # and changes are sent at the decimal digits of full snapshots
+    lua_globals.MACH = 0.8049
+    lua_globals.ENGINE_INFO.fuel_internal = 0.6
+    delta: dict = poll(lua_export, f"/?since={unchanged['_meta']['seq']}")
+    assert delta["_meta"]["delta"] is True
+    assert without_meta(delta) == {"mach": 0.8, "fuel": {"internal": {"lbs": 7200}}}
+
+
+def test_delta_disabled(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.lua_export_settings.delta_history_size = 0
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    seq: int = poll(lua_export)["_meta"]["seq"]
+    data: dict = poll(lua_export, f"/?since={seq}")
+    assert data["_meta"]["seq"] == seq + 1
+    assert data["_meta"]["delta"] is False
+    assert data["mach"] == 0.5
+
+
+def test_shared_runtime(
+    tmp_path: Path, internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator
+):
+    export_model.lua_export_settings.shared_runtime = True
+    other_export_model: ExportModel = export_model.model_copy(deep=True)
+    other_export_model.fields = other_export_model.fields[1:2]
+    other_export_model.http_server_settings.bind_port = export_model.http_server_settings.bind_port + 1
+    outputs: list[LuaGeneratorOutput] = [
+        generator.generate(internal_model, model) for model in (export_model, other_export_model)
+    ]
+    assert outputs[0].runtime_script_name == outputs[1].runtime_script_name
+    # found by require in the Scripts folder of the Saved Games directory, see dashboard.lua.template
+    (tmp_path / f"Scripts\\{outputs[0].runtime_script_name}").write_text(outputs[0].runtime_content)
+
+    lua_export: LuaExport = LuaExport(*(output.script_content for output in outputs), write_dir=tmp_path)
+    runtime_module_name: str = outputs[0].runtime_script_name.removesuffix(".lua")
+    assert lua51.lua_type(lua_export.lua.globals().package.loaded[runtime_module_name.encode()]) == "function"
+    lua_export.start()
+    ports: list[int] = [model.http_server_settings.bind_port for model in (export_model, other_export_model)]
+    clients: list[Any] = [lua_export.connect(get_request(connection="close"), port) for port in ports]
+    lua_export.frame()
+    [(_, body)] = parse_responses(clients[0].sent)
+    data: dict = json.loads(body)
+    assert data["mach"] == 0.5
+    assert data["arms"]["gun_rounds"] == 100
+    [(_, body)] = parse_responses(clients[1].sent)
+    assert without_meta(json.loads(body)) == {"mach": 0.5}
+
+    lua_export.stop()
+    assert all(client.closed for client in clients)
+    assert lua_export.logged_errors == []
+
+
+@pytest.mark.parametrize("optimize_script", [False, True])
+def test_list_fields(
+    internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator, optimize_script: bool
+):
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.count", internal_field_name="payload_info.Stations.count")
+    )
+    export_model.lua_export_settings.optimize_script = optimize_script
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    lua_export.lua.globals().PAYLOAD_INFO.Stations = lua_export.to_lua(
+        [{"CLSID": "{AIM-9M}", "count": 2}, {"CLSID": "{MK-82}", "count": 4}]
+    )
+    assert poll(lua_export)["weapons"]["stations"] == [
+        {"clsid": "{AIM-9M}", "count": 2},
+        {"clsid": "{MK-82}", "count": 4},
+    ]
+
+
+@pytest.mark.parametrize("optimize_script", [False, True])
+def test_merged_list_fields(export_model: ExportModel, generator: LuaGenerator, optimize_script: bool):
+    # a second list of stations, whose elements are merged with the elements of Stations at the same index
+    external_model_json: dict = json.loads((DATA_PATH / "external_model_1.json").read_text())
+    payload_info_fields: dict = external_model_json["fields"]["payload_info"]["fields"]
+    payload_info_fields["Pylons"] = payload_info_fields["Stations"]
+    internal_model: InternalModel = InternalModel(ExternalModel.model_validate(external_model_json)).populate()
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.pylon", internal_field_name="payload_info.Pylons.CLSID")
+    )
+    export_model.lua_export_settings.optimize_script = optimize_script
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    payload_info = lua_export.lua.globals().PAYLOAD_INFO
+    payload_info.Stations = lua_export.to_lua([{"CLSID": "{AIM-9M}"}, {"CLSID": "{MK-82}"}])
+    payload_info.Pylons = lua_export.to_lua([{"CLSID": "{LAU-7}"}, {"CLSID": "{BRU-33}"}, {"CLSID": "{TER-9A}"}])
+    assert poll(lua_export)["weapons"]["stations"] == [
+        {"clsid": "{AIM-9M}", "pylon": "{LAU-7}"},
+        {"clsid": "{MK-82}", "pylon": "{BRU-33}"},
+        {"pylon": "{TER-9A}"},
+    ]
+
+
+def finite_or_none(value: Any) -> Any:
+    """
+    :return: value with NaN and infinite numbers replaced by None, which is how encode_number encodes them
+    """
+    if isinstance(value, dict):
+        return {key: finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [finite_or_none(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def reject_constant(constant: str) -> None:
+    raise ValueError(f"not JSON: {constant}")
+
+
+def test_specialized_encoder(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.fields.append(ExportModelField(name="pilot", internal_field_name="pilot_name"))
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    lua_export: LuaExport = LuaExport(generator.generate(internal_model, export_model).script_content)
+    lua_export.lua.execute(b"""
+        function LoGetPilotName() return 'He said "hi"\\n\\t\\\\ \\1' end
+        PAYLOAD_INFO.Stations = {{CLSID = "{AIM-9M}"}, {CLSID = 'quote " and \\\\'}}
+    """)
+    lua_export.start()
+    lua_export.lua.execute(b"""
+        DATA = generate_data(new_data())
+        -- numbers are formatted with the decimal digits of their field, which integers are not affected by
+        local function truncate_numbers(t)
+            for key, value in pairs(t) do
+                if type(value) == "number" then
+                    t[key] = math.floor(value)
+                elseif type(value) == "table" then
+                    truncate_numbers(value)
+                end
+            end
+        end
+        truncate_numbers(DATA)
+        DATA.mach = 0 / 0
+        DATA.fuel.internal.lbs = -math.huge
+        -- unexpected types fall back to the generic encoder
+        DATA.arms.gun_rounds = "many"
+        DATA.tas.kts = {1, 2}
+    """)
+    specialized: bytes = lua_export.lua.eval("encode_data(DATA)")
+    generic: bytes = lua_export.lua.eval("JSON_MODULE:encode(DATA)")
+    decoded: dict = json.loads(specialized, parse_constant=reject_constant)
+    assert decoded == finite_or_none(json.loads(generic))
+    assert decoded["pilot"] == 'He said "hi"\n\t\\ \x01'
+    assert decoded["mach"] is None
+    assert decoded["fuel"]["internal"]["lbs"] is None
+    assert decoded["arms"]["gun_rounds"] == "many"
+    assert decoded["tas"]["kts"] == [1, 2]
+    assert decoded["weapons"]["stations"] == [{"clsid": "{AIM-9M}"}, {"clsid": 'quote " and \\'}]
+
+
+@pytest.mark.parametrize("optimize_script", [False, True])
+def test_shared_field(
+    internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator, optimize_script: bool
+):
+    export_model.fields.append(
+        ExportModelField(
+            name="fuel.internal.kg",
+            internal_field_name="engine_info.fuel_internal",
+            output_unit_override=Unit.KILOGRAMS,
+        )
+    )
+    export_model.fields.append(ExportModelField(name="tas.ms", internal_field_name="tas", output_unit_override=Unit.MS))
+    export_model.lua_export_settings.optimize_script = optimize_script
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    lua_export.lua.globals().ENGINE_INFO.fuel_internal = 0.25
+    data: dict = lua_export.to_python(lua_export.lua.eval("generate_data(new_data())"))
+    # fuel_internal is a portion of 12000 lbs
+    assert data["fuel"]["internal"]["lbs"] == pytest.approx(3000)
+    assert data["fuel"]["internal"]["kg"] == pytest.approx(UnitConverter.convert(Unit.POUNDS, 3000, Unit.KILOGRAMS))
+    assert data["tas"]["kts"] == pytest.approx(UnitConverter.convert(Unit.MS, 130, Unit.KNOTS))
+    assert data["tas"]["ms"] == pytest.approx(130)
+
+
+# Stations that count how often their CLSID is read, and fail to be read from FAILING_STATION on
+COUNTED_STATIONS: bytes = b"""
+STATION_READS = 0
+FAILING_STATION = math.huge
+for index = 1, 5 do
+    PAYLOAD_INFO.Stations[index] = setmetatable({}, {__index = function(_, key)
+        if key ~= "CLSID" then
+            return nil
+        end
+        if index >= FAILING_STATION then
+            error("station " .. index .. " removed")
+        end
+        STATION_READS = STATION_READS + 1
+        return "S" .. index
+    end})
+end
+"""
+
+
+def test_time_sliced_lists(internal_model: InternalModel, export_model: ExportModel, generator: LuaGenerator):
+    export_model.fields.append(
+        ExportModelField(name="weapons.stations.clsid", internal_field_name="payload_info.Stations.CLSID")
+    )
+    export_model.lua_export_settings.list_elements_per_frame = 2
+    lua_export: LuaExport = load_export(generator, internal_model, export_model)
+    lua_export.lua.execute(COUNTED_STATIONS)
+    lua_globals = lua_export.lua.globals()
+    complete: list[dict] = [{"clsid": f"S{index}"} for index in range(1, 6)]
+
+    # the first request starts a pass, its list is published when the pass is complete
+    assert not poll(lua_export)["weapons"]["stations"]
+    assert lua_globals.STATION_READS == 2
+    # passes advance every frame, without requests
+    lua_export.frame()
+    assert lua_globals.STATION_READS == 4
+    lua_export.frame()
+    assert lua_globals.STATION_READS == 5
+    # the next pass only starts with the next request
+    lua_export.frame()
+    assert lua_globals.STATION_READS == 5
+    assert poll(lua_export)["weapons"]["stations"] == complete
+    assert lua_globals.STATION_READS == 7
+
+    # a failed pass is dropped, and the list of the last complete pass is kept
+    lua_globals.FAILING_STATION = 4
+    lua_export.frame()
+    assert lua_globals.STATION_READS == 8
+    [error] = lua_export.logged_errors
+    assert error.startswith("Failed to collect weapons.stations: ") and error.endswith("station 4 removed")
+    lua_globals.FAILING_STATION = math.inf
+    assert poll(lua_export)["weapons"]["stations"] == complete
+    # the request has started a new pass
+    assert lua_globals.STATION_READS == 10
+    assert len(lua_export.logged_errors) == 1
+
+    lua_export.stop()
+    lua_export.start()
+    assert not poll(lua_export)["weapons"]["stations"]
+
+
+COORDINATE_UNITS: dict[str, tuple[Unit, ...]] = {
+    "self.LatLongAlt.Lat": (Unit.LAT_MIN_DEC, Unit.LAT_SEC, Unit.LAT_SEC_PRECISE),
+    "self.LatLongAlt.Long": (Unit.LON_MIN_DEC, Unit.LON_SEC, Unit.LON_SEC_PRECISE),
+}
+
+
+def load_coordinate_export(generator: LuaGenerator, optimize_script: bool) -> LuaExport:
+    export_model: ExportModel = ExportModel.model_validate_json((DATA_PATH / "export_model_3.json").read_text())
+    export_model.fields = [
+        ExportModelField(name=f"pos.{unit}", internal_field_name=field_id, output_unit_override=unit)
+        for field_id, units in COORDINATE_UNITS.items()
+        for unit in units
+    ]
+    export_model.lua_export_settings.optimize_script = optimize_script
+    internal_model: InternalModel = SourceModelService(ResourceProvider()).internal_model
+    return load_export(generator, internal_model, export_model)
+
+
+def format_coordinates(lua_export: LuaExport, lat: float, lon: float) -> dict[str, str]:
+    lat_long_alt = lua_export.lua.globals().SELF_DATA.LatLongAlt
+    lat_long_alt.Lat, lat_long_alt.Long = lat, lon
+    lua_globals = lua_export.lua.globals()
+    return lua_export.to_python(lua_globals.generate_data(lua_globals.new_data()))["pos"]
+
+
+@pytest.mark.parametrize(
+    "lat,expected",
+    [
+        (7.5, {"lat_min_dec": "N 07°30.000'", "lat_sec": "N 07°30'00\"", "lat_sec_precise": "N 07°30'00.00\""}),
+        # 59.995 minutes, 59' 59.7"
+        (
+            7 + 59.995 / 60,
+            {"lat_min_dec": "N 07°59.995'", "lat_sec": "N 08°00'00\"", "lat_sec_precise": "N 07°59'59.70\""},
+        ),
+        # 59.99999 minutes, 59' 59.9994"
+        (
+            7 + 59.99999 / 60,
+            {"lat_min_dec": "N 08°00.000'", "lat_sec": "N 08°00'00\"", "lat_sec_precise": "N 08°00'00.00\""},
+        ),
+        (
+            -(7 + 59.99999 / 60),
+            {"lat_min_dec": "S 08°00.000'", "lat_sec": "S 08°00'00\"", "lat_sec_precise": "S 08°00'00.00\""},
+        ),
+    ],
+)
+@pytest.mark.parametrize("optimize_script", [False, True])
+def test_coordinate_rollover(generator: LuaGenerator, optimize_script: bool, lat: float, expected: dict[str, str]):
+    lua_export: LuaExport = load_coordinate_export(generator, optimize_script)
+    position: dict[str, str] = format_coordinates(lua_export, lat, 0)
+    assert {key: value for key, value in position.items() if key.startswith("lat")} == expected
+
+
+def test_memoized_coordinates(generator: LuaGenerator):
+    plain: LuaExport = load_coordinate_export(generator, optimize_script=False)
+    memoized: LuaExport = load_coordinate_export(generator, optimize_script=True)
+    # random walks across minute boundaries, in steps below the resolution of the formatters
+    rng: random.Random = random.Random(23)
+    for _ in range(20):
+        degrees: int = rng.randint(-80, 80)
+        minute: int = rng.choice([0, 29, 59])
+        lat: float = degrees + (minute + 0.9999) / 60
+        lon: float = -lat
+        for _ in range(500):
+            lat += rng.gauss(2e-7, 1e-6)
+            lon -= rng.gauss(2e-7, 1e-6)
+            assert format_coordinates(memoized, lat, lon) == format_coordinates(plain, lat, lon)
@@ -0,0 +1,57 @@
+# Copyright (c) 2026 Kevin Rzepka <kdev@posteo.com>
+# SPDX-License-Identifier: MIT
+# License-Filename: LICENSE
+import logging
+import timeit
+
+import pytest
+
+from dcs_pylot_dash.service.html_ui_generator import HtmlTemplateVar, HtmlUiGeneratorSettings
+from dcs_pylot_dash.utils.resource_provider import ResourceProvider
+from dcs_pylot_dash.utils.template import CompiledTemplate
+
+LOGGER = logging.getLogger(__name__)
+
+
+def test_render():
+    template: CompiledTemplate = CompiledTemplate(
+        "a %foo% b %foo_bar% c //%baz% d %baz% 100% e", ["foo", "foo_bar", "baz"], comment_variables=["baz"]
+    )
+    assert template.render({"foo": "1", "foo_bar": "2", "baz": "3"}) == "a 1 b 2 c 3 d 3 100% e"
+
+
+def test_value_is_not_expanded():
+    template: CompiledTemplate = CompiledTemplate("%foo% %bar%", ["foo", "bar"])
+    assert template.render({"foo": "%bar%", "bar": "x"}) == "%bar% x"
+
+
+def test_partial():
+    template: CompiledTemplate = CompiledTemplate("%foo%-%bar%", ["foo", "bar"])
+    partial_template: CompiledTemplate = template.partial({"foo": "1"})
+    assert partial_template.render({"bar": "2"}) == "1-2"
+    assert template.render({"foo": "3", "bar": "4"}) == "3-4"
+    with pytest.raises(KeyError):
+        partial_template.render({})
+
+
+def test_render_matches_replace_chain():
+    """
+    Compares against the previous approach of one str.replace call per template variable. The timings are only
+    logged, since wall-clock comparisons are not reliable on shared runners.
+    """
+    html_template: str = ResourceProvider().read_template_file(HtmlUiGeneratorSettings.MAIN_TEMPLATE_NAME_DEFAULT)
+    values: dict[str, str] = {v: f"value of {v}" for v in HtmlTemplateVar}
+    compiled_template: CompiledTemplate = CompiledTemplate(html_template, HtmlTemplateVar)
+
+    def replace_chain() -> str:
+        result: str = html_template
+        for variable, value in values.items():
+            result = result.replace(f"%{variable}%", value)
+        return result
+
+    assert compiled_template.render(values) == replace_chain()
+
+    number: int = 2000
+    replace_chain_s: float = min(timeit.repeat(replace_chain, number=number, repeat=5))
+    compiled_s: float = min(timeit.repeat(lambda: compiled_template.render(values), number=number, repeat=5))
+    LOGGER.info(f"replace chain: {replace_chain_s:.4f}s, compiled: {compiled_s:.4f}s, {number} renders each")